@@ -107,9 +107,8 @@ def run_batch():
         except Exception as e:
             print(f"⚠️ Request Error: {e}")
 
-        # 3. Cooldown to stay within Groq/Gemini RPM limits
-        # Recommended: 4 seconds for 15 RPM limits
-        time.sleep(4) 
+        # No fixed cooldown needed: the server's key pool paces calls per key
+        # against its RPM/TPM budgets (GROQ_KEY_RPM / GROQ_KEY_TPM)
 
 if __name__ == "__main__":
     run_batch()
\ No newline at end of file
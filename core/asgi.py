@@ -3,6 +3,10 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn core.asgi:application``) so the
+async views, such as ``/api/solve/batch/``, run natively on the event loop
+instead of being adapted per request under WSGI.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -14,3 +18,11 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# Pay for SymPy, the Groq SDK and the sandbox workers before the first request
+from django.conf import settings  # noqa: E402
+
+if settings.SOLVER_WARMUP:
+    from solver.warmup import warm_up
+
+    warm_up()
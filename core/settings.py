@@ -10,11 +10,16 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
+from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# API keys and the overrides below may come from a .env file (the real environment wins)
+load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
@@ -41,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'solver.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -69,6 +75,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+ASGI_APPLICATION = 'core.asgi.application'
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
@@ -77,6 +85,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # WAL lets readers run alongside the writer; writers wait for the
+            # lock (busy timeout, seconds) instead of failing with "database is locked"
+            'timeout': float(os.getenv('SQLITE_BUSY_TIMEOUT', '20')),
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+        },
     }
 }
 
@@ -116,3 +131,167 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# Solver background jobs
+# Number of worker threads running queued /solve/jobs/ requests in each process
+
+SOLVER_JOB_WORKERS = int(os.getenv('SOLVER_JOB_WORKERS', '4'))
+
+# Default (and largest) number of problems kept in flight by the async batch API,
+# and the most queries one batch request may carry
+
+SOLVER_BATCH_CONCURRENCY = int(os.getenv('SOLVER_BATCH_CONCURRENCY', '4'))
+
+SOLVER_BATCH_MAX_QUERIES = int(os.getenv('SOLVER_BATCH_MAX_QUERIES', '50'))
+
+
+# Live solves
+# Seconds the one-time stream id handed out by /solve/live/ stays valid for /solve/stream/
+
+SOLVE_STREAM_MAX_AGE = int(os.getenv('SOLVE_STREAM_MAX_AGE', '300'))
+
+
+# Groq API key pool
+# Per-key request/token budgets (per minute) and how long a call may wait for a free key
+
+GROQ_KEY_RPM = int(os.getenv('GROQ_KEY_RPM', '30'))
+
+GROQ_KEY_TPM = int(os.getenv('GROQ_KEY_TPM', '12000'))
+
+GROQ_KEY_MAX_WAIT = float(os.getenv('GROQ_KEY_MAX_WAIT', '120'))
+
+# Pooled HTTP connections shared by every Groq client in the process
+
+GROQ_HTTP_MAX_CONNECTIONS = int(os.getenv('GROQ_HTTP_MAX_CONNECTIONS', '20'))
+
+GROQ_HTTP_MAX_KEEPALIVE = int(os.getenv('GROQ_HTTP_MAX_KEEPALIVE', '10'))
+
+GROQ_HTTP_KEEPALIVE_EXPIRY = float(os.getenv('GROQ_HTTP_KEEPALIVE_EXPIRY', '30'))
+
+GROQ_HTTP_TIMEOUT = float(os.getenv('GROQ_HTTP_TIMEOUT', '60'))
+
+
+# Proposer/Skeptic response cache
+# Persistent content-addressed cache of LLM completions; TTL in seconds (None = never expires)
+
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', '1') == '1'
+
+LLM_CACHE_PATH = BASE_DIR / 'llm_cache.sqlite3'
+
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600))) or None
+
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '50000'))
+
+# Expired and over-limit entries are swept once every this many writes
+LLM_CACHE_EVICT_EVERY = int(os.getenv('LLM_CACHE_EVICT_EVERY', '100'))
+
+
+# SymPy sandbox
+# Pre-forked worker processes that execute Skeptic scripts with a wall-clock
+# timeout (seconds) and CPU/memory rlimits; workers default to one per core
+
+SYMPY_SANDBOX_ENABLED = os.getenv('SYMPY_SANDBOX_ENABLED', '1') == '1'
+
+SYMPY_SANDBOX_WORKERS = int(os.getenv('SYMPY_SANDBOX_WORKERS', '0')) or None
+
+SYMPY_SANDBOX_TIMEOUT = float(os.getenv('SYMPY_SANDBOX_TIMEOUT', '10'))
+
+SYMPY_SANDBOX_CPU_SECONDS = float(os.getenv('SYMPY_SANDBOX_CPU_SECONDS', '10'))
+
+SYMPY_SANDBOX_MEMORY_MB = int(os.getenv('SYMPY_SANDBOX_MEMORY_MB', '1024'))
+
+# Seconds simplify() may spend on a relation once the numeric and canonical tiers are inconclusive
+
+SYMPY_SIMPLIFY_BUDGET = float(os.getenv('SYMPY_SIMPLIFY_BUDGET', '5'))
+
+
+# Batch persistence
+# Write-behind buffer used by batch runs: flush after this many problems or seconds
+
+HISTORY_FLUSH_EVERY = int(os.getenv('HISTORY_FLUSH_EVERY', '25'))
+
+HISTORY_FLUSH_SECONDS = float(os.getenv('HISTORY_FLUSH_SECONDS', '5'))
+
+
+# Retry policy
+# After a failed attempt: 'reaudit' (the Skeptic repairs its crashed script), 'repropose'
+# or 'stop'. Retries also stop once a query has used RETRY_MAX_TOKENS LLM tokens or
+# RETRY_MAX_SECONDS seconds
+
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', '2'))
+
+RETRY_ON_SCRIPT_ERROR = os.getenv('RETRY_ON_SCRIPT_ERROR', 'reaudit')
+
+RETRY_ON_REJECTION = os.getenv('RETRY_ON_REJECTION', 'repropose')
+
+RETRY_MAX_TOKENS = int(os.getenv('RETRY_MAX_TOKENS', '20000'))
+
+RETRY_MAX_SECONDS = float(os.getenv('RETRY_MAX_SECONDS', '180'))
+
+# Per-category overrides of the options above, keyed by the Skeptic's [CATEGORY] (case-insensitive)
+
+RETRY_POLICY_OVERRIDES = {
+    # 'Control Systems': {'max_attempts': 3, 'max_tokens': 30000},
+}
+
+
+# Deterministic verifiers: standard problem types (integrals, derivatives, ODE IVPs,
+# Laplace/Z-transforms, series) are checked by a generated SymPy script, skipping the Skeptic
+
+DETERMINISTIC_VERIFIERS_ENABLED = os.getenv('DETERMINISTIC_VERIFIERS_ENABLED', '1') == '1'
+
+
+# Speculative proposals: race this many Proposer candidates (one per temperature, spread
+# over the key pool) and keep the first VERIFIED one; 1 turns it off. Candidates beyond
+# the first may spend at most SPECULATIVE_MAX_EXTRA_CALLS LLM calls per query
+
+SPECULATIVE_CANDIDATES = int(os.getenv('SPECULATIVE_CANDIDATES', '1'))
+
+SPECULATIVE_TEMPERATURES = [float(t) for t in os.getenv('SPECULATIVE_TEMPERATURES', '0.2,0.5,0.8').split(',')]
+
+SPECULATIVE_MAX_EXTRA_CALLS = int(os.getenv('SPECULATIVE_MAX_EXTRA_CALLS', '4'))
+
+
+# Skeptic streaming: parse the audit as it arrives and start its SymPy script the moment
+# [/SKEPTIC] closes. SKEPTIC_EARLY_STOP also cuts the generation once the verdict and the
+# script result decide the attempt (the trailing corrections/affirmation are then lost)
+
+SKEPTIC_STREAMING = os.getenv('SKEPTIC_STREAMING', '1') == '1'
+
+SKEPTIC_EARLY_STOP = os.getenv('SKEPTIC_EARLY_STOP', '0') == '1'
+
+
+# Monitoring: /metrics accepts "Authorization: Bearer <METRICS_TOKEN>" (staff can always
+# read it). Staff requests with ?profile=1 or "X-Profile: 1" are profiled with cProfile;
+# the newest PROFILE_KEEP dumps are kept in PROFILE_DIR
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+PROFILE_DIR = os.getenv('PROFILE_DIR', str(BASE_DIR / 'profiles'))
+
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '50'))
+
+
+# Startup: WSGI/ASGI server processes call solver.warmup.warm_up() when they load the
+# application (imports the agents and SymPy, builds the Groq clients, starts the sandbox);
+# turn it off for processes that never solve, e.g. a dashboard-only deployment
+
+SOLVER_WARMUP = os.getenv('SOLVER_WARMUP', '1') == '1'
+
+
+# Repeated problems: a query whose canonical form (or, with QUERY_DEDUP_STRUCTURAL, its
+# problem type and SymPy-parsed operands) matches a VERIFIED problem is answered from it
+# (needs LLM_CACHE_ENABLED). Otherwise the most similar VERIFIED problem, if its MinHash
+# similarity reaches QUERY_DEDUP_SEED_THRESHOLD, seeds the first proposal; 0 turns that off
+
+QUERY_DEDUP_STRUCTURAL = os.getenv('QUERY_DEDUP_STRUCTURAL', '1') == '1'
+
+QUERY_DEDUP_SEED_THRESHOLD = float(os.getenv('QUERY_DEDUP_SEED_THRESHOLD', '0.7'))
+
+
+# Storage: large text columns (the Skeptic's reply, final solutions, job histories) are
+# compressed with 'zlib', 'zstd' (needs the zstandard package, else zlib is used) or
+# 'none'. Stored values name their codec, so changing this only affects new writes
+
+TEXT_COMPRESSION = os.getenv('TEXT_COMPRESSION', 'zlib')
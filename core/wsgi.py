@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Pay for SymPy, the Groq SDK and the sandbox workers before the first request
+from django.conf import settings  # noqa: E402
+
+if settings.SOLVER_WARMUP:
+    from solver.warmup import warm_up
+
+    warm_up()
@@ -0,0 +1,197 @@
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+from django.db import transaction
+from django.db.models import Avg, Count, F, Q, Sum, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from solver.models import CategorySummary, EngineeringProblem, VerificationAttempt
+
+# verification_status -> counter column on CategorySummary
+STATUS_FIELDS = {
+    "VERIFIED": "verified",
+    "SYMBOLIC_ONLY_PASS": "symbolic_only",
+    "SEMANTIC_ONLY_PASS": "semantic_only",
+    "BOTH_FAILURE": "both_failure",
+}
+COUNTER_FIELDS = ["total", *STATUS_FIELDS.values(), "attempts_sum"]
+
+
+def grouped_problem_stats(queryset, group_by=("category",)):
+    """One GROUP BY query over the problems: counters per category (by default)."""
+    status_counts = {
+        field: Count("id", filter=Q(verification_status=status))
+        for status, field in STATUS_FIELDS.items()
+    }
+    return (
+        queryset.values(*group_by)
+        .annotate(total=Count("id"), attempts_sum=Sum("total_attempts"), **status_counts)
+        .order_by(*group_by)
+    )
+
+
+def category_stats(start=None, end=None, model=None):
+    """Per-category counters, optionally limited to a date range and a Proposer model.
+
+    Without a date range the answer comes from the CategorySummary rows, which
+    stay small however many problems are stored; a date range needs the
+    grouped query over EngineeringProblem itself.
+    """
+    if start is None and end is None:
+        summaries = CategorySummary.objects.all()
+        if model is not None:
+            summaries = summaries.filter(model_name=model)
+        rows = defaultdict(Counter)
+        for summary in summaries.values("category", *COUNTER_FIELDS):
+            rows[summary.pop("category")].update(summary)
+        return [{"category": cat, **{f: rows[cat][f] for f in COUNTER_FIELDS}} for cat in sorted(rows)]
+
+    problems = filter_problems(EngineeringProblem.objects.all(), start, end, model)
+    return [{**row, "attempts_sum": row["attempts_sum"] or 0} for row in grouped_problem_stats(problems)]
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_problems(problems, start=None, end=None, model=None):
+    """Applies the dashboard's date range and Proposer model filters.
+
+    The range compares created_at itself with the bounds of the local days
+    (a created_at__date lookup would wrap the column in a function and
+    rule out its indexes).
+    """
+    if start is not None:
+        problems = problems.filter(created_at__gte=_day_start(start))
+    if end is not None:
+        problems = problems.filter(created_at__lt=_day_start(end + timedelta(days=1)))
+    if model is not None:
+        problems = problems.filter(model_name=model)
+    return problems
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+# Latency percentiles cover at most this many of the newest solves per category
+LATENCY_WINDOW = 500
+STAGES = ("propose_ms", "audit_ms", "sympy_ms", "check_ms")
+
+
+def cost_stats(start=None, end=None, model=None):
+    """Per-category latency percentiles, per-stage means and tokens per verified problem.
+
+    Only problems stored with their timings count. Means, sums and counts
+    are SQL aggregates grouped by category. Percentiles have no SQL
+    aggregate in SQLite, so they are taken here over the newest
+    LATENCY_WINDOW solve times of each category.
+    """
+    problems = filter_problems(EngineeringProblem.objects.exclude(solve_ms=None), start, end, model)
+    totals = problems.values("category").annotate(
+        solves=Count("id"),
+        db_ms=Avg("db_ms"),
+        tokens=Sum("total_tokens"),
+        verified=Count("id", filter=Q(verification_status="VERIFIED")),
+    )
+    stages = (
+        VerificationAttempt.objects.filter(problem__in=problems)
+        .values("problem__category")
+        .annotate(**{stage: Avg(stage) for stage in STAGES})
+    )
+    stage_means = {row.pop("problem__category"): row for row in stages}
+
+    recent = problems.annotate(
+        rank=Window(RowNumber(), partition_by=F("category"), order_by=(F("created_at").desc(), F("id").desc()))
+    ).filter(rank__lte=LATENCY_WINDOW)
+    solve_times = defaultdict(list)
+    for category, solve_ms in recent.values_list("category", "solve_ms"):
+        solve_times[category].append(solve_ms)
+
+    stats = []
+    for row in sorted(totals, key=lambda row: row["category"]):
+        category = row["category"]
+        solve = sorted(solve_times[category])
+        stats.append({
+            "category": category,
+            "solves": row["solves"],
+            "p50_ms": percentile(solve, 50),
+            "p95_ms": percentile(solve, 95),
+            **stage_means.get(category, dict.fromkeys(STAGES)),
+            "db_ms": row["db_ms"],
+            "tokens_per_verified": (row["tokens"] or 0) / row["verified"] if row["verified"] else None,
+        })
+    return stats
+
+
+def known_models():
+    """Proposer models seen so far (rows stored before models were recorded have none)."""
+    models = CategorySummary.objects.exclude(model_name="").values_list("model_name", flat=True)
+    return list(models.distinct().order_by("model_name"))
+
+
+def known_categories():
+    """Categories seen so far, from the summary rows."""
+    categories = CategorySummary.objects.values_list("category", flat=True)
+    return list(categories.distinct().order_by("category"))
+
+
+def record_problems(problems):
+    """Adds newly stored problems to the summary counters (call inside the write)."""
+    deltas = defaultdict(Counter)
+    for problem in problems:
+        delta = deltas[(problem.category, problem.model_name)]
+        delta["total"] += 1
+        delta["attempts_sum"] += problem.total_attempts
+        if problem.verification_status in STATUS_FIELDS:
+            delta[STATUS_FIELDS[problem.verification_status]] += 1
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        # Make sure every row exists, then bump the counters in SQL so
+        # concurrent writers never lose an increment
+        CategorySummary.objects.bulk_create(
+            [CategorySummary(category=cat, model_name=model) for cat, model in deltas],
+            ignore_conflicts=True,
+        )
+        for (cat, model), delta in deltas.items():
+            CategorySummary.objects.filter(category=cat, model_name=model).update(
+                **{field: F(field) + n for field, n in delta.items()}
+            )
+
+
+def record_status_changes(changes):
+    """Moves re-graded problems between the status counters (call inside the write).
+
+    changes: (problem, old_status) pairs, each problem already carrying its
+    new verification_status.
+    """
+    deltas = defaultdict(Counter)
+    for problem, old_status in changes:
+        delta = deltas[(problem.category, problem.model_name)]
+        if old_status in STATUS_FIELDS:
+            delta[STATUS_FIELDS[old_status]] -= 1
+        if problem.verification_status in STATUS_FIELDS:
+            delta[STATUS_FIELDS[problem.verification_status]] += 1
+
+    with transaction.atomic():
+        for (cat, model), delta in deltas.items():
+            delta = {field: n for field, n in delta.items() if n}
+            if delta:
+                CategorySummary.objects.filter(category=cat, model_name=model).update(
+                    **{field: F(field) + n for field, n in delta.items()}
+                )
+
+
+def refresh_summary():
+    """Rebuilds every summary row from EngineeringProblem (e.g. after deletions)."""
+    rows = grouped_problem_stats(EngineeringProblem.objects.all(), ("category", "model_name"))
+    with transaction.atomic():
+        CategorySummary.objects.all().delete()
+        CategorySummary.objects.bulk_create(
+            CategorySummary(**{**row, "attempts_sum": row["attempts_sum"] or 0}) for row in rows
+        )
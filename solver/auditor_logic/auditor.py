@@ -1,109 +1,569 @@
-import sympy as sp
-import re
+import asyncio
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .clients import record_calls
+from .metrics import SYMPY_SECONDS
+from .proposer import TEMPERATURE
+from .retry_policy import REAUDIT, REPROPOSE, STOP, Budget, RetryPolicies, RetryPolicy
+from .sandbox import execute_sympy_code
+from .skeptic_parser import SkepticParser
+from .verifiers import match_verifier
+
+# How good a finished attempt is; the best one stands for a speculative round
+STATUS_RANK = {"VERIFIED": 3, "SYMBOLIC_ONLY_PASS": 2, "SEMANTIC_ONLY_PASS": 1, "BOTH_FAILURE": 0}
 
 class Auditor:
-    def __init__(self, proposer, skeptic, max_attempts=2):
+    def __init__(self, proposer, skeptic, max_attempts=2, sandbox=None, simplify_budget=5.0, policies=None,
+                 use_verifiers=True, speculative_candidates=1, speculative_temperatures=(TEMPERATURE,),
+                 speculative_extra_calls=0, stream_audits=False, early_stop=False):
         self.proposer = proposer
         self.skeptic = skeptic
         self.max_attempts = max_attempts
-
-    def parse_tag(self, text, tag):
-        pattern = rf"\[{tag}\](.*?)\[/{tag}\]"
-        match = re.search(pattern, text, re.DOTALL)
-        return match.group(1).strip() if match else ""
+        self.sandbox = sandbox  # Optional SympySandbox for out-of-process execution
+        self.simplify_budget = simplify_budget
+        # Decides how to recover from each failed attempt (see retry_policy)
+        self.policies = policies or RetryPolicies(RetryPolicy(max_attempts=max_attempts))
+        # Check recognized problem types with a generated SymPy script instead of the Skeptic
+        self.use_verifiers = use_verifiers
+        # Speculative mode (aprocess_speculative): parallel candidates and their extra-call budget
+        self.speculative_candidates = max(1, speculative_candidates)
+        self.speculative_temperatures = tuple(speculative_temperatures) or (TEMPERATURE,)
+        self.speculative_extra_calls = speculative_extra_calls
+        # Stream the Skeptic's audit and start its script as soon as [/SKEPTIC] closes;
+        # with early_stop, cut the generation once the verdict ends the loop
+        self.stream_audits = stream_audits
+        self.early_stop = early_stop
 
     def run_sympy_logic(self, code):
-        """Executes SymPy code and returns (bool, message)."""
-        if not code: 
-            return False, "No code provided."
-            
-        local_scope = {}
-        try:
-            # Context for execution
-            exec_context = {"sp": sp, "bool": bool, "float": float, "int": int}
-            exec(code, exec_context, local_scope)
-            
-            # Check the logical result variable
-            is_correct = local_scope.get("is_correct", False)
-            
-            # If the Skeptic returned a SymPy Relation (Eq) instead of a Bool
-            if hasattr(is_correct, 'simplify'):
-                # Force simplification to see if it's logically True
-                is_correct = sp.simplify(is_correct) == True or is_correct == True
-            
-            if is_correct:
-                return True, "Symbolic Match Confirmed", False
+        """Executes SymPy code and returns (bool, message, is_sympy_error, details).
+
+        Runs in the sandbox process pool when one is configured, otherwise
+        in-process.
+        """
+        if self.sandbox is not None:
+            return self.sandbox.run(code)
+        return execute_sympy_code(code, self.simplify_budget)
+
+    def timed_sympy_run(self, code):
+        """run_sympy_logic plus its wall time: (bool, message, is_sympy_error, details, ms)."""
+        sympy_start = time.perf_counter()
+        code_status, error_msg, is_sympy_error, sympy_details = self.run_sympy_logic(code)
+        sympy_ms = (time.perf_counter() - sympy_start) * 1000
+        SYMPY_SECONDS.observe(
+            sympy_ms / 1000, outcome="error" if is_sympy_error else "pass" if code_status else "fail"
+        )
+        return code_status, error_msg, is_sympy_error, sympy_details, sympy_ms
+
+    def evaluate_attempt(self, attempt_number, solution, audit_result, verifier=None, parsed=None,
+                         sympy_result=None):
+        """Parses a Skeptic response, runs its SymPy script and grades the attempt.
+
+        Returns (current_attempt, feedback); feedback is None when the attempt
+        passed at least one check and the loop should stop. With a verifier
+        (a verifiers.Verification) the audit is its generated script and the
+        semantic verdict is the deterministic check's own result. A streamed
+        audit hands over its parser and the result of the script it already ran.
+        """
+        parsed = parsed or SkepticParser.parse(audit_result)
+        code = parsed.code
+        problem_category = parsed.get("CATEGORY")
+        LLM_feedback = parsed.get("FEEDBACK")
+
+        code_status, error_msg, is_sympy_error, sympy_details, sympy_ms = (
+            sympy_result or self.timed_sympy_run(code)
+        )
+
+        if verifier is not None:
+            LLM_status = code_status
+            corrections = "" if code_status else f"The {verifier.name} check failed: {error_msg}"
+            error_cat = "" if code_status else "Calculation Error"
+            affirmation = verifier.description if code_status else ""
+        else:
+            LLM_status = parsed.status is True
+            corrections = parsed.get("CORRECTIONS") if not LLM_status else ""
+            error_cat = parsed.get("ERROR_CATEGORY") if not LLM_status else ""
+            affirmation = parsed.get("AFFIRMATION") if LLM_status else ""
+
+        # Record Attempt
+        current_attempt = {
+            "attempt": attempt_number, 
+            "category": problem_category, 
+            "error_category": error_cat, 
+            "symbolic_passed": code_status, 
+            "semantic_status": LLM_status, 
+            "proposed_solution": solution, 
+            "code": code, 
+            "affirmation": affirmation,
+            "error_msg": error_msg,
+            "final_status": "PENDING",
+            "full_LLM_output": audit_result,
+            "corrections": corrections,
+            "LLM_feedback": LLM_feedback,
+            "is_sympy_error": is_sympy_error,
+            "verification_tier": sympy_details.get("tier"),
+            "verification_ms": sympy_details.get("check_ms", 0.0),
+            "sympy_ms": round(sympy_ms, 2),
+            "sympy_traceback": sympy_details.get("traceback", ""),
+            "model": getattr(self.proposer, "model", ""),
+            "verifier": verifier.name if verifier is not None else "",
+        }
+        
+        # --- EXIT CONDITION: AT LEAST ONE PASS ---
+        if code_status or LLM_status:
+            if code_status and LLM_status:
+                current_attempt["final_status"] = "VERIFIED"
+                current_attempt["feedback"] = "Both symbolic and semantic verification passed."
+            elif code_status:
+                current_attempt["final_status"] = "SYMBOLIC_ONLY_PASS"
+                current_attempt["feedback"] = f"Math verified by SymPy, but LLM flagged logic: {corrections}"
             else:
-                return False, "Symbolic Mismatch (Math logic returned False)", False
-                
-        except Exception as e:
-            # This captures actual syntax errors or runtime crashes
-            return False, f"Execution Error: {str(e)}", True
-
-    def process_query(self, query):
-        attempts = 0
-        feedback = ""
+                current_attempt["final_status"] = "SEMANTIC_ONLY_PASS"
+                current_attempt["feedback"] = f"LLM approved logic, but SymPy code failed: {error_msg}"
+            return current_attempt, None
+
+        # --- LOOP CONDITION: BOTH FAILED ---
+        current_attempt["final_status"] = "BOTH_FAILURE"
+        feedback = f"Both symbolic and semantic verification failed. SymPy: {error_msg}. Corrections: {corrections}"
+        current_attempt["feedback"] = feedback
+        return current_attempt, feedback
+
+    def verify_deterministically(self, number, query, solution, action):
+        """Grades a recognized problem type without the Skeptic; None to fall back to it.
+
+        Only a pass settles the attempt. Re-audits always go to the Skeptic,
+        and so does an attempt whose generated script could not run (e.g. the
+        answer did not parse) or found a mismatch: the answer and operands are
+        pulled out with regular expressions, which can misread a correct answer.
+        """
+        if not self.use_verifiers or action not in ("initial", REPROPOSE):
+            return None
+        verifier = match_verifier(query, solution)
+        if verifier is None:
+            return None
+        audit_result = verifier.audit_text()
+        current_attempt, retry_feedback = self.evaluate_attempt(number, solution, audit_result, verifier)
+        if current_attempt["is_sympy_error"] or not current_attempt["symbolic_passed"]:
+            return None
+        return audit_result, current_attempt, retry_feedback
+
+    def _can_stop(self, parsed, script):
+        # With early_stop: the verdict is in and a check passed, so the loop ends whatever follows
+        if not self.early_stop or script is None or not script.done():
+            return False
+        return parsed.status is not None and (parsed.status or script.result()[0])
+
+    def stream_audit(self, query, solution, script_error=None):
+        """Streams the Skeptic's audit, overlapping its SymPy script with the rest of the reply.
+
+        The script starts in a worker thread the moment [/SKEPTIC] closes. With
+        early_stop the generation is cut once the verdict and the script result
+        settle the attempt; only the trailing corrections or affirmation are
+        lost. Returns (audit_result, parsed, sympy_result, stopped_early).
+        """
+        parsed = SkepticParser()
+        script, stopped = None, False
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            chunks = self.skeptic.stream_audit(query, solution, script_error)
+            try:
+                for chunk in chunks:
+                    parsed.feed(chunk)
+                    if script is None and parsed.script_done:
+                        script = executor.submit(self.timed_sympy_run, parsed.code)
+                    if self._can_stop(parsed, script):
+                        stopped = True
+                        break
+            finally:
+                chunks.close()
+            parsed.close()
+            if script is None:  # No closed [SKEPTIC] section until the very end
+                script = executor.submit(self.timed_sympy_run, parsed.code)
+            return parsed.text, parsed, script.result(), stopped
+
+    async def astream_audit(self, query, solution, script_error=None):
+        """Async twin of stream_audit; the script runs through asyncio.to_thread."""
+        parsed = SkepticParser()
+        script, stopped = None, False
+        chunks = await self.skeptic.astream_audit(query, solution, script_error)
+        try:
+            async for chunk in chunks:
+                parsed.feed(chunk)
+                if script is None and parsed.script_done:
+                    script = asyncio.ensure_future(asyncio.to_thread(self.timed_sympy_run, parsed.code))
+                if self._can_stop(parsed, script):
+                    stopped = True
+                    break
+        except BaseException:
+            if script is not None:
+                script.cancel()
+            raise
+        finally:
+            await chunks.aclose()
+        parsed.close()
+        if script is None:
+            script = asyncio.ensure_future(asyncio.to_thread(self.timed_sympy_run, parsed.code))
+        return parsed.text, parsed, await script, stopped
+
+    def next_step(self, attempt, budget):
+        """Recovery for a failed attempt under its category's policy: (action, stop_reason)."""
+        return self.policies.for_category(attempt["category"]).next_action(attempt, budget)
+
+    @staticmethod
+    def script_error(attempt):
+        # What the Skeptic gets back when asked to repair its own script
+        return attempt["code"], attempt["sympy_traceback"] or attempt["error_msg"]
+
+    @staticmethod
+    def record_cost(attempt, calls, budget, fallback_tokens):
+        """Stores an attempt's LLM calls, token usage and keys, and charges them to the budget."""
+        attempt["llm_calls"] = [call.as_dict() for call in calls]
+        for field in ("prompt_tokens", "completion_tokens"):
+            # Streamed calls report no usage; None when no call did
+            known = [getattr(call, field) for call in calls if getattr(call, field) is not None]
+            attempt[field] = sum(known) if known else None
+        for role in ("proposer", "skeptic"):
+            attempt[f"{role}_key"] = next((call.key_name for call in reversed(calls) if call.role == role), "")
+        budget.charge(calls, fallback_tokens)
+        attempt["elapsed_ms"] = round(budget.elapsed() * 1000, 2)  # since the query started
+
+    def finish_attempt(self, current_attempt, retry_feedback, action, calls, budget, fallback_tokens):
+        """Records cost and recovery on an attempt; returns (next_action, feedback)."""
+        current_attempt["recovery"] = action
+        self.record_cost(current_attempt, calls, budget, fallback_tokens)
+        if retry_feedback is None:
+            return STOP, None
+        next_action, stop_reason = self.next_step(current_attempt, budget)
+        if next_action == STOP:
+            current_attempt["stop_reason"] = stop_reason
+        return next_action, retry_feedback
+
+    def iter_query(self, query, on_progress=None, stream=False, reference=""):
+        """Runs the Proposer -> Skeptic -> SymPy loop as a stream of (event, payload) pairs.
+
+        Events: "attempt" (a new attempt starts), "token" (a Proposer chunk,
+        only when stream=True), "proposal", "audit", "verdict" (the finished
+        attempt dict) and finally "done" with the full history. on_progress,
+        if given, is called as on_progress(stage, attempt) before each phase.
+
+        After a failure the retry policy picks the next step: a new proposal,
+        or a Skeptic re-audit of the same proposal when only its script crashed.
+        reference, if given, goes to the first proposal as its context (e.g.
+        the verified solution of a similar problem).
+        """
+        feedback = reference
         history = []
+        budget = Budget()
+        action = "initial"
+        solution = ""
+
+        def report(stage):
+            if on_progress:
+                on_progress(stage, len(history) + 1)
+
+        while True:
+            number = len(history) + 1
+            yield "attempt", {"attempt": number, "action": action}
+
+            # Phase 1: Propose (a re-audit keeps the previous proposal)
+            script_error, propose_calls = None, []
+            phase_start = time.perf_counter()
+            if action == "initial" or action == REPROPOSE:
+                report("proposing")
+                if stream:
+                    with record_calls() as propose_calls:
+                        chunks = self.proposer.stream_solution(query, feedback)
+                    parts = []
+                    try:
+                        for chunk in chunks:
+                            parts.append(chunk)
+                            yield "token", {"text": chunk}
+                    finally:
+                        # A client that disconnects mid-proposal stops the generation too
+                        chunks.close()
+                    solution = "".join(parts)
+                else:
+                    with record_calls() as propose_calls:
+                        solution = self.proposer.generate_solution(query, feedback)
+            else:
+                script_error = self.script_error(history[-1])
+            propose_ms = (time.perf_counter() - phase_start) * 1000
+            yield "proposal", {"attempt": number, "proposed_solution": solution}
+
+            # Phase 2: Audit (starts as soon as the proposal is complete); standard
+            # problem types are checked by a generated script, with no Skeptic call
+            report("auditing")
+            audit_calls, audit_ms = [], 0.0
+            parsed, sympy_result, stopped_early = None, None, False
+            verified = self.verify_deterministically(number, query, solution, action)
+            if verified is not None:
+                audit_result, current_attempt, retry_feedback = verified
+            else:
+                phase_start = time.perf_counter()
+                with record_calls() as audit_calls:
+                    if self.stream_audits:
+                        audit_result, parsed, sympy_result, stopped_early = self.stream_audit(
+                            query, solution, script_error
+                        )
+                    else:
+                        audit_result = self.skeptic.audit_solution(query, solution, script_error)
+                audit_ms = (time.perf_counter() - phase_start) * 1000
+            yield "audit", {"attempt": number, "full_LLM_output": audit_result}
 
-        while attempts < self.max_attempts:
-            # Phase 1: Propose
-            solution = self.proposer.generate_solution(query, feedback)
-            
-            # Phase 2: Audit
-            audit_result = self.skeptic.audit_solution(query, solution)
-            
             # Phase 3: Verify & Parse
-            code = self.parse_tag(audit_result, "SKEPTIC")
-            LLM_status = "STATUS=TRUE" in audit_result.upper()
-            corrections = self.parse_tag(audit_result, "CORRECTIONS") if not LLM_status else ""
-            error_cat = self.parse_tag(audit_result, "ERROR_CATEGORY") if not LLM_status else ""
-            problem_category = self.parse_tag(audit_result, "CATEGORY")
-            affirmation = self.parse_tag(audit_result, "AFFIRMATION") if LLM_status else ""
-            LLM_feedback = self.parse_tag(audit_result, "FEEDBACK")
-            
-            code_status, error_msg, is_sympy_error = self.run_sympy_logic(code)
-
-            # Record Attempt
-            current_attempt = {
-                "attempt": attempts + 1, 
-                "category": problem_category, 
-                "error_category": error_cat, 
-                "symbolic_passed": code_status, 
-                "semantic_status": LLM_status, 
-                "proposed_solution": solution, 
-                "code": code, 
-                "affirmation": affirmation,
-                "error_msg": error_msg,
-                "final_status": "PENDING",
-                "full_LLM_output": audit_result,
-                "corrections": corrections,
-                "LLM_feedback": LLM_feedback,
-                "is_sympy_error": is_sympy_error
-
-            }
-            
-            # --- EXIT CONDITION: AT LEAST ONE PASS ---
-            if code_status or LLM_status:
-                if code_status and LLM_status:
-                    current_attempt["final_status"] = "VERIFIED"
-                    current_attempt["feedback"] = "Both symbolic and semantic verification passed."
-                elif code_status:
-                    current_attempt["final_status"] = "SYMBOLIC_ONLY_PASS"
-                    current_attempt["feedback"] = f"Math verified by SymPy, but LLM flagged logic: {corrections}"
+            report("verifying")
+            if verified is None:
+                current_attempt, retry_feedback = self.evaluate_attempt(
+                    number, solution, audit_result, parsed=parsed, sympy_result=sympy_result
+                )
+            current_attempt.update(
+                propose_ms=round(propose_ms, 2), audit_ms=round(audit_ms, 2), audit_stopped_early=stopped_early
+            )
+            action, retry_feedback = self.finish_attempt(
+                current_attempt, retry_feedback, action, propose_calls + audit_calls, budget,
+                (len(query) + len(solution)) // 4,
+            )
+            history.append(current_attempt)
+            yield "verdict", current_attempt
+            if action == STOP:
+                break
+            if action == REPROPOSE:
+                feedback = retry_feedback
+
+        yield "done", {"history": history}
+
+    def process_query(self, query, on_progress=None, reference=""):
+        """Runs the loop to completion and returns the history of attempts."""
+        for event, payload in self.iter_query(query, on_progress=on_progress, reference=reference):
+            if event == "done":
+                return payload["history"]
+
+    async def _aattempt(self, query, number, action, feedback, solution, script_error,
+                        temperature=TEMPERATURE, report=None, calls=None):
+        """One propose -> audit -> verify step of the async loop.
+
+        Returns (current_attempt, retry_feedback, solution). LLM calls are
+        collected into `calls`, so a cancelled step still shows what it spent.
+        """
+        report = report or (lambda stage: None)
+        propose_ms = audit_ms = 0.0
+        parsed, sympy_result, stopped_early = None, None, False
+        with record_calls(calls):
+            if action == "initial" or action == REPROPOSE:
+                report("proposing")
+                phase_start = time.perf_counter()
+                solution = await self.proposer.agenerate_solution(query, feedback, temperature=temperature)
+                propose_ms = (time.perf_counter() - phase_start) * 1000
+
+            report("auditing")
+            verified = await asyncio.to_thread(self.verify_deterministically, number, query, solution, action)
+            if verified is not None:
+                _, current_attempt, retry_feedback = verified
+            else:
+                phase_start = time.perf_counter()
+                if self.stream_audits:
+                    audit_result, parsed, sympy_result, stopped_early = await self.astream_audit(
+                        query, solution, script_error
+                    )
                 else:
-                    current_attempt["final_status"] = "SEMANTIC_ONLY_PASS"
-                    current_attempt["feedback"] = f"LLM approved logic, but SymPy code failed: {error_msg}"
-                
-                history.append(current_attempt)
+                    audit_result = await self.skeptic.aaudit_solution(query, solution, script_error)
+                audit_ms = (time.perf_counter() - phase_start) * 1000
+
+        report("verifying")
+        if verified is None:
+            current_attempt, retry_feedback = await asyncio.to_thread(
+                self.evaluate_attempt, number, solution, audit_result, parsed=parsed, sympy_result=sympy_result
+            )
+        current_attempt.update(
+            propose_ms=round(propose_ms, 2), audit_ms=round(audit_ms, 2), audit_stopped_early=stopped_early
+        )
+        return current_attempt, retry_feedback, solution
+
+    async def aprocess_query(self, query, on_progress=None, reference=""):
+        """Async twin of process_query using the agents' async clients.
+
+        The SymPy check runs in a worker thread so it does not stall the loop.
+        """
+        feedback = reference
+        history = []
+        budget = Budget()
+        action = "initial"
+        solution = ""
+
+        def report(stage):
+            if on_progress:
+                on_progress(stage, len(history) + 1)
+
+        while True:
+            number = len(history) + 1
+            script_error = self.script_error(history[-1]) if action == REAUDIT else None
+            llm_calls = []
+            current_attempt, retry_feedback, solution = await self._aattempt(
+                query, number, action, feedback, solution, script_error, report=report, calls=llm_calls
+            )
+            action, retry_feedback = self.finish_attempt(
+                current_attempt, retry_feedback, action, llm_calls, budget, (len(query) + len(solution)) // 4
+            )
+            history.append(current_attempt)
+            if action == STOP:
                 return history
+            if action == REPROPOSE:
+                feedback = retry_feedback
+
+    async def aprocess_speculative(self, query, on_progress=None, reference=""):
+        """Like aprocess_query, but each new proposal is a race between candidates.
+
+        Every round starts up to `speculative_candidates` proposals at once,
+        one per temperature in `speculative_temperatures`; the key pool hands
+        concurrent calls to different keys. The first candidate to reach
+        VERIFIED wins and the others are cancelled. Otherwise the best one
+        stands for the round and the retry policy decides what happens next.
+        Candidates beyond the first may spend at most `speculative_extra_calls`
+        LLM calls per query. Every candidate ends up in the history under its
+        round's attempt number, the round's representative last; the others
+        are flagged lost_race.
+        """
+        feedback = reference
+        history = []
+        budget = Budget()
+        action = "initial"
+        solution = ""
+        extra_calls_left = self.speculative_extra_calls
+
+        def report(stage):
+            if on_progress:
+                on_progress(stage, number)
 
-            # --- LOOP CONDITION: BOTH FAILED ---
-            current_attempt["final_status"] = "BOTH_FAILURE"
-            feedback = f"Both symbolic and semantic verification failed. SymPy: {error_msg}. Corrections: {corrections}"
-            current_attempt["feedback"] = feedback
-            
+        number = 0
+        while True:
+            number += 1
+            script_error = self.script_error(history[-1]) if action == REAUDIT else None
+            # A fresh proposal costs up to 2 calls (proposal + audit); a re-audit is never raced
+            count = 1
+            if action != REAUDIT:
+                count += min(self.speculative_candidates - 1, max(extra_calls_left, 0) // 2)
+            temperatures = [self.speculative_temperatures[i % len(self.speculative_temperatures)] for i in range(count)]
+            calls = [[] for _ in range(count)]
+            tasks = [
+                asyncio.create_task(self._aattempt(
+                    query, number, action, feedback, solution, script_error,
+                    temperature=temperature, report=report if i == 0 else None, calls=calls[i],
+                ))
+                for i, temperature in enumerate(temperatures)
+            ]
+            finished, cancelled = await self._race(tasks)
+            extra_calls_left -= sum(len(c) for c in calls[1:])
+
+            # Losers first, the round's representative (the winner, or the best attempt) last
+            winner = max(finished, key=lambda i: STATUS_RANK[tasks[i].result()[0]["final_status"]])
+            for i in [i for i in finished if i != winner] + cancelled:
+                if i in cancelled:
+                    attempt, fallback_tokens = self.cancelled_attempt(), len(query) // 4
+                else:
+                    attempt, _, candidate_solution = tasks[i].result()
+                    fallback_tokens = (len(query) + len(candidate_solution)) // 4
+                attempt.update(
+                    attempt=number, recovery=action, candidate=i, temperature=temperatures[i], lost_race=True
+                )
+                self.record_cost(attempt, calls[i], budget, fallback_tokens)
+                history.append(attempt)
+
+            current_attempt, retry_feedback, solution = tasks[winner].result()
+            current_attempt.update(candidate=winner, temperature=temperatures[winner])
+            action, retry_feedback = self.finish_attempt(
+                current_attempt, retry_feedback, action, calls[winner], budget, (len(query) + len(solution)) // 4
+            )
             history.append(current_attempt)
-            attempts += 1
-        
-        # Return the last attempt details after exhausting max_attempts
-        return history
\ No newline at end of file
+            if action == STOP:
+                return history
+            if action == REPROPOSE:
+                feedback = retry_feedback
+
+    @staticmethod
+    async def _race(tasks):
+        """Waits until one task reaches VERIFIED (or all finish) and cancels the rest.
+
+        Returns (finished, cancelled) task indexes, finished in completion order.
+        Raises the first error if no candidate finished at all.
+        """
+        finished, errors = [], []
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                    else:
+                        finished.append(tasks.index(task))
+                if any(tasks[i].result()[0]["final_status"] == "VERIFIED" for i in finished):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        if not finished:
+            raise errors[0]
+        return finished, sorted(tasks.index(task) for task in pending)
+
+    def cancelled_attempt(self):
+        """Placeholder history entry for a candidate stopped before it finished."""
+        return {
+            "category": "",
+            "error_category": "",
+            "symbolic_passed": False,
+            "semantic_status": False,
+            "proposed_solution": "",
+            "code": "",
+            "affirmation": "",
+            "error_msg": "",
+            "final_status": "CANCELLED",
+            "full_LLM_output": "",
+            "corrections": "",
+            "LLM_feedback": "",
+            "is_sympy_error": False,
+            "verification_tier": None,
+            "verification_ms": 0.0,
+            "sympy_ms": 0.0,
+            "sympy_traceback": "",
+            "model": getattr(self.proposer, "model", ""),
+            "verifier": "",
+            "feedback": "Cancelled: another candidate was verified first.",
+        }
+
+    def process_speculative(self, query, loop, on_progress=None, reference=""):
+        """Synchronous entry point for aprocess_speculative.
+
+        The race runs on `loop`, a long-lived event loop running in another
+        thread (services.get_event_loop), so the async clients cached for it
+        are reused by every query. on_progress is still called on the
+        caller's thread, where the ORM can be used.
+        """
+        events = queue.SimpleQueue()
+        future = asyncio.run_coroutine_threadsafe(
+            self.aprocess_speculative(query, on_progress=lambda *event: events.put(event), reference=reference),
+            loop,
+        )
+        future.add_done_callback(lambda _: events.put(None))
+        try:
+            while (event := events.get()) is not None:
+                if on_progress:
+                    on_progress(*event)
+        except BaseException:
+            future.cancel()
+            raise
+        return future.result()
+
+    async def process_many(self, queries, concurrency=4):
+        """Solves a batch of queries keeping at most `concurrency` in flight.
+
+        Returns one entry per query, in input order: the history, or the
+        exception raised while solving that query.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_one(query):
+            async with semaphore:
+                return await self.aprocess_query(query)
+
+        return await asyncio.gather(*(run_one(q) for q in queries), return_exceptions=True)
@@ -0,0 +1,128 @@
+import contextvars
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+_bypass = contextvars.ContextVar("cache_bypass", default=False)
+
+
+@contextmanager
+def bypass():
+    """Skips every cache lookup (and store) for calls made inside the block."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def is_bypassed():
+    return _bypass.get()
+
+
+def normalize_query(query):
+    """Whitespace-insensitive form of a problem statement, used for cache keys."""
+    return re.sub(r"\s+", " ", query or "").strip()
+
+
+class ResponseCache:
+    """Persistent content-addressed cache of LLM completions.
+
+    Entries live in their own SQLite file, keyed on a SHA-256 of everything that
+    shapes the completion (normalized query, feedback/context, model,
+    temperature and system prompt). Expired entries are ignored. Every
+    `evict_every` writes they are deleted, and the least recently used ones too
+    once `max_entries` is exceeded, so the table can briefly hold a few more.
+    """
+
+    def __init__(self, path, ttl=None, max_entries=50000, enabled=True, evict_every=100):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.evict_every = max(1, evict_every)
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, kind TEXT, value TEXT,"
+                " created_at REAL, last_used REAL, hits INTEGER DEFAULT 0)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_created_at ON llm_cache (created_at)")
+
+    @staticmethod
+    def make_key(kind, query, context, model, temperature, system_prompt):
+        payload = json.dumps(
+            [kind, normalize_query(query), context, model, temperature, system_prompt],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def active(self):
+        return self.enabled and not is_bypassed()
+
+    def get(self, key):
+        if not self.active():
+            return None
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, kind, value):
+        if not self.active():
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, kind, value, created_at, last_used, hits)"
+                " VALUES (?, ?, ?, ?, ?, 0)",
+                (key, kind, value, now, now),
+            )
+            self._writes += 1
+            if self._writes % self.evict_every == 0:
+                self._evict(now)
+
+    def _evict(self, now):
+        # Call with the lock held, inside a transaction
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        excess = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN"
+                " (SELECT key FROM llm_cache ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
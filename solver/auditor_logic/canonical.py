@@ -0,0 +1,129 @@
+"""Canonical forms and MinHash signatures of problem statements.
+
+The same problem arrives phrased in many ways: "Evaluate \\int x^{2}\\,dx",
+"Compute the integral $\\int x^2 dx$." and "find ∫ x² dx" differ only in the
+lead verb, math delimiters, LaTeX spacing, braces and Unicode symbols.
+canonical_text() removes those differences, so two statements with the same
+canonical text ask the same question with the same variables.
+rename_variables() goes one step further and numbers the single-letter
+variables in order of appearance, so problems that differ only in naming look
+alike to the similarity index: minhash() and bands() turn that text into a
+MinHash signature of its character shingles and the LSH buckets derived from it.
+"""
+import hashlib
+import random
+import re
+
+SHINGLE_SIZE = 4
+NUM_PERMUTATIONS = 64
+# 16 bands of 4 rows: a pair at Jaccard similarity 0.7 shares a bucket ~99% of the
+# time, a pair at 0.3 only ~12%
+BAND_ROWS = 4
+
+_PRIME = (1 << 61) - 1
+# Signatures are stored in the database, so the permutations must be the same in
+# every process: fixed seed, and changing any constant above needs an index rebuild
+_rng = random.Random(20260)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+UNICODE = {
+    "∫": "\\int ", "∬": "\\iint ", "∞": "\\infty ", "π": "\\pi ", "θ": "\\theta ", "ω": "\\omega ",
+    "²": "^2", "³": "^3", "−": "-", "·": "*", "×": "*", "√": "\\sqrt ", "′": "'", "″": "''",
+}
+FUNCTIONS = (
+    "arcsin", "arccos", "arctan", "sinh", "cosh", "tanh", "sin", "cos", "tan",
+    "cot", "sec", "csc", "ln", "log", "exp",
+)
+LEAD_VERB = re.compile(
+    r"^(?:(?:please|kindly)\s+)?"
+    r"(?:evaluate|compute|calculate|find|determine|solve|work out|obtain|derive|give|what is|what's)\b"
+    r"[\s:,]*(?:the\s+)?"
+)
+# Single letters standing alone, optionally as a differential (dx, dt)
+_VARIABLE = re.compile(r"(?<![A-Za-z\\])(d?)([A-Za-z])(?![A-Za-z])")
+
+
+def canonical_text(query):
+    """Formatting-insensitive form of a problem statement.
+
+    Drops math delimiters, \\left/\\right, LaTeX spacing and font commands,
+    braces around single characters, the lead verb ("Evaluate", "Compute the",
+    ...) and trailing punctuation; prose is lowercased (single letters, i.e.
+    variables, keep their case) and whitespace only survives between words.
+    """
+    s = query or ""
+    for symbol, latex in UNICODE.items():
+        s = s.replace(symbol, latex)
+    s = re.sub(r"\$\$?|\\[()\[\]]", " ", s)
+    s = re.sub(r"\\(left|right|displaystyle|textstyle|limits|nolimits)\b", "", s)
+    s = re.sub(r"\\[,;:! ]|\\q?quad\b", " ", s)
+    s = re.sub(r"\\(?:text|mathrm|operatorname|mathit|mathbf|rm)\s*\{([^{}]*)\}", r" \1 ", s)
+    s = re.sub(r"\\[dt]frac\b", r"\\frac", s)
+    s = re.sub(r"\\(?:cdot|times|ast)\b", "*", s)
+    s = re.sub(r"\\(%s)\b" % "|".join(FUNCTIONS), r" \1 ", s)  # \sin x -> sin x
+    s = re.sub(r"([\^_])\{\s*([A-Za-z0-9])\s*\}", r"\1\2", s)  # x^{2} -> x^2
+    s = re.sub(r"(?<![\\A-Za-z])[A-Za-z]{2,}", lambda m: m.group(0).lower(), s)
+    s = re.sub(r"\s+", " ", s).strip()
+    s = LEAD_VERB.sub("", s)
+    s = re.sub(r"(?<![A-Za-z\\])d ([a-z])(?![A-Za-z])", r"d\1", s)  # "d x" -> "dx"
+    s = re.sub(r"(?<=\d) (?=[A-Za-z](?![A-Za-z])|\\)", "", s)  # "2 x" -> "2x"
+    s = re.sub(r" ?([^\w\s\\]) ?", r"\1", s)
+    return s.rstrip(".?!;, ")
+
+
+def rename_variables(text):
+    """Replaces single-letter variables with #1, #2, ... in order of first appearance.
+
+    e (Euler's number) and the article "a" are left alone; differentials
+    follow their variable, so \\int t dt and \\int x dx come out the same.
+    """
+    names = {}
+
+    def rename(match):
+        prefix, letter = match.groups()
+        if letter == "e" and not prefix:
+            return letter
+        if letter in "aA" and not prefix and re.match(r" [a-z]{2}", text[match.end():match.end() + 3]):
+            return letter
+        name = names.setdefault(letter, f"#{len(names) + 1}")
+        return prefix + name
+
+    return _VARIABLE.sub(rename, text)
+
+
+def text_key(query):
+    """SHA-256 of the canonical text: equal keys, same problem."""
+    return hashlib.sha256(canonical_text(query).encode("utf-8")).hexdigest()
+
+
+def shingles(query):
+    """Character shingles of the variable-renamed canonical text."""
+    text = rename_variables(canonical_text(query))
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(shingle_set):
+    """NUM_PERMUTATIONS minimum hashes: matching positions estimate the Jaccard similarity."""
+    hashes = [_hash64(shingle) for shingle in shingle_set] or [0]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def bands(signature):
+    """(band, bucket) pairs of a signature; buckets are signed 64-bit, to fit a BigIntegerField."""
+    return [
+        (band, int.from_bytes(
+            hashlib.blake2b(repr(signature[start:start + BAND_ROWS]).encode(), digest_size=8).digest(),
+            "big", signed=True,
+        ))
+        for band, start in enumerate(range(0, len(signature), BAND_ROWS))
+    ]
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
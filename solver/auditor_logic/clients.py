@@ -0,0 +1,264 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+import httpx
+from groq import AsyncGroq, Groq
+from .metrics import LLM_CALL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# The call currently being timed, and the list collecting finished calls
+_active_timing = contextvars.ContextVar("active_timing", default=None)
+_collector = contextvars.ContextVar("latency_collector", default=None)
+
+
+class CallTiming:
+    """Latency breakdown of one chat-completions call."""
+
+    def __init__(self, role, key_name):
+        self.role = role
+        self.key_name = key_name
+        self.connect_ms = 0.0        # TCP + TLS setup; stays 0 on a reused keep-alive connection
+        self.ttfb_ms = None          # Request sent -> response headers received
+        self.total_ms = None         # Whole SDK call, including pool wait and JSON parsing
+        self.new_connection = False
+        self.tokens = None           # Prompt + completion tokens reported by the API (streams: see stream_text)
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self._marks = {}
+
+    def start_request(self):
+        self._marks["request"] = time.perf_counter()
+
+    def mark(self, event):
+        now = time.perf_counter()
+        phase, _, edge = event.rpartition(".")
+        if phase.endswith(("connect_tcp", "start_tls")):
+            if edge == "started":
+                self._marks[phase] = now
+                self.new_connection = True
+            elif edge == "complete" and phase in self._marks:
+                self.connect_ms += (now - self._marks.pop(phase)) * 1000
+        elif phase.endswith("receive_response_headers") and edge == "complete":
+            self.ttfb_ms = (now - self._marks["request"]) * 1000
+
+    def record_usage(self, completion):
+        self.set_usage(getattr(completion, "usage", None))
+        return completion
+
+    def set_usage(self, usage):
+        self.tokens = getattr(usage, "total_tokens", None)
+        self.prompt_tokens = getattr(usage, "prompt_tokens", None)
+        self.completion_tokens = getattr(usage, "completion_tokens", None)
+
+    def as_dict(self):
+        return {
+            "role": self.role,
+            "key": self.key_name,
+            "new_connection": self.new_connection,
+            "connect_ms": round(self.connect_ms, 1),
+            "ttfb_ms": round(self.ttfb_ms, 1) if self.ttfb_ms is not None else None,
+            "total_ms": round(self.total_ms, 1) if self.total_ms is not None else None,
+            "tokens": self.tokens,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+class TimedTransport(httpx.HTTPTransport):
+    """HTTP transport that feeds httpcore trace events into the active CallTiming."""
+
+    def handle_request(self, request):
+        timing = _active_timing.get()
+        if timing is not None:
+            timing.start_request()
+            request.extensions["trace"] = lambda event, info: timing.mark(event)
+        return super().handle_request(request)
+
+
+class AsyncTimedTransport(httpx.AsyncHTTPTransport):
+    async def handle_async_request(self, request):
+        timing = _active_timing.get()
+        if timing is not None:
+            timing.start_request()
+
+            async def trace(event, info):
+                timing.mark(event)
+
+            request.extensions["trace"] = trace
+        return await super().handle_async_request(request)
+
+
+@contextmanager
+def track_call(role, key_name):
+    """Times one LLM call; the breakdown lands in the enclosing record_calls() list."""
+    timing = CallTiming(role, key_name)
+    token = _active_timing.set(timing)
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing.total_ms = (time.perf_counter() - start) * 1000
+        LLM_CALL_SECONDS.observe(timing.total_ms / 1000, role=role, key=key_name)
+        _active_timing.reset(token)
+        collected = _collector.get()
+        if collected is not None:
+            collected.append(timing)
+        logger.debug("LLM call %s", timing.as_dict())
+
+
+@contextmanager
+def record_calls(calls=None):
+    """Collects the CallTiming of every LLM call made inside the block (into `calls` if given)."""
+    calls = [] if calls is None else calls
+    token = _collector.set(calls)
+    try:
+        yield calls
+    finally:
+        _collector.reset(token)
+
+
+def _chunk_usage(chunk):
+    # Groq sends a streamed call's usage in the last chunk, under x_groq
+    return getattr(getattr(chunk, "x_groq", None), "usage", None) or getattr(chunk, "usage", None)
+
+
+def stream_text(stream, timing=None):
+    """Yields the text deltas of a streamed completion, recording its usage on `timing`.
+
+    Closing the generator early closes the response, which ends the generation.
+    """
+    try:
+        for chunk in stream:
+            usage = _chunk_usage(chunk)
+            if usage is not None and timing is not None:
+                timing.set_usage(usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        stream.close()
+
+
+async def astream_text(stream, timing=None):
+    """Async twin of stream_text."""
+    try:
+        async for chunk in stream:
+            usage = _chunk_usage(chunk)
+            if usage is not None and timing is not None:
+                timing.set_usage(usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        await stream.close()
+
+
+def settled_text(chunks, key_pool, timing, messages, on_complete=None):
+    """Yields the text of a stream_text() generator and bills the call to the key pool when it ends.
+
+    However the stream ends (read to the end, closed early, failed) the
+    upstream response is closed and the pool settled; on_complete(text)
+    only runs for a stream read to the end.
+    """
+    parts = []
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+    finally:
+        chunks.close()
+        key_pool.settle_stream(timing, messages, "".join(parts))
+    if on_complete:
+        on_complete("".join(parts))
+
+
+async def asettled_text(chunks, key_pool, timing, messages, on_complete=None):
+    """Async twin of settled_text, over an astream_text() generator."""
+    parts = []
+    try:
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+    finally:
+        await chunks.aclose()
+        key_pool.settle_stream(timing, messages, "".join(parts))
+    if on_complete:
+        on_complete("".join(parts))
+
+
+class ClientRegistry:
+    """Process-level Groq clients sharing one keep-alive connection pool.
+
+    Every key talks to the same host, so all sync clients share a single
+    httpx.Client; async clients share one httpx.AsyncClient per event loop
+    (an AsyncClient cannot outlive the loop it was created on).
+    """
+
+    def __init__(self, base_url=None, max_connections=20, max_keepalive_connections=10,
+                 keepalive_expiry=30.0, timeout=60.0):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._lock = threading.Lock()
+        self._http = None
+        self._clients = {}
+        self._async_http = weakref.WeakKeyDictionary()
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _groq_kwargs(self, key, http_client):
+        # Retries are handled by the key pool, so the SDK must not retry on its own
+        return {
+            "api_key": key.secret,
+            "base_url": self.base_url,
+            "http_client": http_client,
+            "timeout": self.timeout,
+            "max_retries": 0,
+        }
+
+    def get(self, key):
+        with self._lock:
+            if self._http is None:
+                self._http = httpx.Client(transport=TimedTransport(limits=self.limits), timeout=self.timeout)
+            if key.name not in self._clients:
+                self._clients[key.name] = Groq(**self._groq_kwargs(key, self._http))
+            return self._clients[key.name]
+
+    def get_async(self, key):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._async_http:
+                self._async_http[loop] = httpx.AsyncClient(
+                    transport=AsyncTimedTransport(limits=self.limits), timeout=self.timeout
+                )
+                self._async_clients[loop] = {}
+            clients = self._async_clients[loop]
+            if key.name not in clients:
+                clients[key.name] = AsyncGroq(**self._groq_kwargs(key, self._async_http[loop]))
+            return clients[key.name]
+
+    def close(self):
+        with self._lock:
+            if self._http is not None:
+                self._http.close()
+            self._http = None
+            self._clients = {}
+
+
+_default_registry = None
+_default_lock = threading.Lock()
+
+
+def default_registry():
+    """Registry used by agents that were not handed one explicitly."""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = ClientRegistry()
+        return _default_registry
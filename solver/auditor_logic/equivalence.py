@@ -0,0 +1,148 @@
+import random
+import signal
+import threading
+import time
+from contextlib import contextmanager
+import sympy as sp
+
+try:
+    import numpy as np
+except ImportError:  # Falls back to mpmath point-by-point evaluation
+    np = None
+
+SAMPLE_POINTS = 8
+MIN_FINITE_POINTS = 3
+RTOL = 1e-7
+ATOL = 1e-9
+
+
+class SimplifyTimeout(Exception):
+    pass
+
+
+@contextmanager
+def time_limit(seconds):
+    """Interrupts the block after `seconds` using SIGALRM.
+
+    Signals only work on the main thread (as in the sandbox workers); elsewhere
+    the block runs unbounded and the caller's own timeout has to apply.
+    """
+    usable = seconds and hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+    if not usable:
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise SimplifyTimeout()
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _sample_values(symbols, rng):
+    """Random sample points per symbol, respecting integer/positive assumptions."""
+    samples = []
+    for symbol in symbols:
+        if symbol.is_integer:
+            values = [rng.randint(1, 9) for _ in range(SAMPLE_POINTS)]
+        elif symbol.is_positive or symbol.is_nonnegative:
+            values = [rng.uniform(0.1, 3.0) for _ in range(SAMPLE_POINTS)]
+        else:
+            values = [rng.choice((-1, 1)) * rng.uniform(0.1, 3.0) for _ in range(SAMPLE_POINTS)]
+        samples.append(values)
+    return samples
+
+
+def _evaluate(expr, symbols, samples):
+    """Values of expr at every sample point (nan where undefined)."""
+    if np is not None:
+        f = sp.lambdify(symbols, expr, modules="numpy")
+        with np.errstate(all="ignore"):
+            values = np.asarray(f(*[np.asarray(v, dtype=float) for v in samples]), dtype=complex)
+        return np.broadcast_to(values, (SAMPLE_POINTS,)).tolist()
+
+    f = sp.lambdify(symbols, expr, modules="mpmath")
+    values = []
+    for point in zip(*samples):
+        try:
+            values.append(complex(f(*point)))
+        except (ValueError, ZeroDivisionError, TypeError, OverflowError):
+            values.append(complex("nan"))
+    return values
+
+
+def numeric_check(lhs, rhs, seed=0):
+    """Compares both sides at random points.
+
+    Returns True when they agree everywhere they are defined, False as soon as
+    one point clearly disagrees, and None when too few points are usable.
+    """
+    symbols = sorted((lhs - rhs).free_symbols, key=lambda s: s.name)
+    samples = _sample_values(symbols, random.Random(seed))
+    try:
+        left = _evaluate(lhs, symbols, samples)
+        right = _evaluate(rhs, symbols, samples)
+    except Exception:
+        # Undefined functions, unevaluated integrals, ... cannot be sampled
+        return None
+
+    finite = 0
+    for l, r in zip(left, right):
+        if not (_finite(l) and _finite(r)):
+            continue
+        finite += 1
+        if abs(l - r) > ATOL + RTOL * max(abs(l), abs(r)):
+            return False
+    return True if finite >= MIN_FINITE_POINTS else None
+
+
+def _finite(value):
+    return value == value and abs(value) != float("inf")
+
+
+def check_relation(value, simplify_budget=5.0):
+    """Decides whether a SymPy truth value from a Skeptic script holds.
+
+    Tries, in order: already-evaluated booleans, numeric sampling, cheap
+    canonicalizations (expand, cancel, trigsimp) and finally simplify() under
+    a time budget. Returns (holds, tier, elapsed_ms); tier names the step that
+    decided, with "simplify-timeout" when the budget ran out.
+    """
+    start = time.perf_counter()
+
+    def done(holds, tier):
+        return holds, tier, (time.perf_counter() - start) * 1000
+
+    if value in (sp.true, sp.false):
+        return done(value == sp.true, "boolean")
+
+    if isinstance(value, (sp.Eq, sp.Ne)):
+        expected_equal = isinstance(value, sp.Eq)
+        lhs, rhs = value.lhs, value.rhs
+
+        # Tier 1: numeric sampling
+        numeric = numeric_check(lhs, rhs)
+        if numeric is not None:
+            return done(numeric == expected_equal, "numeric")
+
+        # Tier 2: cheap canonical forms of the difference
+        difference = lhs - rhs
+        for canonicalize in (sp.expand, sp.cancel, sp.trigsimp):
+            try:
+                if canonicalize(difference) == 0:
+                    return done(expected_equal, "canonical")
+            except Exception:
+                continue
+
+    # Tier 3: full simplify, bounded
+    try:
+        with time_limit(simplify_budget):
+            holds = sp.simplify(value) == True or value == True
+    except SimplifyTimeout:
+        return done(False, "simplify-timeout")
+    return done(holds, "simplify")
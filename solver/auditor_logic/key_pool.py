@@ -0,0 +1,275 @@
+import asyncio
+import threading
+import time
+import groq
+from .metrics import LLM_CALL_ERRORS, error_cause
+
+
+class KeyPoolExhausted(Exception):
+    """Raised when no key can serve a call within the allowed wait or retries."""
+
+
+class TokenBucket:
+    """Classic token bucket; the level may go negative when a call overspends."""
+
+    def __init__(self, capacity, per_minute):
+        self.capacity = float(capacity)
+        self.rate = per_minute / 60.0
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` can be taken (0 when it can be taken now)."""
+        self.refill(now)
+        # A single call larger than the bucket only has to wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= amount
+
+
+class ApiKey:
+    """One Groq key with its own RPM/TPM budget and health record."""
+
+    def __init__(self, name, secret, rpm, tpm):
+        self.name = name
+        self.secret = secret
+        self.requests = TokenBucket(rpm, rpm)
+        self.tokens = TokenBucket(tpm, tpm)
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.consecutive_failures = 0
+        self.disabled = False        # Set on authentication errors; never retried
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+
+    def wait_time(self, estimated_tokens, now):
+        if self.disabled:
+            return None
+        return max(
+            self.cooldown_until - now,
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(estimated_tokens, now),
+        )
+
+    def load(self):
+        # In-flight calls dominate; remaining budget breaks ties
+        used = 1 - max(self.tokens.level, 0) / self.tokens.capacity
+        return self.in_flight + used
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "name": self.name,
+            "healthy": not self.disabled and self.cooldown_until <= now,
+            "disabled": self.disabled,
+            "in_flight": self.in_flight,
+            "cooldown_s": round(max(self.cooldown_until - now, 0), 2),
+            "requests_left": round(self.requests.level, 1),
+            "tokens_left": round(self.tokens.level),
+            "calls": self.calls,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+        }
+
+
+class KeyPool:
+    """Shares several API keys between threads and coroutines.
+
+    Each call takes the least-loaded key whose RPM/TPM buckets allow it,
+    waiting when every key is spent. 429s put the key on a backoff (honouring
+    Retry-After), repeated failures take it out of rotation for a while, and
+    an authentication error disables it for good.
+    """
+
+    def __init__(self, keys, rpm=30, tpm=12000, max_wait=120.0, max_retries=4,
+                 base_backoff=1.0, max_backoff=60.0):
+        if not keys:
+            raise ValueError("KeyPool needs at least one API key")
+        self.keys = [ApiKey(name, secret, rpm, tpm) for name, secret in keys.items()]
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._cond = threading.Condition()
+
+    def _try_acquire(self, estimated_tokens, exclude=()):
+        """Returns (key, 0) on success, else (None, seconds to wait)."""
+        now = time.monotonic()
+        best, best_wait = None, None
+        ready = []
+        for key in self.keys:
+            if key.name in exclude:
+                continue
+            wait = key.wait_time(estimated_tokens, now)
+            if wait is None:
+                continue
+            if wait <= 0:
+                ready.append(key)
+            elif best_wait is None or wait < best_wait:
+                best, best_wait = key, wait
+
+        if ready:
+            key = min(ready, key=ApiKey.load)
+            key.requests.take(1)
+            key.tokens.take(estimated_tokens)
+            key.in_flight += 1
+            key.calls += 1
+            return key, 0.0
+        if best is None:
+            if exclude:
+                # Every other key is disabled; fall back to the excluded ones
+                return self._try_acquire(estimated_tokens)
+            raise KeyPoolExhausted("All API keys are disabled")
+        return None, best_wait
+
+    def acquire(self, estimated_tokens, exclude=()):
+        deadline = time.monotonic() + self.max_wait
+        with self._cond:
+            while True:
+                key, wait = self._try_acquire(estimated_tokens, exclude)
+                if key:
+                    return key
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise KeyPoolExhausted(f"No API key available within {self.max_wait}s")
+                self._cond.wait(min(wait, remaining))
+
+    async def aacquire(self, estimated_tokens, exclude=()):
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            with self._cond:
+                key, wait = self._try_acquire(estimated_tokens, exclude)
+            if key:
+                return key
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise KeyPoolExhausted(f"No API key available within {self.max_wait}s")
+            await asyncio.sleep(min(wait, remaining))
+
+    def release(self, key, estimated_tokens, used_tokens=None, error=None):
+        """Returns a key after a call, settling its token bill and health."""
+        with self._cond:
+            key.in_flight -= 1
+            if used_tokens is not None:
+                key.tokens.take(used_tokens - estimated_tokens)
+
+            if error is None:
+                key.consecutive_failures = 0
+            else:
+                # Failed calls are not billed, so give the estimate back
+                key.tokens.level = min(key.tokens.capacity, key.tokens.level + estimated_tokens)
+                key.errors += 1
+                LLM_CALL_ERRORS.inc(key=key.name, cause=error_cause(error))
+                status = getattr(error, "status_code", None)
+                if status in (401, 403):
+                    key.disabled = True
+                elif self.is_retryable(error):
+                    # Only provider-side trouble counts against the key's health
+                    key.consecutive_failures += 1
+                    backoff = self._retry_after(error)
+                    if backoff is None:
+                        backoff = min(self.base_backoff * 2 ** (key.consecutive_failures - 1), self.max_backoff)
+                    if status == 429:
+                        key.rate_limited += 1
+                    key.cooldown_until = max(key.cooldown_until, time.monotonic() + backoff)
+            self._cond.notify_all()
+
+    def settle(self, key_name, estimated_tokens, used_tokens):
+        """Bills a streamed call once it ends; release() ran when it opened and only knew the estimate."""
+        with self._cond:
+            for key in self.keys:
+                if key.name == key_name:
+                    key.tokens.take(used_tokens - estimated_tokens)
+                    key.tokens.level = min(key.tokens.level, key.tokens.capacity)
+            self._cond.notify_all()
+
+    def settle_stream(self, timing, messages, text):
+        """Settles a streamed call from the usage its last chunk reported (on `timing`).
+
+        A cut-off stream never gets there, so it is billed for its prompt plus
+        the text it did produce; that count is also left on `timing`, for the
+        query's Budget to charge the same.
+        """
+        if timing.tokens is None:
+            timing.tokens = estimate_tokens(messages, max_completion_tokens=0) + len(text) // 4
+        self.settle(timing.key_name, estimate_tokens(messages), timing.tokens)
+
+    def _retry_after(self, error):
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        try:
+            return min(float(response.headers.get("retry-after")), self.max_backoff)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def is_retryable(error):
+        if isinstance(error, (groq.APIConnectionError, groq.APITimeoutError)):
+            return True
+        status = getattr(error, "status_code", None)
+        return status in (401, 403, 408, 409, 429) or (status is not None and status >= 500)
+
+    def call(self, fn, estimated_tokens):
+        """Runs fn(key) on a pooled key, retrying retryable errors on other keys."""
+        last_error, tried = None, set()
+        for _ in range(self.max_retries + 1):
+            key = self.acquire(estimated_tokens, exclude=tried)
+            try:
+                result = fn(key)
+            except Exception as e:
+                self.release(key, estimated_tokens, error=e)
+                if not self.is_retryable(e):
+                    raise
+                last_error = e
+                tried.add(key.name)
+                continue
+            self.release(key, estimated_tokens, used_tokens=_usage_tokens(result))
+            return result
+        raise KeyPoolExhausted(f"Gave up after {self.max_retries + 1} attempts: {last_error}") from last_error
+
+    async def acall(self, fn, estimated_tokens):
+        """Async twin of call(); fn(key) must return an awaitable."""
+        last_error, tried = None, set()
+        for _ in range(self.max_retries + 1):
+            key = await self.aacquire(estimated_tokens, exclude=tried)
+            try:
+                result = await fn(key)
+            except asyncio.CancelledError:
+                # Abandoned by the caller (e.g. a losing speculative candidate); the
+                # request may still be billed, so the estimate stays charged
+                self.release(key, estimated_tokens)
+                raise
+            except Exception as e:
+                self.release(key, estimated_tokens, error=e)
+                if not self.is_retryable(e):
+                    raise
+                last_error = e
+                tried.add(key.name)
+                continue
+            self.release(key, estimated_tokens, used_tokens=_usage_tokens(result))
+            return result
+        raise KeyPoolExhausted(f"Gave up after {self.max_retries + 1} attempts: {last_error}") from last_error
+
+    def stats(self):
+        with self._cond:
+            return [key.stats() for key in self.keys]
+
+
+def _usage_tokens(completion):
+    usage = getattr(completion, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+
+def estimate_tokens(messages, max_completion_tokens=1500):
+    """Rough pre-call token estimate (~4 characters per token) plus the reply budget."""
+    return sum(len(m["content"]) for m in messages) // 4 + max_completion_tokens
@@ -0,0 +1,170 @@
+"""In-process counters and histograms rendered in the Prometheus text format.
+
+Values live in the process that records them: behind several WSGI/ASGI
+workers each one reports its own, and Prometheus sums them across targets.
+"""
+import math
+import threading
+
+# Seconds; LLM calls and solves take seconds, SymPy checks usually milliseconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """[(suffix, [(label, value), ...], value), ...] for the exposition."""
+        with self._lock:
+            return [("", list(zip(self.labelnames, key)), value) for key, value in sorted(self._values.items())]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        samples = []
+        for key, (counts, total) in values:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append(("_bucket", labels + [("le", _format_value(bound))], cumulative))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self, extra=()):
+        """The text exposition of every metric, plus `extra` ones built at scrape time."""
+        lines = []
+        for metric in [*self._metrics, *extra]:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+SOLVES = REGISTRY.counter(
+    "skeptic_solves_total", "Solves stored, by final verification status", ["status"])
+REUSED_SOLVES = REGISTRY.counter(
+    "skeptic_solves_reused_total", "Queries answered from an earlier VERIFIED run, without LLM calls")
+SEEDED_SOLVES = REGISTRY.counter(
+    "skeptic_solves_seeded_total", "Solves stored whose first proposal was seeded with a similar VERIFIED solution")
+SOLVE_SECONDS = REGISTRY.histogram(
+    "skeptic_solve_seconds", "Wall time of the Auditor loop per stored solve", ["status"])
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "skeptic_llm_call_seconds", "Latency of chat-completions calls, per agent and API key", ["role", "key"])
+LLM_CALL_ERRORS = REGISTRY.counter(
+    "skeptic_llm_call_errors_total", "Failed chat-completions calls, per API key and cause", ["key", "cause"])
+SYMPY_SECONDS = REGISTRY.histogram(
+    "skeptic_sympy_exec_seconds", "SymPy script execution time, by outcome", ["outcome"])
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "skeptic_http_requests_in_flight", "Requests currently being handled by this process")
+HTTP_SECONDS = REGISTRY.histogram(
+    "skeptic_http_request_seconds", "Time to produce a response, per view", ["view", "status"])
+
+
+def error_cause(error):
+    """Coarse label for a failed LLM call."""
+    status = getattr(error, "status_code", None)
+    if status == 429:
+        return "rate_limited"
+    if status in (401, 403):
+        return "auth"
+    if status is not None and status >= 500:
+        return "server_error"
+    name = type(error).__name__.lower()
+    if "connection" in name or "timeout" in name:
+        return "connection"
+    return "other"
@@ -1,42 +1,121 @@
 import os
-from groq import Groq
-from dotenv import load_dotenv
+from .clients import ClientRegistry, default_registry, settled_text, stream_text, track_call
+from .key_pool import KeyPool, estimate_tokens
 
-load_dotenv()
+# Lower temperature for higher mathematical consistency; speculative candidates may use others
+TEMPERATURE = 0.2
+
+SYSTEM_INSTRUCTIONS = "Role: You are a Senior Engineering Professor. Your goal is to provide a rigorous, step-by-step LaTeX derivation for complex engineering problems."
 
 class Proposer:
-    def __init__(self, api_key=None):
-        # Retrieve the Groq Key
-        if not api_key:
-            api_key = os.getenv("GROQ_API_KEY1")
-
-        if not api_key:
-            raise ValueError("GROQ_API_KEY1 not found in .env file")
-            
-        self.client = Groq(api_key=api_key)
+    def __init__(self, api_key=None, base_url=None, key_pool=None, clients=None, cache=None):
+        # Every call draws a key from the pool; a lone api_key gets a pool of one
+        if key_pool is None:
+            # Retrieve the Groq Key
+            if not api_key:
+                api_key = os.getenv("GROQ_API_KEY1")
+
+            if not api_key:
+                raise ValueError("GROQ_API_KEY1 not found in .env file")
+            key_pool = KeyPool({"GROQ_API_KEY": api_key})
+
+        self.key_pool = key_pool
+        # Clients (and their keep-alive connections) are shared process-wide;
+        # base_url lets tests point the agent at a local chat-completions server
+        if clients is None:
+            clients = ClientRegistry(base_url=base_url) if base_url else default_registry()
+        self.clients = clients
+        self.cache = cache  # Optional ResponseCache consulted before every call
         # Llama 3.3 70B is excellent for math reasoning
         self.model = "llama-3.3-70b-versatile"
 
-    def generate_solution(self, query, feedback=""):
+    def build_messages(self, query, feedback=""):
         error_context = feedback
-        
-        system_instructions = "Role: You are a Senior Engineering Professor. Your goal is to provide a rigorous, step-by-step LaTeX derivation for complex engineering problems."
-
-        try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_instructions
-                    },
-                    {
-                        "role": "user",
-                        "content": f"{error_context}\n\nUSER PROBLEM: {query}"
-                    }
-                ],
+        return [
+            {
+                "role": "system",
+                "content": SYSTEM_INSTRUCTIONS
+            },
+            {
+                "role": "user",
+                "content": f"{error_context}\n\nUSER PROBLEM: {query}"
+            }
+        ]
+
+    def _create(self, key, messages, temperature=TEMPERATURE):
+        with track_call("proposer", key.name) as timing:
+            return timing.record_usage(self.clients.get(key).chat.completions.create(
+                messages=messages,
                 model=self.model,
-                temperature=0.2, # Lower temperature for higher mathematical consistency
-            )
-            return chat_completion.choices[0].message.content
-        except Exception as e:
-            return f"Error connecting to Groq: {str(e)}"
\ No newline at end of file
+                temperature=temperature,
+            ))
+
+    async def _acreate(self, key, messages, temperature=TEMPERATURE):
+        with track_call("proposer", key.name) as timing:
+            return timing.record_usage(await self.clients.get_async(key).chat.completions.create(
+                messages=messages,
+                model=self.model,
+                temperature=temperature,
+            ))
+
+    def _open_stream(self, key, messages, temperature=TEMPERATURE):
+        with track_call("proposer", key.name) as timing:
+            return self.clients.get(key).chat.completions.create(
+                messages=messages, model=self.model, temperature=temperature, stream=True,
+            ), timing
+
+    def _cache_key(self, query, feedback, temperature=TEMPERATURE):
+        return self.cache.make_key("proposer", query, feedback, self.model, temperature, SYSTEM_INSTRUCTIONS)
+
+    def generate_solution(self, query, feedback="", temperature=TEMPERATURE):
+        cache_key = self._cache_key(query, feedback, temperature) if self.cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        messages = self.build_messages(query, feedback)
+        chat_completion = self.key_pool.call(
+            lambda key: self._create(key, messages, temperature), estimate_tokens(messages)
+        )
+        content = chat_completion.choices[0].message.content
+        if cache_key:
+            self.cache.set(cache_key, "proposer", content)
+        return content
+
+    async def agenerate_solution(self, query, feedback="", temperature=TEMPERATURE):
+        cache_key = self._cache_key(query, feedback, temperature) if self.cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        messages = self.build_messages(query, feedback)
+        chat_completion = await self.key_pool.acall(
+            lambda key: self._acreate(key, messages, temperature), estimate_tokens(messages)
+        )
+        content = chat_completion.choices[0].message.content
+        if cache_key:
+            self.cache.set(cache_key, "proposer", content)
+        return content
+
+    def stream_solution(self, query, feedback="", temperature=TEMPERATURE):
+        """Starts a streamed completion and returns an iterator over its text chunks.
+
+        The request is sent before this returns, so key selection and call
+        timing happen in the caller's context; a cached answer comes back as a
+        single chunk. As with Skeptic.stream_audit, closing the iterator early
+        stops the generation and the key pool is billed for the tokens used.
+        """
+        cache_key = self._cache_key(query, feedback, temperature) if self.cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return (chunk for chunk in [cached])
+
+        messages = self.build_messages(query, feedback)
+        stream, timing = self.key_pool.call(
+            lambda key: self._open_stream(key, messages, temperature), estimate_tokens(messages)
+        )
+        on_complete = (lambda text: self.cache.set(cache_key, "proposer", text)) if cache_key else None
+        return settled_text(stream_text(stream, timing), self.key_pool, timing, messages, on_complete)
@@ -0,0 +1,86 @@
+import time
+
+# Recovery actions after a failed attempt
+REPROPOSE = "repropose"  # New Proposer solution, guided by the Skeptic's corrections (2 LLM calls)
+REAUDIT = "reaudit"      # Same solution, Skeptic repairs its crashed script (1 LLM call)
+STOP = "stop"
+ACTIONS = (REPROPOSE, REAUDIT, STOP)
+
+
+class RetryPolicy:
+    """What the Auditor does after each kind of failure, and when it gives up.
+
+    A failed attempt whose SymPy script crashed (is_sympy_error) is a
+    "script error": the proposal may be fine, so by default only the Skeptic
+    is asked again, with the traceback. Any other failure is a "rejection"
+    and gets a new proposal. Retries stop at max_attempts, or earlier once
+    the query has used max_tokens LLM tokens or max_seconds of wall time.
+    """
+
+    def __init__(self, on_script_error=REAUDIT, on_rejection=REPROPOSE, max_attempts=2,
+                 max_tokens=None, max_seconds=None):
+        for action in (on_script_error, on_rejection):
+            if action not in ACTIONS:
+                raise ValueError(f"Unknown retry action {action!r}; use one of {', '.join(ACTIONS)}")
+        self.on_script_error = on_script_error
+        self.on_rejection = on_rejection
+        self.max_attempts = max_attempts
+        self.max_tokens = max_tokens
+        self.max_seconds = max_seconds
+
+    def replace(self, **overrides):
+        options = {
+            "on_script_error": self.on_script_error,
+            "on_rejection": self.on_rejection,
+            "max_attempts": self.max_attempts,
+            "max_tokens": self.max_tokens,
+            "max_seconds": self.max_seconds,
+        }
+        options.update(overrides)
+        return RetryPolicy(**options)
+
+    def next_action(self, attempt, budget):
+        """Returns (action, stop_reason) for a failed attempt."""
+        action = self.on_script_error if attempt.get("is_sympy_error") else self.on_rejection
+        if action == STOP:
+            return STOP, "policy"
+        if attempt["attempt"] >= self.max_attempts:
+            return STOP, "max_attempts"
+        if self.max_tokens is not None and budget.tokens >= self.max_tokens:
+            return STOP, "token_budget"
+        if self.max_seconds is not None and budget.elapsed() >= self.max_seconds:
+            return STOP, "time_budget"
+        return action, None
+
+
+class RetryPolicies:
+    """A default RetryPolicy plus per-category overrides (matched case-insensitively)."""
+
+    def __init__(self, default=None, per_category=None):
+        self.default = default or RetryPolicy()
+        self.per_category = {name.strip().lower(): policy for name, policy in (per_category or {}).items()}
+
+    @classmethod
+    def from_config(cls, overrides=None, **defaults):
+        """Builds the set from keyword defaults and {category: {option: value}} overrides."""
+        default = RetryPolicy(**defaults)
+        return cls(default, {name: default.replace(**options) for name, options in (overrides or {}).items()})
+
+    def for_category(self, category):
+        return self.per_category.get((category or "").strip().lower(), self.default)
+
+
+class Budget:
+    """LLM tokens and wall time spent on one query so far."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.tokens = 0
+
+    def charge(self, calls, fallback_tokens=0):
+        # Streamed calls report no usage; count them with the caller's estimate
+        for call in calls:
+            self.tokens += call.tokens if call.tokens is not None else fallback_tokens
+
+    def elapsed(self):
+        return time.monotonic() - self.started
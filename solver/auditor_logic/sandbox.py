@@ -0,0 +1,176 @@
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+import sympy as sp
+from .equivalence import check_relation
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, only the wall-clock timeout applies
+    resource = None
+
+
+def execute_sympy_code(code, simplify_budget=5.0):
+    """Executes SymPy code and returns (passed, message, is_sympy_error, details).
+
+    details records which equivalence tier decided a relation ("tier"), the
+    time spent deciding it and running the whole script ("check_ms", "exec_ms"),
+    the string a problem-signature script leaves in `signature` ("signature")
+    and, when the script crashed, the tail of its traceback ("traceback").
+    """
+    start = time.perf_counter()
+    details = {"tier": None, "check_ms": 0.0, "exec_ms": 0.0}
+
+    def finish(passed, message, is_sympy_error):
+        details["exec_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return passed, message, is_sympy_error, details
+
+    if not code:
+        return finish(False, "No code provided.", True)
+
+    local_scope = {}
+    try:
+        # Context for execution
+        exec_context = {"sp": sp, "bool": bool, "float": float, "int": int}
+        exec(code, exec_context, local_scope)
+
+        # Check the logical result variable
+        is_correct = local_scope.get("is_correct", False)
+        if "signature" in local_scope:
+            details["signature"] = str(local_scope["signature"])
+
+        # If the Skeptic returned a SymPy Relation (Eq) instead of a Bool,
+        # decide it with the tiered checker (numeric -> canonical -> simplify)
+        if hasattr(is_correct, 'simplify'):
+            is_correct, details["tier"], check_ms = check_relation(is_correct, simplify_budget)
+            details["check_ms"] = round(check_ms, 2)
+        
+        if is_correct:
+            return finish(True, "Symbolic Match Confirmed", False)
+        else:
+            return finish(False, "Symbolic Mismatch (Math logic returned False)", False)
+
+    except Exception as e:
+        # This captures actual syntax errors or runtime crashes; the last frames
+        # go back to the Skeptic when it is asked to repair its script
+        details["traceback"] = traceback.format_exc(limit=-3)
+        return finish(False, f"Execution Error: {str(e) or type(e).__name__}", True)
+
+
+def _limit_cpu(cpu_seconds):
+    # RLIMIT_CPU counts the whole process lifetime, so move the soft limit
+    # to "CPU used so far + budget" before each job; SIGXCPU ends the worker.
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    limit = int(usage.ru_utime + usage.ru_stime + cpu_seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+
+
+def _worker_main(conn, cpu_seconds, memory_bytes, simplify_budget):
+    """Loop run by each pre-forked worker: receive code, send back a result tuple."""
+    if resource is not None and memory_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    while True:
+        try:
+            code = conn.recv()
+        except EOFError:
+            return
+        if resource is not None and cpu_seconds:
+            _limit_cpu(cpu_seconds)
+        try:
+            result = execute_sympy_code(code, simplify_budget)
+        except BaseException as e:  # e.g. SystemExit raised by the script itself
+            result = (False, f"Execution Error: {type(e).__name__}: {e}", True, {"tier": None})
+        conn.send(result)
+
+
+class _Worker:
+    def __init__(self, context, cpu_seconds, memory_bytes, simplify_budget):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, cpu_seconds, memory_bytes, simplify_budget), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class SympySandbox:
+    """Pool of pre-forked processes that run Skeptic scripts out of the web worker.
+
+    Workers are forked from a forkserver that has SymPy imported already, so
+    starting (or replacing) one is cheap. Each job gets a wall-clock timeout
+    plus CPU and address-space rlimits; a worker that times out or dies is
+    killed and replaced. Only the (passed, message, is_sympy_error, details)
+    tuple crosses the process boundary.
+    """
+
+    def __init__(self, workers=None, timeout=10.0, cpu_seconds=None, memory_mb=1024, simplify_budget=5.0):
+        self.size = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds if cpu_seconds is not None else timeout
+        self.memory_bytes = memory_mb * 1024 * 1024 if memory_mb else None
+        self.simplify_budget = simplify_budget
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        if "forkserver" in methods:
+            self._context.set_forkserver_preload([__name__])
+        self._idle = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self.restarts = 0
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+        atexit.register(self.close)
+
+    def _spawn(self):
+        worker = _Worker(self._context, self.cpu_seconds, self.memory_bytes, self.simplify_budget)
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _replace(self, worker):
+        worker.kill()
+        with self._lock:
+            self._workers.remove(worker)
+            self.restarts += 1
+        return self._spawn()
+
+    def run(self, code, timeout=None):
+        """Runs one script in a worker; same return contract as execute_sympy_code."""
+        timeout = timeout or self.timeout
+        worker = self._idle.get()
+        try:
+            worker.conn.send(code)
+            if not worker.conn.poll(timeout):
+                worker = self._replace(worker)
+                return False, f"Execution Error: verification timed out after {timeout}s", True, {"tier": None}
+            return worker.conn.recv()
+        except (EOFError, OSError):
+            # Killed by an rlimit (SIGXCPU, out of memory) or crashed outright
+            worker = self._replace(worker)
+            return False, "Execution Error: verification process exceeded its resource limits", True, {"tier": None}
+        finally:
+            self._idle.put(worker)
+
+    def map(self, codes, timeout=None):
+        """Runs several scripts in parallel across the pool, preserving order."""
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            return list(executor.map(lambda code: self.run(code, timeout), codes))
+
+    def close(self):
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.kill()
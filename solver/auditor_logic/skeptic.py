@@ -1,17 +1,10 @@
 import os
-from groq import Groq
+from .clients import (
+    ClientRegistry, asettled_text, astream_text, default_registry, settled_text, stream_text, track_call,
+)
+from .key_pool import KeyPool, estimate_tokens
 
-class Skeptic:
-    def __init__(self, api_key=None):
-        if not api_key:
-            api_key = os.getenv("GROQ_API_KEY1")
-        if not api_key:
-            raise ValueError("GROQ_API_KEY1 not found in .env file")
-        self.client = Groq(api_key=api_key)
-        self.model = "llama-3.3-70b-versatile"
-
-    def audit_solution(self, query, proposer_output):
-        system_instructions = """Role: Senior Engineering Auditor.
+SYSTEM_INSTRUCTIONS = """Role: Senior Engineering Auditor.
         Task: You must find errors in a proposed solution.
         
         REQUIRED OUTPUT FORMAT:
@@ -56,18 +49,133 @@ class Skeptic:
         2. Output must strictly follow the format above.
         3. Only output the [SKEPTIC], [FEEDBACK], STATUS, [CORRECTIONS] or [AFFIRMATION] sections.
         4. Do not agree with the proposer by default; be critical and thorough."""
-        
+
+class Skeptic:
+    def __init__(self, api_key=None, base_url=None, key_pool=None, clients=None, cache=None):
+        if key_pool is None:
+            if not api_key:
+                api_key = os.getenv("GROQ_API_KEY1")
+            if not api_key:
+                raise ValueError("GROQ_API_KEY1 not found in .env file")
+            key_pool = KeyPool({"GROQ_API_KEY": api_key})
+        self.key_pool = key_pool
+        if clients is None:
+            clients = ClientRegistry(base_url=base_url) if base_url else default_registry()
+        self.clients = clients
+        self.cache = cache  # Optional ResponseCache consulted before every call
+        self.model = "llama-3.3-70b-versatile"
+
+    def build_messages(self, query, proposer_output, script_error=None):
         user_content = f"PROBLEM: {query}\n\nPROPOSED SOLUTION:\n{proposer_output}"
+        if script_error:
+            # Re-audit after the previous verification script crashed
+            code, error = script_error
+            user_content += (
+                f"\n\nYOUR PREVIOUS VERIFICATION SCRIPT FAILED TO RUN:\n{code}\n\nERROR:\n{error}\n\n"
+                "Fix the script so it executes; keep the same required output format."
+            )
+        return [
+            {"role": "system", "content": SYSTEM_INSTRUCTIONS},
+            {"role": "user", "content": user_content}
+        ]
 
-        try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_instructions},
-                    {"role": "user", "content": user_content}
-                ],
+    def _create(self, key, messages):
+        with track_call("skeptic", key.name) as timing:
+            return timing.record_usage(self.clients.get(key).chat.completions.create(
+                messages=messages,
                 model=self.model,
                 temperature=0.1, # Even lower temp to force strict adherence to rules
-            )
-            return chat_completion.choices[0].message.content
-        except Exception as e:
-            return f"Error connecting to Groq: {str(e)}"
\ No newline at end of file
+            ))
+
+    async def _acreate(self, key, messages):
+        with track_call("skeptic", key.name) as timing:
+            return timing.record_usage(await self.clients.get_async(key).chat.completions.create(
+                messages=messages,
+                model=self.model,
+                temperature=0.1,
+            ))
+
+    def _open_stream(self, key, messages):
+        with track_call("skeptic", key.name) as timing:
+            return self.clients.get(key).chat.completions.create(
+                messages=messages, model=self.model, temperature=0.1, stream=True,
+            ), timing
+
+    async def _aopen_stream(self, key, messages):
+        with track_call("skeptic", key.name) as timing:
+            return await self.clients.get_async(key).chat.completions.create(
+                messages=messages, model=self.model, temperature=0.1, stream=True,
+            ), timing
+
+    def _cache_key(self, query, proposer_output, script_error=None):
+        context = [proposer_output, list(script_error)] if script_error else proposer_output
+        return self.cache.make_key("skeptic", query, context, self.model, 0.1, SYSTEM_INSTRUCTIONS)
+
+    def audit_solution(self, query, proposer_output, script_error=None):
+        cache_key = self._cache_key(query, proposer_output, script_error) if self.cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        messages = self.build_messages(query, proposer_output, script_error)
+        chat_completion = self.key_pool.call(lambda key: self._create(key, messages), estimate_tokens(messages))
+        content = chat_completion.choices[0].message.content
+        if cache_key:
+            self.cache.set(cache_key, "skeptic", content)
+        return content
+
+    async def aaudit_solution(self, query, proposer_output, script_error=None):
+        cache_key = self._cache_key(query, proposer_output, script_error) if self.cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        messages = self.build_messages(query, proposer_output, script_error)
+        chat_completion = await self.key_pool.acall(lambda key: self._acreate(key, messages), estimate_tokens(messages))
+        content = chat_completion.choices[0].message.content
+        if cache_key:
+            self.cache.set(cache_key, "skeptic", content)
+        return content
+
+    def _on_complete(self, cache_key):
+        # Caches a streamed audit once it has been read to the end
+        return (lambda text: self.cache.set(cache_key, "skeptic", text)) if cache_key else None
+
+    def stream_audit(self, query, proposer_output, script_error=None):
+        """Starts a streamed audit and returns an iterator over its text chunks.
+
+        As with Proposer.stream_solution the request is sent before this
+        returns; a cached answer comes back as a single chunk. Closing the
+        iterator early stops the generation, and a cut-off audit is not cached.
+        """
+        cache_key = self._cache_key(query, proposer_output, script_error) if self.cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return (chunk for chunk in [cached])
+
+        messages = self.build_messages(query, proposer_output, script_error)
+        stream, timing = self.key_pool.call(lambda key: self._open_stream(key, messages), estimate_tokens(messages))
+        return settled_text(stream_text(stream, timing), self.key_pool, timing, messages, self._on_complete(cache_key))
+
+    async def astream_audit(self, query, proposer_output, script_error=None):
+        """Async twin of stream_audit: returns an async iterator over the text chunks."""
+        cache_key = self._cache_key(query, proposer_output, script_error) if self.cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return _once(cached)
+
+        messages = self.build_messages(query, proposer_output, script_error)
+        stream, timing = await self.key_pool.acall(
+            lambda key: self._aopen_stream(key, messages), estimate_tokens(messages)
+        )
+        return asettled_text(
+            astream_text(stream, timing), self.key_pool, timing, messages, self._on_complete(cache_key)
+        )
+
+
+async def _once(text):
+    yield text
@@ -0,0 +1,155 @@
+"""Single-pass, incremental parser for the Skeptic's tagged output.
+
+The Skeptic answers with [CATEGORY], [SKEPTIC] (the SymPy script),
+[FEEDBACK], a STATUS line and then [CORRECTIONS]/[ERROR_CATEGORY] or
+[AFFIRMATION]. SkepticParser consumes that text chunk by chunk as it is
+streamed and reports each section the moment it closes, so the script can
+run while the rest is still being generated.
+
+Real output drifts from the format, so the parser also accepts:
+- tags in any case or with inner spaces ([skeptic], [ /FEEDBACK ])
+- a section left unclosed, which ends at the next tag, at a STATUS line
+  or at the end of the text
+- verdict spellings such as STATUS=CORRECT, Status: false,
+  **STATUS** = True or [STATUS]TRUE[/STATUS]
+- a script wrapped in a Markdown code fence
+"""
+import re
+
+SECTIONS = ("CATEGORY", "SKEPTIC", "FEEDBACK", "CORRECTIONS", "ERROR_CATEGORY", "AFFIRMATION", "STATUS")
+
+TRUE_VERDICTS = frozenset({"TRUE", "CORRECT", "VERIFIED", "VALID", "PASS", "PASSED", "YES", "APPROVED"})
+FALSE_VERDICTS = frozenset({"FALSE", "INCORRECT", "WRONG", "INVALID", "FAIL", "FAILED", "NO", "NOT", "REJECTED"})
+
+# Bounded quantifiers keep every token short, so only a short tail of the
+# buffer ever has to be searched again when the next chunk arrives
+_TOKEN = re.compile(
+    r"\[ {0,2}(?P<slash>/?) {0,2}(?P<tag>" + "|".join(SECTIONS) + r") {0,2}\]"
+    r"|(?<![A-Za-z_])STATUS[ *_]{0,4}[:=][ *_\"']{0,4}(?P<verdict>[A-Za-z]{1,12})",
+    re.IGNORECASE,
+)
+_LOOKBACK = 48
+_FENCE = re.compile(r"^[ \t]*```[\w+-]*[ \t]*$", re.MULTILINE)
+
+
+def verdict(word):
+    """True/False for a recognized STATUS value, None otherwise."""
+    word = word.strip().upper()
+    if word in TRUE_VERDICTS:
+        return True
+    if word in FALSE_VERDICTS:
+        return False
+    return None
+
+
+class SkepticParser:
+    """Feed it the Skeptic's text chunk by chunk; read sections as they close.
+
+    feed() returns the names of the sections completed by that chunk,
+    "STATUS" included once the verdict is known. close() ends the stream.
+    The first occurrence of a section wins, like the original regex lookup.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.sections = {}
+        self.status = None       # True / False once a STATUS verdict has been read
+        self._open = None        # (tag, content start) of the section being read
+        self._scanned = 0        # Tokens before this offset have been handled
+        self._searched = 0       # No token starts in [_scanned, _searched)
+        self.closed = False
+
+    @classmethod
+    def parse(cls, text):
+        """Parses a complete response in one pass."""
+        parser = cls()
+        parser.feed(text or "")
+        parser.close()
+        return parser
+
+    def feed(self, chunk):
+        self.text += chunk
+        return self._scan(final=False)
+
+    def close(self):
+        """Ends the stream: an unclosed section runs to the end of the text."""
+        if self.closed:
+            return []
+        completed = self._scan(final=True)
+        if self._open is not None:
+            completed += self._finish(len(self.text))
+        self.closed = True
+        return completed
+
+    def get(self, tag):
+        return self.sections.get(tag, "")
+
+    @property
+    def code(self):
+        """The SymPy script, without any Markdown fence around it."""
+        return _FENCE.sub("", self.get("SKEPTIC")).strip()
+
+    @property
+    def script_done(self):
+        return "SKEPTIC" in self.sections
+
+    def _scan(self, final):
+        completed = []
+        start = max(self._scanned, self._searched)
+        while True:
+            match = _TOKEN.search(self.text, start)
+            if match is None:
+                # A token cut by the chunk boundary can only start in the tail
+                self._searched = max(self._scanned, len(self.text) - _LOOKBACK)
+                return completed
+            if match.group("verdict") is not None and match.end() == len(self.text) and not final:
+                # "STATUS=TR" may still become "STATUS=TRUE"
+                self._searched = max(self._scanned, match.start())
+                return completed
+            completed += self._handle(match)
+            self._scanned = start = match.end()
+
+    def _handle(self, match):
+        completed = []
+        open_tag = self._open[0] if self._open else None
+        if match.group("verdict") is not None:
+            # Inside the script "status = True" is code, not a verdict; inside
+            # prose a verdict counts when it starts its own line (and ends the section)
+            if open_tag == "SKEPTIC" or self.status is not None:
+                return completed
+            result = verdict(match.group("verdict"))
+            if result is None:
+                return completed
+            if open_tag is not None:
+                line_start = self.text.rfind("\n", 0, match.start()) + 1
+                if self.text[line_start:match.start()].strip(" \t*#>-"):
+                    return completed
+                completed += self._finish(line_start)
+            self.status = result
+            return completed + ["STATUS"]
+
+        tag = match.group("tag").upper()
+        if match.group("slash"):
+            if tag == open_tag:
+                completed += self._finish(match.start())
+            return completed
+        if open_tag is not None:
+            completed += self._finish(match.start())
+        self._open = (tag, match.end())
+        return completed
+
+    def _finish(self, end):
+        tag, start = self._open
+        self._open = None
+        if tag in self.sections:
+            return []
+        self.sections[tag] = content = self.text[start:end].strip()
+        if tag == "STATUS":
+            # [STATUS]TRUE[/STATUS], [STATUS] STATUS=TRUE [/STATUS], ...
+            words = [verdict(word) for word in re.findall(r"[A-Za-z]+", content)]
+            result = next((word for word in words if word is not None), None)
+            if self.status is not None or result is None:
+                return []
+            self.status = result
+            return ["STATUS"]
+        return [tag]
@@ -0,0 +1,503 @@
+"""Rule-based verifiers for standard problem types that need no Skeptic call.
+
+Each verifier recognizes a problem type in the query (indefinite/definite
+integral, derivative, ODE initial value problem, Laplace and inverse Laplace
+transform, Z-transform, series expansion), pulls the final answer out of the
+Proposer's LaTeX and writes the SymPy check itself: differentiate, substitute
+back into the ODE, transform back, re-expand. The result is a Skeptic-style
+script, so it runs through the same sandbox and grading as an LLM-written one.
+
+Detection only uses regular expressions on the text; the LaTeX is parsed
+inside the generated script, i.e. in the sandbox, never in the web process.
+"""
+import re
+import sympy as sp
+from sympy.parsing.sympy_parser import (
+    convert_xor,
+    function_exponentiation,
+    implicit_application,
+    implicit_multiplication,
+    parse_expr,
+    split_symbols_custom,
+    standard_transformations,
+)
+from .equivalence import check_relation
+
+try:
+    from sympy.parsing.latex import parse_latex
+except ImportError:  # Needs antlr4-python3-runtime; our own translation covers the common cases
+    parse_latex = None
+
+FUNCTIONS = (
+    "arcsin", "arccos", "arctan", "sinh", "cosh", "tanh", "sin", "cos", "tan",
+    "cot", "sec", "csc", "ln", "log", "exp",
+)
+GREEK = (
+    "alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta", "kappa", "lambda",
+    "mu", "nu", "xi", "pi", "rho", "sigma", "tau", "phi", "chi", "psi", "omega",
+)
+TRANSFORMATIONS = standard_transformations + (
+    # "te^t" is t*e^t: unknown runs of letters are products of one-letter symbols
+    # (names bound by the caller, LOCALS and SymPy's functions are never split)
+    split_symbols_custom(lambda name: name.isalpha() and name not in GREEK),
+    implicit_multiplication, implicit_application, function_exponentiation, convert_xor,
+)
+# Opens the feedback of every attempt a verifier graded (its LLM_status is its SymPy verdict)
+FEEDBACK_PREFIX = "Checked deterministically"
+# Prose a problem statement may open with, before its operand or equation
+LEAD_WORDS = re.compile(
+    r"^\s*(?:(?:please|differentiate|evaluate|compute|calculate|find|determine|solve|simplify|"
+    r"the|ode|differential|equation|initial|value|problem)\b[\s,:]*)+",
+    re.I,
+)
+LOCALS = {
+    "e": sp.E, "E": sp.E, "pi": sp.pi, "oo": sp.oo, "ln": sp.log,
+    "arcsin": sp.asin, "arccos": sp.acos, "arctan": sp.atan,
+    "lambda": sp.Symbol("lambda"), "u": sp.Heaviside, "delta": sp.DiracDelta,
+}
+
+
+# --- LaTeX -> SymPy (runs inside the sandbox) ---------------------------------
+
+def _group(text, start):
+    """Returns (content, end) of the {...} group opening at text[start]."""
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == "{":
+            depth += 1
+        elif text[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start + 1:i], i + 1
+    raise ValueError("Unbalanced braces")
+
+
+def _argument(text, start):
+    """A {...} group, or the single character LaTeX allows without braces."""
+    while start < len(text) and text[start] == " ":
+        start += 1
+    if start < len(text) and text[start] == "{":
+        return _group(text, start)
+    return text[start:start + 1], start + 1
+
+
+def _expand_commands(text):
+    # \frac{a}{b} and \sqrt[n]{a}, innermost handled by recursion on the arguments
+    out, i = [], 0
+    while i < len(text):
+        match = re.match(r"\\[dt]?frac", text[i:])
+        if match:
+            numerator, j = _argument(text, i + match.end())
+            denominator, j = _argument(text, j)
+            out.append(f"(({_expand_commands(numerator)})/({_expand_commands(denominator)}))")
+            i = j
+            continue
+        if text.startswith("\\sqrt", i):
+            j = i + 5
+            root = None
+            if j < len(text) and text[j] == "[":
+                close = text.index("]", j)
+                root, j = text[j + 1:close], close + 1
+            radicand, j = _argument(text, j)
+            radicand = _expand_commands(radicand)
+            out.append(f"(({radicand})**(1/({root})))" if root else f"sqrt({radicand})")
+            i = j
+            continue
+        out.append(text[i])
+        i += 1
+    return "".join(out)
+
+
+def latex_to_sympy(text, **symbols):
+    """Parses a LaTeX (or plain-text) expression such as \\frac{x^3}{3} + C.
+
+    Keyword arguments bind names to existing symbols, so assumptions such as
+    positive=True carry over to the parsed expression.
+    """
+    s = text.strip().strip("$").strip()
+    s = re.sub(r"\\(left|right|displaystyle|limits)\b", "", s)
+    s = re.sub(r"\\[,;:! ]|\\q?quad\b", " ", s)
+    s = re.sub(r"\\(?:text|mathrm|operatorname|mathit)\{([^{}]*)\}", r"\1", s)
+    s = s.replace("\\cdot", "*").replace("\\times", "*").replace("\\infty", "oo")
+    s = s.replace("\\lbrack", "[").replace("\\rbrack", "]")
+    s = _expand_commands(s)
+    s = re.sub(r"\\(%s)\b" % "|".join(FUNCTIONS), r" \1", s)
+    s = re.sub(r"\\(%s)\b" % "|".join(GREEK), r" \1 ", s)
+    s = re.sub(r"\b(%s)\^\{?(\d+)\}?" % "|".join(FUNCTIONS), r"\1**\2", s)  # \sin^2 x
+    if "\\" in s:
+        if parse_latex is not None:
+            return parse_latex(text).subs({sp.Symbol(name): value for name, value in symbols.items()})
+        raise ValueError(f"Unsupported LaTeX in {text!r}")
+    s = s.replace("{", "(").replace("}", ")").replace("[", "(").replace("]", ")").replace("^", "**")
+    return parse_expr(s, local_dict={**LOCALS, **symbols}, transformations=TRANSFORMATIONS)
+
+
+def only_symbols(expr, *symbols):
+    """expr itself, if its free symbols are among `symbols`; ValueError otherwise.
+
+    Leftover prose or a misread product parses into stray symbols. Raising
+    makes the script an error, and the attempt goes to the Skeptic instead
+    of failing a correct answer.
+    """
+    extra = sp.sympify(expr).free_symbols - set(symbols)
+    if extra:
+        raise ValueError(f"Unexpected symbols {sorted(map(str, extra))} in {expr}")
+    return expr
+
+
+def without_constants(expr, keep=()):
+    """Drops integration constants (C, C1, C_2, c, K) from an answer."""
+    constants = [
+        symbol for symbol in expr.free_symbols
+        if symbol not in keep and re.fullmatch(r"[CcK](_?\d+)?", symbol.name)
+    ]
+    return expr.subs({symbol: 0 for symbol in constants})
+
+
+def without_order_term(expr):
+    return expr.removeO() if isinstance(expr, sp.Basic) else expr
+
+
+def ode_to_sympy(text, variable, function="y"):
+    """Parses y'' + 6y' + 9y = 0 (or y^{\\prime\\prime}, \\frac{dy}{dt}) into an Eq in y(variable)."""
+    t = sp.Symbol(variable)
+    y = sp.Function(function)
+    s = re.sub(r"\^\{(\\prime)+\}", lambda m: "'" * m.group(0).count("prime"), text)
+    s = re.sub(r"\\frac\{d\^\{?(\d)\}?%s\}\{d%s\^\{?\d\}?\}" % (function, variable), lambda m: function + "'" * int(m.group(1)), s)
+    s = re.sub(r"\\frac\{d%s\}\{d%s\}|\bd%s/d%s\b" % (function, variable, function, variable), function + "'", s)
+    derivatives = {}
+
+    def placeholder(match):
+        order = len(match.group(1))
+        name = f"_D{order}"
+        derivatives[name] = sp.Derivative(y(t), (t, order)) if order else y(t)
+        return f" {name} "
+
+    s = re.sub(r"(?<![A-Za-z_])%s('*)(?:\(%s\))?(?![A-Za-z(])" % (function, variable), placeholder, s)
+    lhs, _, rhs = s.partition("=")
+    parse = lambda part: latex_to_sympy(part, **{variable: t}, **derivatives)
+    return sp.Eq(parse(lhs), parse(rhs or "0"))
+
+
+def all_hold(relations):
+    """True when every relation holds, each decided by the tiered checker."""
+    return all(check_relation(sp.sympify(relation))[0] for relation in relations)
+
+
+# --- Detection and answer extraction (regex only, runs in the web process) ----
+
+def final_answer(solution):
+    """The Proposer's final answer: the last \\boxed{...}, else the last displayed equation's right-hand side."""
+    boxed = [m.end() for m in re.finditer(r"\\boxed\s*(?=\{)", solution)]
+    if boxed:
+        answer, _ = _group(solution, boxed[-1])
+    else:
+        blocks = re.findall(r"\$\$(.+?)\$\$|\\\[(.+?)\\\]", solution, re.S)
+        blocks = [a or b for a, b in blocks]
+        if not blocks:
+            blocks = [m for m in re.findall(r"(?<!\$)\$([^$]+)\$(?!\$)", solution) if "=" in m]
+        if not blocks:
+            return None
+        answer = blocks[-1]
+    answer = re.split(r"(?<![<>!])=(?!=)", answer)[-1]
+    answer = re.sub(r"\\(quad|qquad|text\{[^}]*\})|\s*[,.;]\s*$", "", answer.strip())
+    answer = re.sub(r"\+\s*(\\[lc]dots|\.\.\.|O\(.*\))\s*$", "", answer.strip())
+    return answer.strip() or None
+
+
+def _math_part(text):
+    """The mathematical operand of a problem statement (after "of"/":" and any "f(x) =")."""
+    inline = re.findall(r"\$\$?(.+?)\$\$?", text, re.S)
+    if inline:
+        text = inline[-1]
+    else:
+        text = re.split(r"\b(?:of|for)\b|:", text, maxsplit=1)[-1]
+    text = LEAD_WORDS.sub("", text.strip())
+    text = re.sub(r"^\s*(?:the\s+)?(?:function|sequence|signal)\s+", "", text, flags=re.I)
+    text = re.sub(r"^\s*[A-Za-z]\s*[\(\[]\s*[a-z]\s*[\)\]]\s*=", "", text)
+    return text.strip().rstrip(".").strip()
+
+
+class Verification:
+    """A generated check for one (query, solution) pair.
+
+    signature, when set, is a script that parses only the query's operands and
+    leaves their srepr in `signature`: two queries with the same name and
+    signature are the same problem (see solver.dedup).
+    """
+
+    def __init__(self, name, category, script, description, signature=None):
+        self.name = name
+        self.category = category
+        self.script = script
+        self.description = description
+        self.signature = signature
+
+    def audit_text(self):
+        # Same tagged format the Skeptic produces, minus the LLM's STATUS verdict
+        return (
+            f"[CATEGORY]{self.category}[/CATEGORY]\n"
+            f"[SKEPTIC]\n{self.script}\n[/SKEPTIC]\n"
+            f"[FEEDBACK]{FEEDBACK_PREFIX} ({self.name}): {self.description}[/FEEDBACK]"
+        )
+
+
+def _script(*lines):
+    return "\n".join(("import sympy as sp", "from solver.auditor_logic.verifiers import *") + lines)
+
+
+def _signature(setup, *operands):
+    return _script(*setup, f"signature = sp.srepr(sp.Tuple({', '.join(operands)}))", "is_correct = True")
+
+
+# "from x = 0 to x = 2", "between 0 and \pi"
+TEXT_BOUNDS = re.compile(
+    r"\b(?:from|between)\s+\$?\s*(?:[a-z]\s*=\s*)?(-?[^\s$,;]+?)\s*\$?\s+(?:to|and)\s+"
+    r"\$?\s*(?:[a-z]\s*=\s*)?(-?[^\s$,;]+?)\s*\$?\.?(?=\s|[,;]|$)",
+    re.I,
+)
+
+
+def _integral(query, answer):
+    if query.count("\\int") + len(re.findall(r"\bintegral\b", query, re.I)) == 0 or "\\iint" in query:
+        return None
+    if query.count("\\int") > 1 or re.search(r"\b(double|triple|surface|line)\s+integral", query, re.I):
+        return None
+    match = re.search(
+        r"\\int(?:\\limits)?\s*(?:_\s*(\{[^}]*\}|\S)\s*\^\s*(\{[^}]*\}|\S))?(.+)\bd\s*([a-z])\b",
+        query, re.S,
+    )
+    if match:
+        lower, upper, integrand, var = match.groups()
+    else:
+        # Plain text: "the indefinite integral of x^2 with respect to x"
+        match = re.search(r"\bintegral of\s+(.+?)\s+with respect to\s+([a-z])\b", query, re.I | re.S)
+        if not match:
+            return None
+        lower = upper = None
+        integrand, var = match.groups()
+        integrand = integrand.strip("$ ")
+    if lower is None and re.search(r"\b(from|between)\b", query, re.I):
+        # Bounds in words ("from x = 0 to x = 2"); if they can't be read, leave it to the Skeptic
+        bounds = TEXT_BOUNDS.search(query)
+        if bounds is None:
+            return None
+        lower, upper = bounds.groups()
+    integrand = integrand.replace("\\,", " ").strip()
+    setup = (
+        f"{var} = sp.Symbol({var!r})",
+        f"integrand = only_symbols(latex_to_sympy({integrand!r}, {var}={var}), {var})",
+    )
+    if lower is None:
+        return Verification(
+            "indefinite integral", "Calculus",
+            _script(
+                *setup,
+                f"proposed_sol = without_constants(latex_to_sympy({answer!r}, {var}={var}), keep={{{var}}})",
+                f"proposed_sol = only_symbols(proposed_sol, {var})",
+                f"is_correct = sp.Eq(sp.diff(proposed_sol, {var}), integrand)",
+            ),
+            "differentiating the proposed antiderivative must give back the integrand.",
+            _signature(setup, var, "integrand"),
+        )
+    lower, upper = lower.strip("{}"), upper.strip("{}")
+    setup += (f"bounds = (only_symbols(latex_to_sympy({lower!r})), only_symbols(latex_to_sympy({upper!r})))",)
+    return Verification(
+        "definite integral", "Calculus",
+        _script(
+            *setup,
+            f"proposed_sol = only_symbols(latex_to_sympy({answer!r}, {var}={var}))",
+            f"value = sp.Integral(integrand, ({var}, *bounds)).evalf(30)",
+            "is_correct = sp.Eq(sp.N(proposed_sol, 30), value)",
+        ),
+        "the proposed value must match a numerical evaluation of the integral.",
+        _signature(setup, var, "integrand", "*bounds"),
+    )
+
+
+def _derivative(query, answer):
+    if not re.search(r"\bderivative\b|\bdifferentiate\b|\\frac\{d\}\{d[a-z]\}|\bd/d[a-z]\b", query, re.I):
+        return None
+    if re.search(r"\b(partial|second|third|higher|implicit)\b|\\partial", query, re.I):
+        return None
+    var = re.search(r"\\frac\{d\}\{d([a-z])\}|\bd/d([a-z])\b|[a-z]\(([a-z])\)|respect to ([a-z])\b", query)
+    var = next((g for g in var.groups() if g), "x") if var else "x"
+    expr = re.sub(r"^.*?(?:\\frac\{d\}\{d[a-z]\}|\bd/d[a-z]\b)", "", query, flags=re.S) if re.search(
+        r"\\frac\{d\}\{d[a-z]\}|\bd/d[a-z]\b", query) else _math_part(query)
+    expr = re.split(r"\bwith respect to\b", expr)[0].strip().rstrip(".")
+    if not expr:
+        return None
+    setup = (f"{var} = sp.Symbol({var!r})", f"f = only_symbols(latex_to_sympy({expr!r}, {var}={var}), {var})")
+    return Verification(
+        "derivative", "Calculus",
+        _script(
+            *setup,
+            f"proposed_sol = only_symbols(latex_to_sympy({answer!r}, {var}={var}), {var})",
+            f"is_correct = sp.Eq(proposed_sol, sp.diff(f, {var}))",
+        ),
+        "the proposed derivative must equal SymPy's derivative of the function.",
+        _signature(setup, var, "f"),
+    )
+
+
+def _ode_ivp(query, answer):
+    conditions = re.findall(r"y\s*((?:'|\^\{\\prime\})*)\s*\(\s*(-?[\d.]+)\s*\)\s*=\s*(-?[\d./]+)", query)
+    if not conditions or not re.search(r"y\s*('|\^\{\\prime)|\\frac\{d\^?\{?\d?\}?y\}|\bdy/d[a-z]\b", query):
+        return None
+    var = re.search(r"y\(([a-z])\)|\\frac\{d\^?\{?\d?\}?y\}\{d([a-z])|\bdy/d([a-z])\b", query)
+    var = next((g for g in var.groups() if g), None) if var else None
+    var = var or ("t" if re.search(r"(?<![A-Za-z\\])t(?![A-Za-z])", answer) else "x")
+    equation = next((part for part in re.split(r",|;|\bwith\b|\bgiven\b|\bwhere\b|\bsubject to\b|:", query)
+                     if "=" in part and re.search(r"y\s*('|\^\{\\prime)|\\frac\{d", part)
+                     and not re.search(r"y\s*'*\s*\(\s*-?[\d.]+\s*\)", part)), None)
+    if equation is None:
+        return None
+    equation = LEAD_WORDS.sub("", equation)
+    checks, initial_values = ["sp.Eq(residual, 0)"], []
+    for primes, point, value in conditions:
+        order = primes.count("'") + primes.count("prime")
+        point, value = point.rstrip('.'), value.rstrip('.')
+        checks.append(f"sp.Eq(sp.diff(proposed_sol, {var}, {order}).subs({var}, {point}), {value})")
+        initial_values.append(f"sp.Tuple({order}, sp.S({point!r}), sp.S({value!r}))")
+    setup = (
+        f"{var} = sp.Symbol({var!r})",
+        "y = sp.Function('y')",
+        f"ode = only_symbols(ode_to_sympy({equation.strip()!r}, {var!r}), {var})",
+    )
+    return Verification(
+        "ODE initial value problem", "Differential Equations",
+        _script(
+            *setup,
+            f"proposed_sol = only_symbols(latex_to_sympy({answer!r}, {var}={var}), {var})",
+            f"residual = (ode.lhs - ode.rhs).subs(y({var}), proposed_sol).doit()",
+            f"is_correct = all_hold([{', '.join(checks)}])",
+        ),
+        "the proposed solution must satisfy the ODE and every initial condition.",
+        # Conditions as a set: the order they are listed in does not matter
+        _signature(setup, "ode", f"sp.FiniteSet({', '.join(initial_values)})"),
+    )
+
+
+def _laplace(query, answer):
+    if not re.search(r"laplace|\\mathcal\{L\}", query, re.I):
+        return None
+    operand = _math_part(query)
+    symbols = "t, s = sp.symbols('t s', positive=True)"
+    if re.search(r"inverse|\\mathcal\{L\}\^\{-1\}|\^\{-1\}", query, re.I):
+        setup = (symbols, f"F = only_symbols(latex_to_sympy({operand!r}, t=t, s=s), s)")
+        return Verification(
+            "inverse Laplace transform", "Signals & Systems",
+            _script(
+                *setup,
+                f"proposed_sol = only_symbols(latex_to_sympy({answer!r}, t=t, s=s), t)",
+                "is_correct = sp.Eq(sp.laplace_transform(proposed_sol, t, s, noconds=True), F)",
+            ),
+            "transforming the proposed time function back must give F(s).",
+            _signature(setup, "F"),
+        )
+    setup = (symbols, f"f = only_symbols(latex_to_sympy({operand!r}, t=t, s=s), t)")
+    return Verification(
+        "Laplace transform", "Signals & Systems",
+        _script(
+            *setup,
+            f"proposed_sol = only_symbols(latex_to_sympy({answer!r}, t=t, s=s), s)",
+            "is_correct = sp.Eq(proposed_sol, sp.laplace_transform(f, t, s, noconds=True))",
+        ),
+        "the proposed F(s) must equal SymPy's Laplace transform of f(t).",
+        _signature(setup, "f"),
+    )
+
+
+def _z_transform(query, answer):
+    if not re.search(r"\bz[- ]transform", query, re.I):
+        return None
+    operand = re.sub(r"\bu\s*\[\s*n\s*\]", "1", _math_part(query))  # the sum starts at n = 0
+    setup = (
+        "n = sp.Symbol('n', integer=True, nonnegative=True)",
+        "z = sp.Symbol('z')",
+        # Rational coefficients, so the geometric sum has a closed form
+        f"x = only_symbols(sp.nsimplify(latex_to_sympy({operand!r}, n=n, z=z)), n)",
+    )
+    return Verification(
+        "Z-transform", "Signals & Systems",
+        _script(
+            *setup,
+            f"proposed_sol = only_symbols(sp.nsimplify(latex_to_sympy({answer!r}, n=n, z=z)), z)",
+            "X = sp.summation(x * z**(-n), (n, 0, sp.oo))",
+            "X = X.args[0][0] if isinstance(X, sp.Piecewise) else X  # region of convergence branch",
+            "is_correct = sp.Eq(proposed_sol, X)",
+        ),
+        "the proposed X(z) must equal the summed series x[n] z^-n.",
+        _signature(setup, "x"),
+    )
+
+
+# The highest power the query asks for: "up to the x^4 term", "through (x-1)^3",
+# "to order 5", "of degree 3"; "order n" counts the x^n term in, like "up to x^n"
+SERIES_DEGREE = re.compile(
+    r"\b(?:up\s+to|through|to)\s+(?:and\s+including\s+)?(?:the\s+)?\$?\s*"
+    r"\(?\s*[a-z](?:\s*[-+]\s*[\w./\\]+)?\s*\)?\s*\^\s*\{?\s*(\d+)\s*\}?"
+    r"|\b(?:order|degree)\s+\$?\s*(\d+)\b",
+    re.I,
+)
+
+
+def _series(query, answer):
+    if not re.search(r"\b(taylor|maclaurin|power)\s+series|\bseries expansion\b", query, re.I):
+        return None
+    # Without a requested order the answer could only be checked against itself
+    degree = SERIES_DEGREE.search(query)
+    if degree is None:
+        return None
+    degree = next(group for group in degree.groups() if group)
+    center = re.search(r"(?:about|around|at|centered at)\s*\$?\s*([a-z])\s*=\s*(-?[\w./\\]+)", query)
+    var, point = (center.group(1), center.group(2).rstrip(".")) if center else ("x", "0")
+    if re.search(r"maclaurin", query, re.I):
+        point = "0"
+    function = re.split(
+        r"\b(?:up to|to order|through|about|around|centered|at|of order|of degree)\b", _math_part(query)
+    )[0]
+    function = function.strip().rstrip(",.")
+    setup = (
+        f"{var} = sp.Symbol({var!r})",
+        f"a = only_symbols(latex_to_sympy({point!r}))",
+        f"f = only_symbols(latex_to_sympy({function!r}, {var}={var}), {var})",
+        f"degree = {int(degree)}",
+    )
+    return Verification(
+        "series expansion", "Calculus",
+        _script(
+            *setup,
+            f"proposed_sol = only_symbols(without_order_term(latex_to_sympy({answer!r}, {var}={var})), {var})",
+            f"expected = sp.series(f, {var}, a, degree + 1).removeO()",
+            "is_correct = sp.Eq(sp.expand(proposed_sol - expected), 0)",
+        ),
+        "the proposed polynomial must match the series of the function up to the requested order.",
+        _signature(setup, var, "a", "f", "sp.Integer(degree)"),
+    )
+
+
+# Most specific first: an ODE statement may also mention "derivative", etc.
+VERIFIERS = (_laplace, _z_transform, _series, _ode_ivp, _integral, _derivative)
+
+
+def match_verifier(query, solution):
+    """Returns a Verification for a recognized problem type with a readable answer, else None."""
+    answer = final_answer(solution or "")
+    if not answer:
+        return None
+    for verifier in VERIFIERS:
+        verification = verifier(query, answer)
+        if verification is not None:
+            return verification
+    return None
+
+
+def match_problem(query):
+    """The Verification of a recognized problem type, built against a placeholder
+    answer; only its name and signature mean anything. None when not recognized."""
+    for verifier in VERIFIERS:
+        verification = verifier(query, "0")
+        if verification is not None:
+            return verification
+    return None
@@ -0,0 +1,141 @@
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from solver.models import EngineeringProblem, SimilarityBand
+from .auditor_logic import canonical
+
+# Candidates (by shared LSH buckets) whose similarity is checked exactly
+MAX_CANDIDATES = 10
+# A problem-signature script only parses the query; anything slower is not worth waiting for
+STRUCTURE_TIMEOUT = 2.0
+
+
+@functools.lru_cache(maxsize=1024)
+def structure_key(query):
+    """SHA-256 of the problem type and SymPy-parsed operands, "" when not recognized.
+
+    The query is parsed by a verifier's signature script in the sandbox, like
+    any other LaTeX from outside. Cached per process, so the lookup before a
+    solve and the save after it run the script once.
+    """
+    if not settings.QUERY_DEDUP_STRUCTURAL:
+        return ""
+    from .auditor_logic.verifiers import match_problem
+    from .services import get_sandbox
+
+    verification = match_problem(query)
+    if verification is None or verification.signature is None:
+        return ""
+    sandbox = get_sandbox()
+    if sandbox is not None:
+        passed, _, _, details = sandbox.run(verification.signature, timeout=STRUCTURE_TIMEOUT)
+    else:
+        from .auditor_logic.sandbox import execute_sympy_code
+
+        passed, _, _, details = execute_sympy_code(verification.signature, settings.SYMPY_SIMPLIFY_BUDGET)
+    if not passed or not details.get("signature"):
+        return ""
+    return hashlib.sha256(f"{verification.name}|{details['signature']}".encode("utf-8")).hexdigest()
+
+
+def structure_keys(queries):
+    """structure_key() of several queries, their scripts spread over the sandbox workers."""
+    sandbox = None
+    if settings.QUERY_DEDUP_STRUCTURAL:
+        from .services import get_sandbox
+
+        sandbox = get_sandbox()
+    if sandbox is None or len(queries) < 2:
+        return [structure_key(query) for query in queries]
+    with ThreadPoolExecutor(max_workers=sandbox.size) as executor:
+        return list(executor.map(structure_key, queries))
+
+
+def find_duplicate(query):
+    """Latest VERIFIED problem that asks the same thing as `query`, if any.
+
+    Same canonical text (whitespace, delimiters, LaTeX spacing, lead verb
+    aside) or, failing that, the same problem type with the same parsed
+    operands. Variables must match too, so the stored answer can be shown as is.
+    """
+    verified = EngineeringProblem.objects.filter(verification_status="VERIFIED").order_by("-created_at")
+    problem = verified.filter(canonical_key=canonical.text_key(query)).first()
+    if problem is None:
+        key = structure_key(query)
+        if key:
+            problem = verified.filter(structure_key=key).first()
+    return problem
+
+
+def find_similar(query, threshold):
+    """(problem, similarity) of the VERIFIED problem closest to `query`, or None below threshold.
+
+    Candidates come from the LSH buckets they share with the query; the best
+    is picked by the exact Jaccard similarity of the renamed canonical texts.
+    """
+    shingles = canonical.shingles(query)
+    buckets = Q()
+    for band, bucket in canonical.bands(canonical.minhash(shingles)):
+        buckets |= Q(band=band, bucket=bucket)
+    candidates = (
+        SimilarityBand.objects.filter(buckets)
+        .values("problem_id")
+        .annotate(hits=Count("id"))
+        .order_by("-hits", "-problem_id")[:MAX_CANDIDATES]
+    )
+    problems = EngineeringProblem.objects.in_bulk([row["problem_id"] for row in candidates])
+    scored = [(canonical.jaccard(shingles, canonical.shingles(p.prompt)), p.id, p) for p in problems.values()]
+    if not scored:
+        return None
+    similarity, _, problem = max(scored, key=lambda item: item[:2])
+    return (problem, similarity) if similarity >= threshold else None
+
+
+def reference_feedback(problem):
+    """Proposer context carrying a similar problem's verified solution."""
+    return (
+        "REFERENCE: The related problem below was solved and verified before. It may differ "
+        "from the USER PROBLEM in its numbers, variables or wording, so use it as a guide "
+        "and derive every step for the USER PROBLEM itself.\n"
+        f"RELATED PROBLEM: {problem.prompt}\n"
+        f"VERIFIED SOLUTION:\n{problem.final_solution}"
+    )
+
+
+def assign_keys(problems):
+    """Sets canonical_key on the given unsaved problems, and structure_key on the VERIFIED ones."""
+    verified = [problem for problem in problems if problem.verification_status == "VERIFIED"]
+    for problem in problems:
+        problem.canonical_key = canonical.text_key(problem.prompt)
+    for problem, key in zip(verified, structure_keys([problem.prompt for problem in verified])):
+        problem.structure_key = key
+
+
+def index_problems(problems):
+    """Adds the LSH buckets of the saved VERIFIED problems among `problems`."""
+    SimilarityBand.objects.bulk_create(
+        [
+            SimilarityBand(problem=problem, band=band, bucket=bucket)
+            for problem in problems if problem.verification_status == "VERIFIED"
+            for band, bucket in canonical.bands(canonical.minhash(canonical.shingles(problem.prompt)))
+        ],
+        batch_size=1000,
+    )
+
+
+def rebuild_index(batch_size=500):
+    """Recomputes every problem's keys and the LSH buckets. Returns (problems, verified)."""
+    problems = list(EngineeringProblem.objects.only("id", "prompt", "verification_status"))
+    for start in range(0, len(problems), batch_size):
+        batch = problems[start:start + batch_size]
+        for problem in batch:
+            problem.structure_key = ""
+        assign_keys(batch)
+        EngineeringProblem.objects.bulk_update(batch, ["canonical_key", "structure_key"])
+    with transaction.atomic():
+        SimilarityBand.objects.all().delete()
+        index_problems(problems)
+    return len(problems), sum(problem.verification_status == "VERIFIED" for problem in problems)
@@ -0,0 +1,165 @@
+"""Streaming export of stored problems and their attempts (CSV, JSONL, Parquet).
+
+Problems are read with QuerySet.iterator(chunk_size=...), their attempts
+prefetched one chunk at a time, and every chunk is encoded and handed over
+before the next one is read: memory stays flat however many rows match.
+
+- jsonl: one problem per line with its attempts nested, as the history API
+  returns them
+- csv and parquet: one row per attempt, the problem's fields first and the
+  attempt's prefixed with attempt_; a problem without attempts still gets
+  one row, its attempt columns empty
+
+Parquet needs pyarrow, which is optional: without it only that format is
+unavailable. Each chunk becomes one row group.
+"""
+import csv
+import io
+import json
+from itertools import islice
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from solver.models import EngineeringProblem, VerificationAttempt
+from .history import ATTEMPT_FIELDS, PROBLEM_FIELDS, matching_problems, problem_payload
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pip install pyarrow to export Parquet
+    pyarrow = None
+
+# Format -> content type; the format is also the file extension
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+DEFAULT_CHUNK_SIZE = 500
+
+COLUMNS = (
+    *PROBLEM_FIELDS, "attempt_number",
+    *(f"attempt_{field}" for field in ATTEMPT_FIELDS),
+)
+
+
+def available_formats():
+    return [name for name in FORMATS if name != "parquet" or pyarrow is not None]
+
+
+def _chunks(problems, chunk_size):
+    """Lists of up to chunk_size problems, their attempts prefetched per list."""
+    attempts = Prefetch("attempts", queryset=VerificationAttempt.objects.order_by("id"))
+    rows = problems.order_by("id").prefetch_related(attempts).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+def _rows(problem):
+    """The problem's flat rows: its fields followed by one attempt's, attempt by attempt."""
+    head = [getattr(problem, field) for field in PROBLEM_FIELDS]
+    attempts = problem.attempts.all()
+    if not attempts:
+        yield head + [None] * (len(COLUMNS) - len(head))
+    for number, attempt in enumerate(attempts, 1):
+        yield head + [number] + [getattr(attempt, field) for field in ATTEMPT_FIELDS]
+
+
+def _csv(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for chunk in chunks:
+        for problem in chunk:
+            writer.writerows(
+                [value.isoformat() if hasattr(value, "isoformat") else value for value in row]
+                for row in _rows(problem)
+            )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _jsonl(chunks):
+    for chunk in chunks:
+        yield "".join(
+            json.dumps(problem_payload(problem), cls=DjangoJSONEncoder) + "\n" for problem in chunk
+        ).encode("utf-8")
+
+
+class _Sink:
+    """Write-only file object for ParquetWriter; take() returns what was written since the last call."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _arrow_schema():
+    """Column types from the model fields, so a chunk of nulls cannot change them."""
+    types = {
+        "AutoField": pyarrow.int64(), "BigAutoField": pyarrow.int64(), "IntegerField": pyarrow.int64(),
+        "FloatField": pyarrow.float64(), "BooleanField": pyarrow.bool_(),
+        "DateTimeField": pyarrow.timestamp("us", tz="UTC"),
+    }
+
+    def column(model, field):
+        try:
+            return types.get(model._meta.get_field(field).get_internal_type(), pyarrow.string())
+        except FieldDoesNotExist:  # an attempt's sections are properties
+            return pyarrow.string()
+
+    return pyarrow.schema(
+        [(field, column(EngineeringProblem, field)) for field in PROBLEM_FIELDS]
+        + [("attempt_number", pyarrow.int64())]
+        + [(f"attempt_{field}", column(VerificationAttempt, field)) for field in ATTEMPT_FIELDS]
+    )
+
+
+def _parquet(chunks):
+    schema = _arrow_schema()
+    sink = _Sink()
+    with pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for chunk in chunks:
+            columns = list(zip(*(row for problem in chunk for row in _rows(problem))))
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.take()
+    yield sink.take()
+
+
+def export(fmt, status=None, category=None, start=None, end=None, model=None,
+           chunk_size=DEFAULT_CHUNK_SIZE):
+    """Bytes of the export, chunk by chunk, of the problems passing the history filters.
+
+    ValueError for an unknown format, or for parquet without pyarrow.
+    """
+    if fmt not in available_formats():
+        raise ValueError(f"Unsupported export format: {fmt}")
+    chunks = _chunks(matching_problems(status, category, start, end, model), chunk_size)
+    return {"csv": _csv, "jsonl": _jsonl, "parquet": _parquet}[fmt](chunks)
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from solver.models import EngineeringProblem, VerificationAttempt
+from .auditor_logic.cache import normalize_query
+
+# Used when the database has no stored runs yet
+DEFAULT_FIXTURE = {
+    "query": "Evaluate the indefinite integral of x^2 with respect to x.",
+    "solution": "We integrate term by term: $$\\int x^2 \\, dx = \\frac{x^3}{3} + C$$",
+    "audit": (
+        "[CATEGORY]Calculus[/CATEGORY]\n"
+        "[SKEPTIC]\n"
+        "import sympy as sp\n"
+        "x = sp.symbols('x')\n"
+        "proposed_sol = x**3/3\n"
+        "is_correct = sp.Eq(sp.diff(proposed_sol, x), x**2)\n"
+        "[/SKEPTIC]\n"
+        "[FEEDBACK]Differentiating the antiderivative gives back the integrand.[/FEEDBACK]\n"
+        "STATUS=TRUE\n"
+        "[AFFIRMATION]The antiderivative is correct.[/AFFIRMATION]"
+    ),
+}
+
+# Shapes of the user messages built by Proposer.build_messages / Skeptic.build_messages
+SKEPTIC_MESSAGE = re.compile(r"\APROBLEM: (.*?)\n\nPROPOSED SOLUTION:\n", re.S)
+PROPOSER_MESSAGE = re.compile(r"USER PROBLEM: (.*)\Z", re.S)
+
+
+class FixtureStore:
+    """Recorded (query, solution, audit) triples the fake server answers from.
+
+    Known queries get their own recording; anything else gets a fixed pick
+    from the store, so repeated runs see the same answers.
+    """
+
+    def __init__(self, fixtures=None):
+        self.fixtures = list(fixtures or []) or [DEFAULT_FIXTURE]
+        self.by_query = {normalize_query(f["query"]): f for f in self.fixtures}
+
+    @classmethod
+    def from_database(cls, limit=None):
+        """One fixture per stored problem: its final solution and last Skeptic output."""
+        problems = EngineeringProblem.objects.exclude(final_solution="").order_by("-id")
+        if limit:
+            problems = problems[:limit]
+        problems = list(problems.values("id", "prompt", "final_solution"))
+        audits = {}
+        attempts = (
+            VerificationAttempt.objects.filter(problem_id__in=[p["id"] for p in problems])
+            .exclude(full_LLM_output="")
+            .order_by("id")
+            .values_list("problem_id", "full_LLM_output")
+        )
+        for problem_id, output in attempts:
+            audits[problem_id] = output  # ordered by id, so the last attempt wins
+        return cls([
+            {"query": p["prompt"], "solution": p["final_solution"], "audit": audits[p["id"]]}
+            for p in problems if p["id"] in audits
+        ])
+
+    def queries(self):
+        return [f["query"] for f in self.fixtures]
+
+    def lookup(self, query):
+        fixture = self.by_query.get(normalize_query(query))
+        if fixture is None:
+            digest = hashlib.sha256(normalize_query(query).encode("utf-8")).digest()
+            fixture = self.fixtures[int.from_bytes(digest[:4], "big") % len(self.fixtures)]
+        return fixture
+
+    def answer(self, messages):
+        """The recorded completion for a Proposer or Skeptic conversation."""
+        content = messages[-1]["content"] if messages else ""
+        skeptic = SKEPTIC_MESSAGE.search(content)
+        if skeptic:
+            return self.lookup(skeptic.group(1))["audit"]
+        proposer = PROPOSER_MESSAGE.search(content)
+        return self.lookup(proposer.group(1) if proposer else content)["solution"]
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """Minimal OpenAI/Groq-compatible /chat/completions endpoint.
+
+    Every request waits `latency` seconds (plus or minus `jitter`) before
+    answering; `error_rate` of them fail with a 500 and `rate_limit_rate`
+    with a 429 carrying Retry-After, so the key pool's retry path is
+    exercised too. Streaming requests get the content in small chunks,
+    `token_delay` seconds apart.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, store, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, token_delay=0.0, seed=None):
+        super().__init__(address, _Handler)
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.token_delay = token_delay
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def draw(self):
+        """Returns (delay_seconds, injected_status or None) for one request."""
+        with self._rng_lock:
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return delay, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, 500
+        return delay, None
+
+
+def _usage(messages, content):
+    # Rough 4-characters-per-token estimate; only used for the key pool's TPM accounting
+    prompt = sum(len(m.get("content") or "") for m in messages) // 4
+    completion = len(content) // 4
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.rfile.read(length)
+            return self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        delay, injected = self.server.draw()
+        time.sleep(delay)
+        if injected == 429:
+            return self.send_json(
+                429, {"error": {"message": "Rate limit reached (injected)", "type": "rate_limit_exceeded"}},
+                headers={"retry-after": "1"},
+            )
+        if injected == 500:
+            return self.send_json(500, {"error": {"message": "Internal server error (injected)"}})
+
+        messages = body.get("messages", [])
+        content = self.server.store.answer(messages)
+        model = body.get("model", "fake")
+        usage = _usage(messages, content)
+        if body.get("stream"):
+            return self.stream(model, content, usage)
+
+        self.send_json(200, {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def stream(self, model, content, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_event(payload):
+            data = b"data: " + (payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")) + b"\n\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def chunk(delta, finish_reason=None, **extra):
+            return {
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra,
+            }
+
+        for start in range(0, len(content), 16):
+            send_event(chunk({"content": content[start:start + 16]}))
+            if self.server.token_delay:
+                time.sleep(self.server.token_delay)
+        send_event(chunk({}, "stop", x_groq={"usage": usage}))
+        send_event(b"[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
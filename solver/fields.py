@@ -0,0 +1,138 @@
+"""Model fields that store large text compressed.
+
+CompressedTextField keeps a str in a BLOB column: one tag byte naming the
+codec, then the payload. zlib is always available; zstd (faster, and
+smaller on long texts) needs the zstandard package. TEXT_COMPRESSION picks
+the codec for new writes, and every stored value says how to read it back,
+so switching codecs needs no migration. Values too short to gain anything
+are stored as plain UTF-8, and "" as an empty BLOB, so filter(field="")
+still finds the empty ones. Rows written as text before a column became
+compressed read back unchanged.
+
+Only equality with "" works in queries: substring lookups see the
+compressed bytes, which is what the FTS5 index (solver.search) is for.
+
+locate() and section() store parsed sections of a text as offsets into it
+instead of as copies.
+"""
+import json
+import zlib
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+try:
+    import zstandard
+except ImportError:  # pip install zstandard for TEXT_COMPRESSION = 'zstd'
+    zstandard = None
+
+RAW, ZLIB, ZSTD = b"\x00", b"\x01", b"\x02"
+# Below this many bytes compression saves next to nothing and costs a call
+MIN_COMPRESS_BYTES = 64
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def compress(text):
+    """Tagged bytes for `text`: b"" for "", else the tag byte and the (maybe compressed) UTF-8."""
+    data = text.encode("utf-8")
+    if not data:
+        return b""
+    if len(data) < MIN_COMPRESS_BYTES or settings.TEXT_COMPRESSION == "none":
+        return RAW + data
+    if settings.TEXT_COMPRESSION == "zstd" and zstandard is not None:
+        tag, packed = ZSTD, zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    else:
+        tag, packed = ZLIB, zlib.compress(data, ZLIB_LEVEL)
+    # Incompressible text (already short, or random) is kept as it is
+    return tag + packed if len(packed) < len(data) else RAW + data
+
+
+def decompress(value):
+    """The text behind compress()'s bytes; str values (stored before compression) pass through."""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if not value:
+        return ""
+    tag, payload = value[:1], value[1:]
+    if tag == ZLIB:
+        payload = zlib.decompress(payload)
+    elif tag == ZSTD:
+        if zstandard is None:
+            raise ImproperlyConfigured("Reading zstd-compressed text needs the zstandard package.")
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    elif tag != RAW:
+        raise ValueError(f"Unknown compression tag: {tag!r}")
+    return payload.decode("utf-8")
+
+
+class CompressedTextField(models.Field):
+    """A TextField stored compressed; reads and writes plain str."""
+
+    description = "Compressed text"
+
+    def get_internal_type(self):
+        return "BinaryField"
+
+    def from_db_value(self, value, expression, connection):
+        return decompress(value)
+
+    def to_python(self, value):
+        return decompress(value)
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        return None if value is None else compress(str(value))
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        return None if value is None else connection.Database.Binary(value)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{"widget": forms.Textarea, **kwargs})
+
+
+class CompressedJSONField(CompressedTextField):
+    """JSON stored as compressed text; unlike JSONField it cannot be queried by key."""
+
+    description = "Compressed JSON"
+
+    def from_db_value(self, value, expression, connection):
+        return self.to_python(value)
+
+    def to_python(self, value):
+        if value is None or not isinstance(value, (str, bytes, memoryview)):
+            return value
+        text = decompress(value)
+        return json.loads(text) if text else None
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        return compress(json.dumps(value, cls=DjangoJSONEncoder, separators=(",", ":")))
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj), cls=DjangoJSONEncoder)
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{"form_class": forms.JSONField, **kwargs})
+
+
+def locate(text, value):
+    """How `section` stores `value` from `text`: [start, end] when it is a slice, else value itself."""
+    start = text.find(value) if value else -1
+    return [start, start + len(value)] if start >= 0 else value
+
+
+def section(text, stored):
+    """Reverses locate()."""
+    if isinstance(stored, list):
+        start, end = stored
+        return text[start:end]
+    return stored or ""
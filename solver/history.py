@@ -0,0 +1,86 @@
+import base64
+import binascii
+from datetime import datetime
+from django.db.models import Prefetch, Q
+from solver.analytics import filter_problems
+from solver.models import EngineeringProblem, VerificationAttempt
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+PROBLEM_FIELDS = (
+    "id", "prompt", "category", "verification_status", "total_attempts", "model_name",
+    "final_solution", "solve_ms", "db_ms", "total_tokens", "created_at",
+)
+# full_LLM_output is left out: it repeats the fields below and dominates the payload
+ATTEMPT_FIELDS = (
+    "id", "code_status", "is_sympy_error", "code_error_message", "sympy_code",
+    "LLM_status", "LLM_feedback", "LLM_affirmation", "LLM_corrections",
+    "propose_ms", "audit_ms", "sympy_ms", "check_ms", "prompt_tokens", "completion_tokens",
+    "recovery", "stop_reason", "created_at",
+)
+
+
+def encode_cursor(problem):
+    """Opaque position after `problem` in the newest-first order."""
+    raw = f"{problem.created_at.isoformat()}|{problem.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Returns (created_at, id) from encode_cursor; ValueError when malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, problem_id = raw.rsplit("|", 1)
+        created_at = datetime.fromisoformat(created_at)
+        problem_id = int(problem_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Malformed cursor") from e
+    if created_at.tzinfo is None:
+        raise ValueError("Malformed cursor")
+    return created_at, problem_id
+
+
+def matching_problems(status=None, category=None, start=None, end=None, model=None):
+    """Stored problems passing the history filters (status, category, date range, model)."""
+    problems = filter_problems(EngineeringProblem.objects.all(), start, end, model)
+    if status:
+        problems = problems.filter(verification_status=status)
+    if category:
+        problems = problems.filter(category=category)
+    return problems
+
+
+def problem_page(status=None, category=None, start=None, end=None, model=None,
+                 cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """One page of stored problems, newest first, with their attempts prefetched.
+
+    Keyset pagination on (created_at, id): a page starts right after the
+    cursor instead of at an OFFSET, so deep pages cost the same as the first.
+    Returns (problems, next_cursor), next_cursor being None on the last page;
+    always two queries, one for the problems and one for all their attempts.
+    """
+    problems = matching_problems(status, category, start, end, model)
+    if cursor:
+        created_at, problem_id = decode_cursor(cursor)
+        # (created_at, id) < cursor, written so the created_at bound can use the index
+        problems = problems.filter(
+            Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(id__lt=problem_id))
+        )
+
+    attempts = Prefetch("attempts", queryset=VerificationAttempt.objects.order_by("id"))
+    page = list(problems.order_by("-created_at", "-id").prefetch_related(attempts)[:limit + 1])
+    if len(page) > limit:
+        page = page[:limit]
+        return page, encode_cursor(page[-1])
+    return page, None
+
+
+def problem_payload(problem):
+    """JSON-serializable problem with its attempts, as the history API returns it."""
+    payload = {field: getattr(problem, field) for field in PROBLEM_FIELDS}
+    payload["attempts"] = [
+        {field: getattr(attempt, field) for field in ATTEMPT_FIELDS}
+        for attempt in problem.attempts.all()
+    ]
+    return payload
@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from solver.models import SolveJob
+from .auditor_logic import cache
+from .services import save_history, solve_query
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Returns the process-wide worker pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.SOLVER_JOB_WORKERS,
+                thread_name_prefix="solve-job",
+            )
+        return _executor
+
+
+def submit_job(query, use_cache=True):
+    """Queues a query and returns the SolveJob row the caller can poll."""
+    job = SolveJob.objects.create(query=query, use_cache=use_cache)
+    get_executor().submit(run_job, job.id)
+    return job
+
+
+def _update(job_id, **fields):
+    # QuerySet.update() skips auto_now, so bump the timestamp by hand
+    SolveJob.objects.filter(id=job_id).update(updated_at=timezone.now(), **fields)
+
+
+def run_job(job_id):
+    """Worker entry point: solves the job's query and stores the outcome."""
+    try:
+        job = SolveJob.objects.get(id=job_id)
+        _update(job_id, status="RUNNING")
+
+        def on_progress(stage, attempt):
+            _update(job_id, stage=stage, current_attempt=attempt)
+
+        try:
+            with nullcontext() if job.use_cache else cache.bypass():
+                history = solve_query(job.query, on_progress=on_progress)
+            problem = save_history(job.query, history)
+        except Exception as e:
+            _update(job_id, status="FAILED", stage="", error=str(e))
+            return
+
+        _update(job_id, status="DONE", stage="", history=history, problem=problem)
+    finally:
+        # Worker threads are not covered by Django's request cycle cleanup
+        close_old_connections()
+
+
+def fail_stale_jobs(older_than=None):
+    """Marks QUEUED and RUNNING jobs FAILED; returns how many.
+
+    Jobs live in the thread pool of the process that accepted them, so a
+    restart leaves them unfinished for good. older_than (a timedelta) spares
+    jobs updated more recently, which a live process may still be running.
+    """
+    jobs = SolveJob.objects.filter(status__in=["QUEUED", "RUNNING"])
+    if older_than is not None:
+        jobs = jobs.filter(updated_at__lt=timezone.now() - older_than)
+    return jobs.update(
+        status="FAILED", stage="", updated_at=timezone.now(),
+        error="Interrupted: the server stopped before the job finished. Submit the query again.",
+    )
+
+
+def job_payload(job):
+    """JSON-serializable view of a job for the status endpoint."""
+    payload = {
+        "job_id": job.id,
+        "status": job.status,
+        "stage": job.stage,
+        "attempt": job.current_attempt,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat(),
+    }
+    if job.status == "DONE":
+        payload["problem_id"] = job.problem_id
+        payload["final"] = job.history[-1] if job.history else None
+        payload["history"] = job.history
+    elif job.status == "FAILED":
+        payload["error"] = job.error
+    return payload
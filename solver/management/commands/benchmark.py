@@ -0,0 +1,236 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from solver.analytics import percentile
+from solver.auditor_logic import cache
+from solver.fake_llm import FixtureStore
+from solver.services import build_auditor, configured_api_keys, save_histories, save_history
+
+SUITES = ("auditor", "view", "batch")
+# Metrics compared against --baseline; True when bigger is better
+GUARDED_METRICS = {"p50_ms": False, "p95_ms": False, "throughput_per_min": True}
+
+
+class DBTimer:
+    """Execute wrapper that adds up the time spent in SQL on this connection."""
+
+    def __init__(self):
+        self.ms = 0.0
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.ms += (time.perf_counter() - start) * 1000
+            self.queries += 1
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _history_ms(history):
+    """(LLM wait, SymPy time) recorded on a run's attempts, in ms."""
+    llm = sum(call.get("total_ms") or 0 for attempt in history for call in attempt.get("llm_calls", []))
+    sympy = sum(attempt.get("sympy_ms") or 0 for attempt in history)
+    return llm, sympy
+
+
+def summarize(wall_s, latencies_ms, histories, db):
+    """Throughput, latency percentiles and the per-run split of where time went."""
+    runs = len(histories)
+    llm, sympy = (sum(values) for values in zip(*map(_history_ms, histories))) if histories else (0.0, 0.0)
+    latencies = sorted(latencies_ms)
+    result = {
+        "runs": runs,
+        "wall_s": round(wall_s, 3),
+        "throughput_per_min": round(runs / wall_s * 60, 1) if wall_s else 0.0,
+        "llm_ms_per_run": round(llm / runs, 2) if runs else 0.0,
+        "sympy_ms_per_run": round(sympy / runs, 2) if runs else 0.0,
+        "db_ms_per_run": round(db.ms / runs, 2) if runs else 0.0,
+        "db_queries_per_run": round(db.queries / runs, 1) if runs else 0.0,
+    }
+    if latencies:
+        result.update({f"p{p}_ms": round(percentile(latencies, p), 2) for p in (50, 95, 99)})
+        # Whatever the pipeline itself adds on top of the LLM, SymPy and the database
+        result["overhead_ms_per_run"] = round(
+            sum(latencies) / runs - result["llm_ms_per_run"] - result["sympy_ms_per_run"] - result["db_ms_per_run"], 2
+        )
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        "End-to-end benchmark of Auditor.process_query, the /solve/ view and the async "
+        "batch path against the offline fake LLM server (no network needed)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma-separated subset of {', '.join(SUITES)}")
+        parser.add_argument("--queries", type=int, default=20, help="Problems per suite")
+        parser.add_argument("--concurrency", type=int, default=settings.SOLVER_BATCH_CONCURRENCY, help="Batch suite only")
+        parser.add_argument("--latency", type=float, default=0.0, help="Injected seconds per LLM call")
+        parser.add_argument("--jitter", type=float, default=0.0)
+        parser.add_argument("--error-rate", type=float, default=0.0)
+        parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+        parser.add_argument("--base-url", help="Use an already running server instead of starting one")
+        parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+        parser.add_argument("--baseline", help="Earlier --json output to compare against")
+        parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression vs --baseline")
+
+    def handle(self, *args, **options):
+        suites = [s.strip() for s in options["suites"].split(",") if s.strip()]
+        unknown = set(suites) - set(SUITES)
+        if unknown:
+            raise CommandError(f"Unknown suite(s): {', '.join(sorted(unknown))}")
+
+        store = FixtureStore.from_database()
+        queries = (store.queries() * options["queries"])[:options["queries"]]
+        self.stdout.write(f"{len(store.fixtures)} fixtures | {len(queries)} problems per suite")
+
+        # Fixtures come from the real database; every suite writes to a throwaway one
+        with self.scratch_database(), self.fake_server(options) as base_url, override_settings(
+            # The fake server has no quotas; keep the key pool from pacing the run
+            GROQ_KEY_RPM=10**6, GROQ_KEY_TPM=10**9,
+        ), cache.bypass():
+            os.environ["GROQ_BASE_URL"] = base_url
+            if not configured_api_keys():
+                os.environ["GROQ_API_KEY1"] = "fake-key"
+            auditor = build_auditor()
+            results = {}
+            for suite in suites:
+                self.stdout.write(f"Running {suite} suite...")
+                results[suite] = getattr(self, f"run_{suite}")(auditor, queries, options)
+
+        self.report(results)
+        if options["json_path"]:
+            Path(options["json_path"]).write_text(json.dumps(results, indent=2))
+        if options["baseline"]:
+            self.compare(results, json.loads(Path(options["baseline"]).read_text()), options["tolerance"])
+
+    @contextmanager
+    def scratch_database(self):
+        """Points the default connection at a freshly migrated test database for the block.
+
+        The runs' fake problems must never reach the real tables: they would
+        skew the analytics, be reused for real queries and become the next
+        run's fixtures.
+        """
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={"default"}, serialized_aliases=set())
+        try:
+            yield
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    @contextmanager
+    def fake_server(self, options):
+        if options["base_url"]:
+            yield options["base_url"]
+            return
+        port = _free_port()
+        # A separate process, so the server's threads do not compete for our GIL
+        process = subprocess.Popen(
+            [sys.executable, str(settings.BASE_DIR / "manage.py"), "fake_llm", "--port", str(port), "--seed", "0",
+             "--latency", str(options["latency"]), "--jitter", str(options["jitter"]),
+             "--error-rate", str(options["error_rate"]), "--rate-limit-rate", str(options["rate_limit_rate"])],
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                    break
+                except OSError:
+                    if process.poll() is not None or time.monotonic() > deadline:
+                        raise CommandError("The fake LLM server did not start")
+                    time.sleep(0.1)
+            yield f"http://127.0.0.1:{port}"
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    def run_auditor(self, auditor, queries, options):
+        db, latencies, histories = DBTimer(), [], []
+        start = time.perf_counter()
+        with connection.execute_wrapper(db):
+            for query in queries:
+                t = time.perf_counter()
+                history = auditor.process_query(query)
+                save_history(query, history)
+                latencies.append((time.perf_counter() - t) * 1000)
+                histories.append(history)
+        return summarize(time.perf_counter() - start, latencies, histories, db)
+
+    def run_view(self, auditor, queries, options):
+        # The test environment records template contexts, which is where the history is
+        setup_test_environment()
+        try:
+            client = Client()
+            db, latencies, histories = DBTimer(), [], []
+            start = time.perf_counter()
+            with connection.execute_wrapper(db):
+                for query in queries:
+                    t = time.perf_counter()
+                    response = client.post("/solve/", {"query": query, "no_cache": "1"})
+                    latencies.append((time.perf_counter() - t) * 1000)
+                    if response.status_code != 200 or "history" not in response.context:
+                        raise CommandError(f"/solve/ failed for {query[:40]!r} (HTTP {response.status_code})")
+                    histories.append(response.context["history"])
+            return summarize(time.perf_counter() - start, latencies, histories, db)
+        finally:
+            teardown_test_environment()
+
+    def run_batch(self, auditor, queries, options):
+        db = DBTimer()
+        start = time.perf_counter()
+        batch = asyncio.run(auditor.process_many(queries, concurrency=options["concurrency"]))
+        finished = [(query, history) for query, history in zip(queries, batch) if not isinstance(history, Exception)]
+        histories = [history for _, history in finished]
+        with connection.execute_wrapper(db):
+            save_histories(finished)
+        # process_many only reports the batch as a whole, so there are no per-problem latencies
+        result = summarize(time.perf_counter() - start, [], histories, db)
+        result["errors"] = len(batch) - len(histories)
+        return result
+
+    def report(self, results):
+        columns = ["runs", "throughput_per_min", "p50_ms", "p95_ms", "p99_ms",
+                   "llm_ms_per_run", "sympy_ms_per_run", "db_ms_per_run", "overhead_ms_per_run"]
+        headers = ["runs", "per min", "p50 ms", "p95 ms", "p99 ms", "llm ms", "sympy ms", "db ms", "other ms"]
+        self.stdout.write("")
+        self.stdout.write(f"{'suite':<8}" + "".join(f"{h:>10}" for h in headers))
+        for suite, result in results.items():
+            cells = "".join(f"{result[c] if c in result else '-':>10}" for c in columns)
+            self.stdout.write(f"{suite:<8}{cells}")
+
+    def compare(self, results, baseline, tolerance):
+        regressions = []
+        for suite, result in results.items():
+            for metric, higher_is_better in GUARDED_METRICS.items():
+                old, new = baseline.get(suite, {}).get(metric), result.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                if (change < -tolerance) if higher_is_better else (change > tolerance):
+                    regressions.append(f"{suite}.{metric}: {old} -> {new} ({change:+.0%})")
+        if regressions:
+            raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No regressions beyond {tolerance:.0%} against the baseline."))
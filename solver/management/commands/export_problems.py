@@ -0,0 +1,64 @@
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from solver import export
+
+
+def _date(value):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise CommandError(f"Not a YYYY-MM-DD date: {value}")
+    return day
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams the stored problems and their attempts to a CSV, JSONL or Parquet file "
+        "(Parquet needs pyarrow), a chunk at a time so memory stays flat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="File to write, or - for stdout (csv and jsonl only)")
+        parser.add_argument("--format", choices=list(export.FORMATS), default=None,
+                            help="Default: from the output's extension, else csv")
+        parser.add_argument("--status", default=None, help="Only problems with this verification status")
+        parser.add_argument("--category", default=None)
+        parser.add_argument("--model", default=None, help="Only problems solved by this Proposer model")
+        parser.add_argument("--start", type=_date, default=None, help="First day (YYYY-MM-DD)")
+        parser.add_argument("--end", type=_date, default=None, help="Last day (YYYY-MM-DD), inclusive")
+        parser.add_argument("--chunk-size", type=int, default=export.DEFAULT_CHUNK_SIZE,
+                            help="Problems read and written per round")
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        fmt = options["format"] or next(
+            (name for name in export.FORMATS if output.endswith(f".{name}")), "csv"
+        )
+        if fmt not in export.available_formats():
+            raise CommandError("Parquet export needs pyarrow (pip install pyarrow).")
+        if output == "-" and fmt == "parquet":
+            raise CommandError("Parquet cannot be written to stdout; give a file name.")
+
+        content = export.export(
+            fmt, status=options["status"], category=options["category"],
+            start=options["start"], end=options["end"], model=options["model"],
+            chunk_size=options["chunk_size"],
+        )
+        start = time.perf_counter()
+        written = 0
+        stream = sys.stdout.buffer if output == "-" else open(output, "wb")
+        try:
+            for chunk in content:
+                stream.write(chunk)
+                written += len(chunk)
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+        if output != "-":
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {written / 1e6:.1f} MB of {fmt} to {output} in {time.perf_counter() - start:.1f} s."
+            ))
@@ -0,0 +1,19 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from solver.jobs import fail_stale_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Marks queued and running solve jobs FAILED. Jobs do not survive a restart: run this "
+        "before starting the server, or with --older-than while it runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=float, default=None, metavar="MINUTES",
+                            help="Only jobs not updated for this many minutes (default: all of them)")
+
+    def handle(self, *args, **options):
+        minutes = options["older_than"]
+        failed = fail_stale_jobs(None if minutes is None else timedelta(minutes=minutes))
+        self.stdout.write(self.style.SUCCESS(f"Marked {failed} stale job(s) FAILED."))
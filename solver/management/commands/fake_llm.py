@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from solver.fake_llm import FakeLLMServer, FixtureStore
+
+
+class Command(BaseCommand):
+    help = (
+        "Serves a local stand-in for the Groq chat-completions API that answers from "
+        "stored runs, with injected latency and errors. Point GROQ_BASE_URL at it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each answer")
+        parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- seconds added to --latency")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+        parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests failing with 429")
+        parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+        parser.add_argument("--fixtures", type=int, default=None, help="Use only the N most recent stored runs")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        store = FixtureStore.from_database(limit=options["fixtures"])
+        server = FakeLLMServer(
+            (options["host"], options["port"]),
+            store,
+            latency=options["latency"],
+            jitter=options["jitter"],
+            error_rate=options["error_rate"],
+            rate_limit_rate=options["rate_limit_rate"],
+            token_delay=options["token_delay"],
+            seed=options["seed"],
+        )
+        host, port = server.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(
+            f"Serving {len(store.fixtures)} fixtures on http://{host}:{port} "
+            f"(set GROQ_BASE_URL=http://{host}:{port})"
+        ), ending="\n")
+        self.stdout.flush()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from solver import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the full-text search index (SQLite FTS5) from the stored problems and attempts, "
+        "e.g. after bulk imports or deletions."
+    )
+
+    def handle(self, *args, **options):
+        if not search.available():
+            raise CommandError("Full-text search needs SQLite (FTS5).")
+        start = time.perf_counter()
+        with transaction.atomic():
+            problems, attempts = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {problems} problems and {attempts} attempts in {time.perf_counter() - start:.1f} s."
+        ))
@@ -0,0 +1,17 @@
+import time
+from django.core.management.base import BaseCommand
+from solver.dedup import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the canonical and structure keys of every stored problem and the similarity "
+        "index over the VERIFIED ones (after upgrading, or changing the canonicalization)."
+    )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total, verified = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {total} problems ({verified} VERIFIED) in {time.perf_counter() - start:.1f} s."
+        ))
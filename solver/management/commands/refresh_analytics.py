@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from solver.analytics import refresh_summary
+from solver.models import CategorySummary
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the analytics summary counters from the stored problems (e.g. after deleting rows)."
+
+    def handle(self, *args, **options):
+        refresh_summary()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {CategorySummary.objects.count()} category summary rows."
+        ))
@@ -0,0 +1,156 @@
+import json
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from solver.analytics import record_status_changes
+from solver.auditor_logic.sandbox import SympySandbox
+from solver.auditor_logic.verifiers import FEEDBACK_PREFIX
+from solver.models import EngineeringProblem, VerificationAttempt
+
+# LLM_status only changes on attempts a deterministic verifier graded: their script's
+# verdict stands in for the Skeptic's, so it moves with code_status
+UPDATED_FIELDS = ["code_status", "is_sympy_error", "code_error_message", "LLM_status"]
+
+# (SymPy passed, Skeptic passed) -> verification_status, as the Auditor grades an attempt
+PROBLEM_STATUS = {
+    (True, True): "VERIFIED",
+    (True, False): "SYMBOLIC_ONLY_PASS",
+    (False, True): "SEMANTIC_ONLY_PASS",
+    (False, False): "BOTH_FAILURE",
+}
+
+
+def verdict(code_status, is_sympy_error):
+    if is_sympy_error:
+        return "ERROR"
+    return "PASS" if code_status else "FAIL"
+
+
+def regrade_problems(problem_ids):
+    """Re-derives each problem's status from its last attempt and moves it between the
+    summary counters; call inside the write. Returns Counter((old, new)) of the changes."""
+    last = VerificationAttempt.objects.filter(problem=OuterRef("pk")).order_by("-id")
+    problems = EngineeringProblem.objects.filter(pk__in=problem_ids).only(
+        "id", "category", "model_name", "verification_status"
+    ).annotate(
+        last_code_status=Subquery(last.values("code_status")[:1]),
+        last_LLM_status=Subquery(last.values("LLM_status")[:1]),
+    )
+    changes = []
+    for problem in problems:
+        if problem.last_code_status is None:
+            continue  # no attempts left to grade it by
+        old_status = problem.verification_status
+        # LLM_status is stored as text ("True" / "False")
+        problem.verification_status = PROBLEM_STATUS[(problem.last_code_status, problem.last_LLM_status == "True")]
+        if problem.verification_status != old_status:
+            changes.append((problem, old_status))
+    if changes:
+        EngineeringProblem.objects.bulk_update([problem for problem, _ in changes], ["verification_status"])
+        record_status_changes(changes)
+    return Counter((old_status, problem.verification_status) for problem, old_status in changes)
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-runs the stored SymPy script of every VerificationAttempt across all cores "
+        "(no LLM calls), writes changed verdicts back, re-grades their problems (status and "
+        "analytics counters) and reports what changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Sandbox processes (default: one per core)")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Attempts loaded and verified per round")
+        parser.add_argument("--timeout", type=float, default=settings.SYMPY_SANDBOX_TIMEOUT, help="Seconds per script")
+        parser.add_argument("--start-id", type=int, default=0, help="Only attempts with a larger id (to resume)")
+        parser.add_argument("--report", default="reverify_report.jsonl", help="Where to write one line per changed verdict")
+        parser.add_argument("--dry-run", action="store_true", help="Report changes without saving them")
+
+    def handle(self, *args, **options):
+        sandbox = SympySandbox(
+            workers=options["workers"],
+            timeout=options["timeout"],
+            cpu_seconds=settings.SYMPY_SANDBOX_CPU_SECONDS,
+            memory_mb=settings.SYMPY_SANDBOX_MEMORY_MB,
+            simplify_budget=settings.SYMPY_SIMPLIFY_BUDGET,
+        )
+        # The script is a section of the stored reply (see VerificationAttempt.sections)
+        attempts = (
+            VerificationAttempt.objects.filter(sections__has_key="sympy_code")
+            .order_by("id")
+            .only("id", "problem_id", *UPDATED_FIELDS, "full_LLM_output", "sections")
+        )
+        transitions = Counter()
+        problem_transitions = Counter()
+        checked = 0
+        last_id = options["start_id"]
+        start = time.perf_counter()
+        self.stdout.write(f"Re-verifying with {sandbox.size} workers, {options['chunk_size']} attempts per round...")
+
+        try:
+            with open(options["report"], "w", encoding="utf-8") as report:
+                while True:
+                    # Keyset pages rather than one long-lived .iterator(): SQLite gives no
+                    # isolation between a cursor and writes on the same connection, and
+                    # a page at a time keeps memory flat however large the table is
+                    chunk = list(attempts.filter(id__gt=last_id)[:options["chunk_size"]].iterator())
+                    if not chunk:
+                        break
+                    last_id = chunk[-1].id
+
+                    results = sandbox.map([attempt.sympy_code for attempt in chunk])
+                    changed = []
+                    for attempt, (passed, message, is_sympy_error, _) in zip(chunk, results):
+                        old = verdict(attempt.code_status, attempt.is_sympy_error)
+                        new = verdict(passed, is_sympy_error)
+                        transitions[(old, new)] += 1
+                        if old == new:
+                            continue
+                        report.write(json.dumps({
+                            "attempt_id": attempt.id,
+                            "problem_id": attempt.problem_id,
+                            "old": old,
+                            "new": new,
+                            "old_message": attempt.code_error_message,
+                            "new_message": message,
+                        }) + "\n")
+                        attempt.code_status = passed
+                        attempt.is_sympy_error = is_sympy_error
+                        attempt.code_error_message = message
+                        if attempt.LLM_feedback.startswith(FEEDBACK_PREFIX):
+                            attempt.LLM_status = passed
+                        changed.append(attempt)
+
+                    if changed and not options["dry_run"]:
+                        with transaction.atomic():
+                            VerificationAttempt.objects.bulk_update(changed, UPDATED_FIELDS)
+                            problem_transitions += regrade_problems({attempt.problem_id for attempt in changed})
+                    checked += len(chunk)
+                    elapsed = time.perf_counter() - start
+                    self.stdout.write(
+                        f"  {checked} checked (up to id {last_id}) | {checked / elapsed:.1f} attempts/s"
+                    )
+        finally:
+            sandbox.close()
+
+        self.report(transitions, problem_transitions, checked, time.perf_counter() - start, options)
+
+    def report(self, transitions, problem_transitions, checked, elapsed, options):
+        changed = sum(count for (old, new), count in transitions.items() if old != new)
+        self.stdout.write("")
+        self.stdout.write(self.style.SUCCESS(
+            f"{checked} attempts re-verified in {elapsed:.1f}s | {changed} verdicts changed"
+            + (" (dry run, nothing saved)" if options["dry_run"] else "")
+        ))
+        for (old, new), count in sorted(transitions.items()):
+            if old != new:
+                self.stdout.write(f"  {old:>5} -> {new:<5} {count:>7}")
+        if problem_transitions:
+            self.stdout.write(f"{sum(problem_transitions.values())} problem statuses changed")
+            for (old, new), count in sorted(problem_transitions.items()):
+                self.stdout.write(f"  {old:>18} -> {new:<18} {count:>7}")
+        if changed:
+            self.stdout.write(f"Details in {options['report']}")
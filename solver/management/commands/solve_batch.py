@@ -0,0 +1,184 @@
+import asyncio
+import csv
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from solver.analytics import percentile
+from solver.auditor_logic import cache
+from solver.services import build_auditor
+from solver.writer import HistoryWriter
+
+
+def problem_key(query, problem_id=None):
+    """Stable identity of a problem in the manifest: its id, or a hash of the query."""
+    if problem_id not in (None, ""):
+        return str(problem_id)
+    return hashlib.sha256(cache.normalize_query(query).encode("utf-8")).hexdigest()[:16]
+
+
+def load_problems(path):
+    """Reads [(key, query), ...] from a JSONL or CSV file.
+
+    JSONL lines are either a JSON string or an object with "query" (or
+    "prompt") and an optional "id". CSV files need a "query"/"prompt" column,
+    otherwise the first column is used; an "id" column is optional.
+    """
+    rows = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            reader = csv.DictReader(f)
+            column = next((c for c in ("query", "prompt") if c in (reader.fieldnames or [])), None)
+            for row in reader:
+                query = row[column] if column else next(iter(row.values()), "")
+                rows.append((row.get("id"), query))
+        else:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    raise CommandError(f"{path}:{number}: not valid JSON")
+                if isinstance(item, str):
+                    rows.append((None, item))
+                else:
+                    rows.append((item.get("id"), item.get("query") or item.get("prompt") or ""))
+
+    problems, seen = [], set()
+    for problem_id, query in rows:
+        query = (query or "").strip()
+        key = problem_key(query, problem_id)
+        if query and key not in seen:
+            seen.add(key)
+            problems.append((key, query))
+    return problems
+
+
+def read_manifest(path):
+    """Keys already stored by an earlier run (a torn last line is ignored)."""
+    done = {}
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                done[entry["key"]] = entry
+    return done
+
+
+class Command(BaseCommand):
+    help = (
+        "Solves a file of problems in-process with N in flight, checkpointing each "
+        "stored result to a manifest so an interrupted run can be resumed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?",
+            help="JSONL or CSV file of problems (default: the study problems in automator.py)",
+        )
+        parser.add_argument("--concurrency", type=int, default=settings.SOLVER_BATCH_CONCURRENCY)
+        parser.add_argument("--manifest", help="Checkpoint file (default: <path>.manifest.jsonl)")
+        parser.add_argument("--no-cache", action="store_true", help="Skip the LLM response cache")
+        parser.add_argument("--flush-every", type=int, default=settings.HISTORY_FLUSH_EVERY)
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1")
+        if options["path"]:
+            path = Path(options["path"])
+            if not path.exists():
+                raise CommandError(f"{path} does not exist")
+            problems = load_problems(path)
+            manifest_path = Path(options["manifest"] or f"{path}.manifest.jsonl")
+        else:
+            from automator import PROBLEMS
+            problems = [(problem_key(query), query) for query in PROBLEMS]
+            manifest_path = Path(options["manifest"] or settings.BASE_DIR / "study.manifest.jsonl")
+
+        done = read_manifest(manifest_path)
+        todo = [(key, query) for key, query in problems if key not in done]
+        self.stdout.write(
+            f"{len(problems)} problems | {len(problems) - len(todo)} already stored in "
+            f"{manifest_path.name} | {len(todo)} to solve with concurrency {options['concurrency']}"
+        )
+        if not todo:
+            return
+
+        try:
+            auditor = build_auditor()
+        except Exception as e:
+            raise CommandError(str(e))
+
+        manifest_lock = threading.Lock()
+        latencies = {}
+
+        def checkpoint(stored):
+            # Called by the writer once the rows are committed, so the manifest
+            # never lists a problem that is not in the database
+            with manifest_lock, open(manifest_path, "a", encoding="utf-8") as f:
+                for key, problem in stored:
+                    f.write(json.dumps({
+                        "key": key,
+                        "problem_id": problem.id,
+                        "status": problem.verification_status,
+                        "latency_s": latencies[key],
+                    }) + "\n")
+
+        start = time.perf_counter()
+        with HistoryWriter(flush_every=options["flush_every"], on_flush=checkpoint) as writer:
+            with cache.bypass() if options["no_cache"] else nullcontext():
+                outcomes = asyncio.run(self.solve_all(auditor, todo, options["concurrency"], writer, latencies))
+        elapsed = time.perf_counter() - start
+
+        self.report(outcomes, latencies, elapsed)
+
+    async def solve_all(self, auditor, todo, concurrency, writer, latencies):
+        semaphore = asyncio.Semaphore(concurrency)
+        finished = 0
+
+        async def solve(key, query):
+            nonlocal finished
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    history = await auditor.aprocess_query(query)
+                except Exception as e:
+                    status, error = "ERROR", str(e) or type(e).__name__
+                else:
+                    status, error = history[-1]["final_status"], None
+                latencies[key] = round(time.perf_counter() - started, 3)
+                if error is None:
+                    # May flush (and hit the database), so keep it off the loop
+                    await asyncio.to_thread(writer.add, query, history, key)
+
+            finished += 1
+            marker = self.style.ERROR(f"ERROR: {error}") if error else status
+            self.stdout.write(f"[{finished}/{len(todo)}] {marker} ({latencies[key]:.2f}s) {query[:50]}")
+            return status
+
+        return await asyncio.gather(*(solve(key, query) for key, query in todo))
+
+    def report(self, outcomes, latencies, elapsed):
+        values = sorted(latencies.values())
+        counts = Counter(outcomes)
+        self.stdout.write("")
+        self.stdout.write(self.style.SUCCESS(
+            f"Solved {len(outcomes)} problems in {elapsed:.1f}s "
+            f"({len(outcomes) / elapsed * 60:.1f} problems/min)"
+        ))
+        self.stdout.write(
+            "Latency per problem: "
+            + " | ".join(f"p{p} {percentile(values, p):.2f}s" for p in (50, 95, 99))
+            + f" | max {values[-1]:.2f}s"
+        )
+        for status, count in counts.most_common():
+            self.stdout.write(f"  {status:<20} {count:>5}  ({count / len(outcomes) * 100:.1f}%)")
@@ -0,0 +1,25 @@
+import sys
+import time
+from django.core.management.base import BaseCommand
+from solver.warmup import warm_up
+
+# Heavy dependencies whose import warm_up() moves off the request path
+WATCHED_MODULES = ("sympy", "groq", "httpx", "numpy")
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the solver warm-up that WSGI/ASGI processes do at startup and prints how long "
+        "each step took, e.g. to check a deploy or measure cold-start cost."
+    )
+
+    def handle(self, *args, **options):
+        loaded = [name for name in WATCHED_MODULES if name in sys.modules]
+        self.stdout.write(f"Already imported before warm-up: {', '.join(loaded) or 'none'}")
+        start = time.perf_counter()
+        timings = warm_up()
+        for step, ms in timings.items():
+            self.stdout.write(f"  {step:<10} {ms:>8.1f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"Warm-up finished in {(time.perf_counter() - start) * 1000:.0f} ms."
+        ))
@@ -0,0 +1,50 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from .auditor_logic.metrics import HTTP_IN_FLIGHT, HTTP_SECONDS
+
+
+class MetricsMiddleware:
+    """Tracks in-flight requests and per-view response times for /metrics.
+
+    Works under WSGI and ASGI without forcing async views through a thread.
+    A streamed response counts as done once its headers are ready.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self.finish(request, status, start)
+
+    async def __acall__(self, request):
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self.finish(request, status, start)
+
+    @staticmethod
+    def finish(request, status, start):
+        HTTP_IN_FLIGHT.dec()
+        match = getattr(request, "resolver_match", None)
+        view = match.url_name if match and match.url_name else "unmatched"
+        HTTP_SECONDS.observe(time.perf_counter() - start, view=view, status=status)
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver', '0007_verificationattempt_is_sympy_error'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolveJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.TextField()),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='QUEUED', max_length=20)),
+                ('stage', models.CharField(default='', max_length=50)),
+                ('current_attempt', models.IntegerField(default=0)),
+                ('history', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('problem', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='solver.engineeringproblem')),
+            ],
+        ),
+    ]
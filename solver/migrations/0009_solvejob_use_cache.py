@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver', '0008_solvejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solvejob',
+            name='use_cache',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:18
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def build_summary(apps, schema_editor):
+    # Seed the counters from the problems stored before this migration
+    EngineeringProblem = apps.get_model('solver', 'EngineeringProblem')
+    CategorySummary = apps.get_model('solver', 'CategorySummary')
+    statuses = {
+        'verified': 'VERIFIED',
+        'symbolic_only': 'SYMBOLIC_ONLY_PASS',
+        'semantic_only': 'SEMANTIC_ONLY_PASS',
+        'both_failure': 'BOTH_FAILURE',
+    }
+    rows = EngineeringProblem.objects.values('category', 'model_name').annotate(
+        total=Count('id'),
+        attempts_sum=Sum('total_attempts'),
+        **{field: Count('id', filter=Q(verification_status=status)) for field, status in statuses.items()},
+    ).order_by()
+    CategorySummary.objects.bulk_create(
+        [CategorySummary(**{**row, 'attempts_sum': row['attempts_sum'] or 0}) for row in rows]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver', '0009_solvejob_use_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='engineeringproblem',
+            name='model_name',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.CreateModel(
+            name='CategorySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=100)),
+                ('model_name', models.CharField(blank=True, default='', max_length=100)),
+                ('total', models.IntegerField(default=0)),
+                ('verified', models.IntegerField(default=0)),
+                ('symbolic_only', models.IntegerField(default=0)),
+                ('semantic_only', models.IntegerField(default=0)),
+                ('both_failure', models.IntegerField(default=0)),
+                ('attempts_sum', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('category', 'model_name'), name='unique_category_summary')],
+            },
+        ),
+        migrations.RunPython(build_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver', '0010_category_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='engineeringproblem',
+            name='db_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='engineeringproblem',
+            name='solve_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='engineeringproblem',
+            name='total_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='verificationattempt',
+            name='audit_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='verificationattempt',
+            name='check_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='verificationattempt',
+            name='completion_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='verificationattempt',
+            name='prompt_tokens',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='verificationattempt',
+            name='propose_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='verificationattempt',
+            name='proposer_key',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='verificationattempt',
+            name='recovery',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='verificationattempt',
+            name='skeptic_key',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='verificationattempt',
+            name='stop_reason',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='verificationattempt',
+            name='sympy_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
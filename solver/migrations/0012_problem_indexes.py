@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver', '0011_attempt_costs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='engineeringproblem',
+            index=models.Index(fields=['-created_at', '-id'], name='problem_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='engineeringproblem',
+            index=models.Index(fields=['verification_status', '-created_at', '-id'], name='problem_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='engineeringproblem',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='problem_category_created_idx'),
+        ),
+    ]
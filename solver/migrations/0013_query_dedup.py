@@ -0,0 +1,62 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+from solver.auditor_logic import canonical
+
+
+def index_problems(apps, schema_editor):
+    # Text keys for every stored problem and LSH buckets for the VERIFIED ones;
+    # structure keys need SymPy and are left to "manage.py rebuild_similarity_index"
+    EngineeringProblem = apps.get_model('solver', 'EngineeringProblem')
+    SimilarityBand = apps.get_model('solver', 'SimilarityBand')
+    problems = list(EngineeringProblem.objects.only('id', 'prompt', 'verification_status'))
+    for problem in problems:
+        problem.canonical_key = canonical.text_key(problem.prompt)
+    EngineeringProblem.objects.bulk_update(problems, ['canonical_key'], batch_size=500)
+    SimilarityBand.objects.bulk_create(
+        [
+            SimilarityBand(problem_id=problem.id, band=band, bucket=bucket)
+            for problem in problems if problem.verification_status == 'VERIFIED'
+            for band, bucket in canonical.bands(canonical.minhash(canonical.shingles(problem.prompt)))
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver', '0012_problem_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='engineeringproblem',
+            name='canonical_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='engineeringproblem',
+            name='seeded_from',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='seeded', to='solver.engineeringproblem'),
+        ),
+        migrations.AddField(
+            model_name='engineeringproblem',
+            name='structure_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='SimilarityBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.SmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('problem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarity_bands', to='solver.engineeringproblem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band', 'bucket'], name='similarity_bucket_idx')],
+            },
+        ),
+        migrations.RunPython(index_problems, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:20
+
+from django.db import migrations
+
+TABLES = {
+    'solver_problem_fts': ('solver_engineeringproblem', {'prompt': 'prompt', 'final_solution': 'final_solution'}),
+    'solver_attempt_fts': ('solver_verificationattempt', {
+        'feedback': 'LLM_feedback', 'corrections': 'LLM_corrections', 'affirmation': 'LLM_affirmation',
+    }),
+}
+
+
+def create_index(apps, schema_editor):
+    # FTS5 is SQLite-only; on another backend search is simply unavailable
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, (source, columns) in TABLES.items():
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {table} USING fts5({', '.join(columns)}, tokenize = 'porter unicode61')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {table} (rowid, {', '.join(columns)}) SELECT id, {', '.join(columns.values())} FROM {source}"
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table in TABLES:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver', '0013_query_dedup'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:19
+
+import json
+import solver.fields
+from django.db import migrations, models
+from solver.fields import locate, section
+
+SECTIONS = ('sympy_code', 'LLM_feedback', 'LLM_affirmation', 'LLM_corrections')
+PAGE_SIZE = 1000
+
+
+def _pages(model, fields):
+    # Keyset pages, so memory stays flat and the UPDATEs never race an open cursor
+    last = 0
+    while True:
+        page = list(model.objects.filter(pk__gt=last).order_by('pk').only('pk', *fields)[:PAGE_SIZE])
+        if not page:
+            return
+        yield page
+        last = page[-1].pk
+
+
+def compress_text(apps, schema_editor):
+    # Rewrites the stored text through the compressed fields and replaces each attempt's
+    # parsed sections by their offsets into full_LLM_output
+    VerificationAttempt = apps.get_model('solver', 'VerificationAttempt')
+    for page in _pages(VerificationAttempt, ['full_LLM_output', *SECTIONS]):
+        for attempt in page:
+            attempt.sections = {
+                name: locate(attempt.full_LLM_output, getattr(attempt, name))
+                for name in SECTIONS if getattr(attempt, name)
+            }
+        VerificationAttempt.objects.bulk_update(page, ['full_LLM_output', 'sections'])
+    for model_name, field in (('EngineeringProblem', 'final_solution'), ('SolveJob', 'history')):
+        model = apps.get_model('solver', model_name)
+        for page in _pages(model, [field]):
+            model.objects.bulk_update(page, [field])
+
+
+def _write_plain(schema_editor, model, field, rows):
+    # Plain text, written past the compressed field, for the column to turn back into TEXT
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {quote(model._meta.db_table)} SET {quote(model._meta.get_field(field).column)} = %s '
+            f'WHERE {quote(model._meta.pk.column)} = %s',
+            rows,
+        )
+
+
+def expand_text(apps, schema_editor):
+    VerificationAttempt = apps.get_model('solver', 'VerificationAttempt')
+    for page in _pages(VerificationAttempt, ['full_LLM_output', 'sections']):
+        for attempt in page:
+            for name in SECTIONS:
+                setattr(attempt, name, section(attempt.full_LLM_output, attempt.sections.get(name)))
+        VerificationAttempt.objects.bulk_update(page, SECTIONS)
+        _write_plain(schema_editor, VerificationAttempt, 'full_LLM_output',
+                     [(attempt.full_LLM_output, attempt.pk) for attempt in page])
+    EngineeringProblem = apps.get_model('solver', 'EngineeringProblem')
+    for page in _pages(EngineeringProblem, ['final_solution']):
+        _write_plain(schema_editor, EngineeringProblem, 'final_solution',
+                     [(problem.final_solution, problem.pk) for problem in page])
+    SolveJob = apps.get_model('solver', 'SolveJob')
+    for page in _pages(SolveJob, ['history']):
+        _write_plain(schema_editor, SolveJob, 'history',
+                     [(json.dumps(job.history), job.pk) for job in page if job.history is not None])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver', '0014_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='verificationattempt',
+            name='sections',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='engineeringproblem',
+            name='final_solution',
+            field=solver.fields.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name='solvejob',
+            name='history',
+            field=solver.fields.CompressedJSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='verificationattempt',
+            name='full_LLM_output',
+            field=solver.fields.CompressedTextField(default=''),
+        ),
+        migrations.RunPython(compress_text, expand_text),
+        migrations.RemoveField(
+            model_name='verificationattempt',
+            name='LLM_affirmation',
+        ),
+        migrations.RemoveField(
+            model_name='verificationattempt',
+            name='LLM_corrections',
+        ),
+        migrations.RemoveField(
+            model_name='verificationattempt',
+            name='LLM_feedback',
+        ),
+        migrations.RemoveField(
+            model_name='verificationattempt',
+            name='sympy_code',
+        ),
+    ]
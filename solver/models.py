@@ -1,4 +1,5 @@
 from django.db import models
+from .fields import CompressedJSONField, CompressedTextField, locate, section
 
 class Proof(models.Model):
     status = models.CharField(max_length=20)     # e.g., 'verified', 'failed'
@@ -15,30 +16,146 @@ class Proof(models.Model):
 class EngineeringProblem(models.Model):
     prompt = models.TextField()
     category = models.CharField(max_length=100, default="General")
-    final_solution = models.TextField()
+    final_solution = CompressedTextField()
     verification_status = models.CharField(max_length=50)
     total_attempts = models.IntegerField()
+    model_name = models.CharField(max_length=100, default="", blank=True)   # Proposer model that produced the solution
+    # Cost of the whole solve; null on rows stored before it was recorded
+    solve_ms = models.FloatField(null=True, blank=True)         # Wall time of the Auditor loop
+    db_ms = models.FloatField(null=True, blank=True)            # Time spent storing it (a batch's share)
+    total_tokens = models.IntegerField(null=True, blank=True)   # LLM tokens over all attempts
+    # Lookup keys for answering a repeated problem from its VERIFIED row (solver.dedup)
+    canonical_key = models.CharField(max_length=64, default="", blank=True, db_index=True)  # Formatting-insensitive prompt
+    structure_key = models.CharField(max_length=64, default="", blank=True, db_index=True)  # Problem type + parsed operands
+    # The VERIFIED problem whose solution seeded the first proposal, if any
+    seeded_from = models.ForeignKey("self", null=True, blank=True, on_delete=models.SET_NULL, related_name="seeded")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Newest-first keyset order of the history API, and the analytics date range,
+            # on their own or behind an equality filter on status or category
+            models.Index(fields=["-created_at", "-id"], name="problem_created_idx"),
+            models.Index(fields=["verification_status", "-created_at", "-id"], name="problem_status_created_idx"),
+            models.Index(fields=["category", "-created_at", "-id"], name="problem_category_created_idx"),
+        ]
+
     def __str__(self):
         return f"Engineering Problem: {self.prompt[:30]}..."
 
+def _section(name):
+    """A parsed section of an attempt's full_LLM_output, kept in its `sections`.
+
+    Set full_LLM_output first: the section is looked up in it when assigned.
+    """
+    def get(self):
+        return section(self.full_LLM_output, self.sections.get(name))
+
+    def set(self, value):
+        if value:
+            self.sections[name] = locate(self.full_LLM_output, value)
+        else:
+            self.sections.pop(name, None)
+
+    return property(get, set)
+
 class VerificationAttempt(models.Model):
     problem = models.ForeignKey(EngineeringProblem, on_delete=models.CASCADE, related_name='attempts')
 
-    sympy_code = models.TextField(default="")
     is_sympy_error = models.BooleanField(default=False)
     code_status = models.BooleanField(default=False)
     code_error_message = models.TextField(default="")
 
     LLM_status = models.TextField(default="")
-    LLM_feedback = models.TextField(default="")
-    LLM_affirmation = models.TextField(default="")
-    LLM_corrections = models.TextField(default="")
-    full_LLM_output = models.TextField(default="")
-    
+    full_LLM_output = CompressedTextField(default="")   # The Skeptic's reply, as received
+    # Where the parsed sections (sympy_code, LLM_feedback, ... below) are: [start, end] in
+    # full_LLM_output, or their own text when they are not a slice of it (a verifier's
+    # message, a script taken out of a code fence); empty ones are left out
+    sections = models.JSONField(default=dict, blank=True)
+
+    # Per-stage cost (ms, tokens) and how the attempt came about; null on older rows
+    propose_ms = models.FloatField(null=True, blank=True)
+    audit_ms = models.FloatField(null=True, blank=True)         # Skeptic call (0 when a deterministic verifier ran)
+    sympy_ms = models.FloatField(null=True, blank=True)         # Script execution, including the check below
+    check_ms = models.FloatField(null=True, blank=True)         # Deciding the relation (numeric/canonical/simplify)
+    prompt_tokens = models.IntegerField(null=True, blank=True)
+    completion_tokens = models.IntegerField(null=True, blank=True)
+    proposer_key = models.CharField(max_length=50, default="", blank=True)
+    skeptic_key = models.CharField(max_length=50, default="", blank=True)
+    recovery = models.CharField(max_length=20, default="", blank=True)      # initial, reaudit or repropose
+    stop_reason = models.CharField(max_length=20, default="", blank=True)   # Why retries ended early, if they did
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    sympy_code = _section("sympy_code")
+    LLM_feedback = _section("LLM_feedback")
+    LLM_affirmation = _section("LLM_affirmation")
+    LLM_corrections = _section("LLM_corrections")
+
+    def __str__(self):
+        return f"Attempt for Problem ID: {self.problem.id} at {self.created_at}"
+
+class CategorySummary(models.Model):
+    """Running per-(category, model) counters behind the unfiltered analytics dashboard.
+
+    Kept current by solver.analytics.record_problems on every write, so the
+    dashboard reads a handful of rows instead of scanning EngineeringProblem.
+    """
+    category = models.CharField(max_length=100)
+    model_name = models.CharField(max_length=100, default="", blank=True)
+    total = models.IntegerField(default=0)
+    verified = models.IntegerField(default=0)
+    symbolic_only = models.IntegerField(default=0)
+    semantic_only = models.IntegerField(default=0)
+    both_failure = models.IntegerField(default=0)
+    attempts_sum = models.IntegerField(default=0)    # avg. attempts = attempts_sum / total
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["category", "model_name"], name="unique_category_summary"),
+        ]
+
+    def __str__(self):
+        return f"{self.category} [{self.model_name or 'unknown'}]: {self.total}"
+
+class SimilarityBand(models.Model):
+    """One MinHash LSH bucket of a VERIFIED problem's prompt.
+
+    Written by solver.dedup alongside the problem; the problems sharing a
+    (band, bucket) pair with a new query are its near-duplicate candidates.
+    """
+    problem = models.ForeignKey(EngineeringProblem, on_delete=models.CASCADE, related_name='similarity_bands')
+    band = models.SmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["band", "bucket"], name="similarity_bucket_idx"),
+        ]
+
+    def __str__(self):
+        return f"Band {self.band} of Problem ID: {self.problem_id}"
+
+class SolveJob(models.Model):
+    """A /solve/ request queued for the background worker pool."""
+    STATUS_CHOICES = [
+        ("QUEUED", "Queued"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    ]
 
+    query = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="QUEUED")
+    stage = models.CharField(max_length=50, default="")     # e.g., 'proposing', 'auditing', 'verifying'
+    current_attempt = models.IntegerField(default=0)
+    history = CompressedJSONField(null=True, blank=True)    # The Auditor history once the run finishes
+    error = models.TextField(default="")
+    use_cache = models.BooleanField(default=True)           # False skips the response cache for this run
+    problem = models.ForeignKey(EngineeringProblem, null=True, blank=True, on_delete=models.SET_NULL, related_name='jobs')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"Attempt for Problem ID: {self.problem.id} at {self.created_at}"
\ No newline at end of file
+        return f"Job {self.id} [{self.status}]: {self.query[:30]}..."
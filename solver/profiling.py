@@ -0,0 +1,70 @@
+import cProfile
+import functools
+import io
+import pstats
+import re
+import time
+import uuid
+from pathlib import Path
+from django.conf import settings
+from django.urls import reverse
+
+# Stored profile names, as produced by profile_request (also validates download paths)
+PROFILE_NAME = re.compile(r"^\d{8}-\d{6}-[a-z_]+-[0-9a-f]{8}\.prof$")
+
+
+def profiling_requested(request):
+    """Staff asked for a profile with ?profile=1 or an X-Profile: 1 header."""
+    flag = request.GET.get("profile") or request.headers.get("X-Profile")
+    user = getattr(request, "user", None)
+    return flag in ("1", "true") and user is not None and user.is_staff
+
+
+def profile_dir():
+    path = Path(settings.PROFILE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _prune(directory):
+    # Keep the newest PROFILE_KEEP files
+    files = sorted(directory.glob("*.prof"), key=lambda f: f.name, reverse=True)
+    for stale in files[settings.PROFILE_KEEP:]:
+        stale.unlink(missing_ok=True)
+
+
+def profile_request(view):
+    """Runs a sync view under cProfile when profiling_requested(request).
+
+    The pstats dump is saved to PROFILE_DIR; the response carries its
+    download URL in X-Profile-URL. Unflagged requests pay nothing but the check.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not profiling_requested(request):
+            return view(request, *args, **kwargs)
+        profiler = cProfile.Profile()
+        response = profiler.runcall(view, request, *args, **kwargs)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{view.__name__}-{uuid.uuid4().hex[:8]}.prof"
+        directory = profile_dir()
+        profiler.dump_stats(directory / name)
+        _prune(directory)
+        response["X-Profile-URL"] = reverse("profile_download", args=[name])
+        return response
+
+    return wrapper
+
+
+def list_profiles():
+    return [
+        {"name": f.name, "bytes": f.stat().st_size, "url": reverse("profile_download", args=[f.name])}
+        for f in sorted(profile_dir().glob("*.prof"), key=lambda f: f.name, reverse=True)
+        if PROFILE_NAME.match(f.name)
+    ]
+
+
+def profile_summary(path, limit=40):
+    """Top functions by cumulative time, as pstats prints them."""
+    out = io.StringIO()
+    pstats.Stats(str(path), stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
@@ -0,0 +1,195 @@
+"""Full-text search over stored problems and attempts (SQLite FTS5).
+
+Two FTS5 tables hold a copy of the searchable text: solver_problem_fts
+(prompt, final_solution; rowid = problem id) and solver_attempt_fts (the
+Skeptic's feedback, corrections and affirmation; rowid = attempt id).
+save_histories indexes new problems in its write transaction and rebuild()
+repopulates both tables from scratch. The text is stored compressed (and
+an attempt's sections as offsets into its reply), so it is read through
+the models and inserted from Python. Rows of deleted problems stay in the
+index until the next rebuild, but searches join with the live tables and
+never return them.
+"""
+import html
+import re
+from django.db import connection
+from solver.models import EngineeringProblem, VerificationAttempt
+
+PROBLEM_TABLE = "solver_problem_fts"
+ATTEMPT_TABLE = "solver_attempt_fts"
+# FTS column -> model attribute, in table order
+PROBLEM_COLUMNS = {"prompt": "prompt", "final_solution": "final_solution"}
+ATTEMPT_COLUMNS = {"feedback": "LLM_feedback", "corrections": "LLM_corrections", "affirmation": "LLM_affirmation"}
+# FTS table -> (model, columns, the model fields those attributes are read from)
+SOURCES = {
+    PROBLEM_TABLE: (EngineeringProblem, PROBLEM_COLUMNS, ("prompt", "final_solution")),
+    ATTEMPT_TABLE: (VerificationAttempt, ATTEMPT_COLUMNS, ("full_LLM_output", "sections")),
+}
+REBUILD_PAGE_SIZE = 1000
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+SNIPPET_TOKENS = 16
+
+# snippet() marks matches with these; they are swapped for <mark> after HTML escaping
+_OPEN, _CLOSE = "\x02", "\x03"
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def available():
+    return connection.vendor == "sqlite"
+
+
+def match_expression(text):
+    """Turns a search box entry into an FTS5 query.
+
+    Words must all match, "quoted text" is a phrase, a trailing * matches a
+    prefix and OR between two terms accepts either. Anything else, FTS5
+    operators and LaTeX included, is searched for literally. ValueError when
+    nothing searchable is left.
+    """
+    parts = []
+    for phrase, word in _TERM.findall(text or ""):
+        if word == "OR":
+            if parts and parts[-1] != "OR":
+                parts.append("OR")
+            continue
+        prefix = not phrase and word.endswith("*")
+        terms = (phrase or word.rstrip("*")).replace('"', " ")
+        if re.search(r"\w", terms):
+            parts.append(f'"{terms}"' + ("*" if prefix else ""))
+    while parts and parts[-1] == "OR":
+        parts.pop()
+    if not parts:
+        raise ValueError("Nothing to search for")
+    return " ".join(parts)
+
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def _insert(cursor, table, rows):
+    _, columns, _ = SOURCES[table]
+    cursor.executemany(
+        f"INSERT INTO {table} (rowid, {', '.join(columns)}) VALUES (%s, {_placeholders(columns)})",
+        [(row.pk, *(getattr(row, attribute) for attribute in columns.values())) for row in rows],
+    )
+
+
+def index_problems(problem_ids):
+    """(Re)indexes the given problems and all their attempts, from what is stored now."""
+    if not available() or not problem_ids:
+        return
+    ids = list(problem_ids)
+    marks = _placeholders(ids)
+    problems = EngineeringProblem.objects.filter(pk__in=ids).only("pk", *SOURCES[PROBLEM_TABLE][2])
+    attempts = VerificationAttempt.objects.filter(problem_id__in=ids).only("pk", *SOURCES[ATTEMPT_TABLE][2])
+    with connection.cursor() as cursor:
+        # A deleted row's id can come back; its stale index row must not collide
+        cursor.execute(f"DELETE FROM {PROBLEM_TABLE} WHERE rowid IN ({marks})", ids)
+        cursor.execute(
+            f"DELETE FROM {ATTEMPT_TABLE} WHERE rowid IN "
+            f"(SELECT id FROM solver_verificationattempt WHERE problem_id IN ({marks}))",
+            ids,
+        )
+        _insert(cursor, PROBLEM_TABLE, problems)
+        _insert(cursor, ATTEMPT_TABLE, attempts)
+
+
+def rebuild():
+    """Empties and refills both indexes from the stored rows, then merges their b-trees.
+
+    Returns (problems, attempts) indexed.
+    """
+    counts = []
+    with connection.cursor() as cursor:
+        for table, (model, _, fields) in SOURCES.items():
+            cursor.execute(f"DELETE FROM {table}")
+            count = last = 0
+            rows = model.objects.order_by("pk").only("pk", *fields)
+            while page := list(rows.filter(pk__gt=last)[:REBUILD_PAGE_SIZE]):
+                _insert(cursor, table, page)
+                count += len(page)
+                last = page[-1].pk
+            counts.append(count)
+            cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+    return tuple(counts)
+
+
+def _highlight(snippet):
+    return html.escape(snippet).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+def _ranked(table, columns, match, joins, where, params, limit, offset):
+    """Rows `offset` to `offset + limit` of `table` for `match`, best BM25 first, as
+    (rowid, extra columns..., {column: snippet}).
+
+    Every match is scored and the page cut in the same FTS5 query; snippets
+    are built afterwards for the rows on the page, not for every match.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {table}.rowid, {joins[0]} FROM {table} {joins[1]} "
+            f"WHERE {table} MATCH %s {where} ORDER BY bm25({table}) LIMIT %s OFFSET %s",
+            [match, *params, limit, offset],
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return []
+        snippets = ", ".join(
+            f"snippet({table}, {i}, %s, %s, %s, {SNIPPET_TOKENS})" for i in range(len(columns))
+        )
+        ids = [row[0] for row in rows]
+        cursor.execute(
+            f"SELECT rowid, {snippets} FROM {table} WHERE {table} MATCH %s AND rowid IN ({_placeholders(ids)})",
+            [*[_OPEN, _CLOSE, "…"] * len(columns), match, *ids],
+        )
+        # Only the columns that actually matched, i.e. whose snippet carries a mark
+        matched = {
+            rowid: {column: _highlight(text) for column, text in zip(columns, texts) if _OPEN in text}
+            for rowid, *texts in cursor.fetchall()
+        }
+    return [(*row, matched.get(row[0], {})) for row in rows]
+
+
+def search(text, status=None, category=None, limit=DEFAULT_LIMIT, offset=0):
+    """Best-matching problems and attempts for a search box entry, each list ranked by BM25.
+
+    Snippets are HTML-escaped with the matches wrapped in <mark>. status and
+    category filter on the (attempt's) problem; offset skips that many hits
+    of each list, for the next page. ValueError for an empty query.
+    """
+    match = match_expression(text)
+    where, params = "", []
+    if status:
+        where += " AND p.verification_status = %s"
+        params.append(status)
+    if category:
+        where += " AND p.category = %s"
+        params.append(category)
+
+    problems = _ranked(
+        PROBLEM_TABLE, PROBLEM_COLUMNS, match,
+        ("p.verification_status, p.category",
+         f"JOIN solver_engineeringproblem p ON p.id = {PROBLEM_TABLE}.rowid"),
+        where, params, limit, offset,
+    )
+    attempts = _ranked(
+        ATTEMPT_TABLE, ATTEMPT_COLUMNS, match,
+        ("a.problem_id, p.prompt, p.verification_status, p.category",
+         f"JOIN solver_verificationattempt a ON a.id = {ATTEMPT_TABLE}.rowid "
+         "JOIN solver_engineeringproblem p ON p.id = a.problem_id"),
+        where, params, limit, offset,
+    )
+    return {
+        "problems": [
+            {"id": pid, "verification_status": problem_status, "category": problem_category, "snippets": snippets}
+            for pid, problem_status, problem_category, snippets in problems
+        ],
+        "attempts": [
+            {"id": aid, "problem_id": pid, "prompt": prompt, "verification_status": problem_status,
+             "category": problem_category, "snippets": snippets}
+            for aid, pid, prompt, problem_status, problem_category, snippets in attempts
+        ],
+    }
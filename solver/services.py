@@ -0,0 +1,366 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from django.conf import settings
+from django.db import connection, transaction
+from solver import dedup, search
+from solver.analytics import record_problems
+from solver.models import EngineeringProblem, VerificationAttempt
+from .auditor_logic import cache
+from .auditor_logic.metrics import REUSED_SOLVES, SEEDED_SOLVES, SOLVE_SECONDS, SOLVES
+from .auditor_logic.retry_policy import RetryPolicies
+
+# The agents, the Groq SDK and SymPy are imported inside the builders below, so
+# importing this module (every view does) stays cheap; solver workers load them
+# up front with solver.warmup.warm_up().
+
+API_KEY_PATTERN = re.compile(r"^GROQ_API_KEY(\d+)$")
+
+_key_pool = None
+_lock = threading.Lock()
+_client_registry = None
+_response_cache = None
+_sandbox = None
+_event_loop = None
+
+
+def configured_api_keys():
+    """Returns {"GROQ_API_KEY1": secret, ...} for every numbered key set in the environment."""
+    names = sorted(
+        (name for name in os.environ if API_KEY_PATTERN.match(name) and os.environ[name]),
+        key=lambda name: int(API_KEY_PATTERN.match(name).group(1)),
+    )
+    return {name: os.environ[name] for name in names}
+
+
+def get_key_pool():
+    """Returns the process-wide KeyPool shared by every Proposer and Skeptic."""
+    from .auditor_logic.key_pool import KeyPool
+
+    global _key_pool
+    with _lock:
+        if _key_pool is None:
+            keys = configured_api_keys()
+            if not keys:
+                raise ValueError("No GROQ_API_KEY<n> found in .env file")
+            _key_pool = KeyPool(
+                keys,
+                rpm=settings.GROQ_KEY_RPM,
+                tpm=settings.GROQ_KEY_TPM,
+                max_wait=settings.GROQ_KEY_MAX_WAIT,
+            )
+        return _key_pool
+
+
+def get_client_registry():
+    """Returns the process-wide Groq clients and their pooled HTTP connections."""
+    from .auditor_logic.clients import ClientRegistry
+
+    global _client_registry
+    with _lock:
+        if _client_registry is None:
+            _client_registry = ClientRegistry(
+                base_url=os.getenv("GROQ_BASE_URL") or None,
+                max_connections=settings.GROQ_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GROQ_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.GROQ_HTTP_KEEPALIVE_EXPIRY,
+                timeout=settings.GROQ_HTTP_TIMEOUT,
+            )
+        return _client_registry
+
+
+def get_response_cache():
+    """Returns the process-wide Proposer/Skeptic response cache (None when disabled)."""
+    global _response_cache
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    with _lock:
+        if _response_cache is None:
+            _response_cache = cache.ResponseCache(
+                settings.LLM_CACHE_PATH,
+                ttl=settings.LLM_CACHE_TTL,
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                evict_every=settings.LLM_CACHE_EVICT_EVERY,
+            )
+        return _response_cache
+
+
+def get_event_loop():
+    """Returns the process-wide event loop that runs speculative solves for sync callers.
+
+    It runs forever in a daemon thread. ClientRegistry keeps one set of async
+    clients per loop, so a loop per solve would build (and leak) a new set
+    every time.
+    """
+    global _event_loop
+    with _lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(target=_event_loop.run_forever, name="solver-event-loop", daemon=True).start()
+        return _event_loop
+
+
+def get_sandbox():
+    """Returns the process-wide SymPy worker pool (None when disabled)."""
+    global _sandbox
+    if not settings.SYMPY_SANDBOX_ENABLED:
+        return None
+    from .auditor_logic.sandbox import SympySandbox
+
+    with _lock:
+        if _sandbox is None:
+            _sandbox = SympySandbox(
+                workers=settings.SYMPY_SANDBOX_WORKERS,
+                timeout=settings.SYMPY_SANDBOX_TIMEOUT,
+                cpu_seconds=settings.SYMPY_SANDBOX_CPU_SECONDS,
+                memory_mb=settings.SYMPY_SANDBOX_MEMORY_MB,
+                simplify_budget=settings.SYMPY_SIMPLIFY_BUDGET,
+            )
+        return _sandbox
+
+
+def get_retry_policies():
+    """Retry policies from settings: the defaults plus per-category overrides."""
+    return RetryPolicies.from_config(
+        settings.RETRY_POLICY_OVERRIDES,
+        on_script_error=settings.RETRY_ON_SCRIPT_ERROR,
+        on_rejection=settings.RETRY_ON_REJECTION,
+        max_attempts=settings.RETRY_MAX_ATTEMPTS,
+        max_tokens=settings.RETRY_MAX_TOKENS or None,
+        max_seconds=settings.RETRY_MAX_SECONDS or None,
+    )
+
+
+def build_auditor():
+    """Builds a Proposer/Skeptic/Auditor trio on the shared key pool, clients and cache."""
+    from .auditor_logic.auditor import Auditor
+    from .auditor_logic.proposer import Proposer
+    from .auditor_logic.skeptic import Skeptic
+
+    key_pool = get_key_pool()
+    clients = get_client_registry()
+    response_cache = get_response_cache()
+    proposer = Proposer(key_pool=key_pool, clients=clients, cache=response_cache)
+    skeptic = Skeptic(key_pool=key_pool, clients=clients, cache=response_cache)
+    return Auditor(
+        proposer, skeptic, max_attempts=settings.RETRY_MAX_ATTEMPTS,
+        sandbox=get_sandbox(), simplify_budget=settings.SYMPY_SIMPLIFY_BUDGET,
+        policies=get_retry_policies(), use_verifiers=settings.DETERMINISTIC_VERIFIERS_ENABLED,
+        speculative_candidates=settings.SPECULATIVE_CANDIDATES,
+        speculative_temperatures=settings.SPECULATIVE_TEMPERATURES,
+        speculative_extra_calls=settings.SPECULATIVE_MAX_EXTRA_CALLS,
+        stream_audits=settings.SKEPTIC_STREAMING, early_stop=settings.SKEPTIC_EARLY_STOP,
+    )
+
+
+def history_from_problem(problem):
+    """Rebuilds an Auditor-style history from a stored problem and its attempts.
+
+    Only the final proposal is stored, so earlier attempts carry an empty
+    proposed_solution.
+    """
+    attempts = list(problem.attempts.order_by("id"))
+    history = []
+    for number, attempt in enumerate(attempts, start=1):
+        is_last = number == len(attempts)
+        history.append({
+            "attempt": number,
+            "category": problem.category,
+            "error_category": "",
+            "symbolic_passed": attempt.code_status,
+            "semantic_status": attempt.LLM_status == "True",
+            "proposed_solution": problem.final_solution if is_last else "",
+            "code": attempt.sympy_code,
+            "affirmation": attempt.LLM_affirmation,
+            "error_msg": attempt.code_error_message,
+            "final_status": problem.verification_status if is_last else "BOTH_FAILURE",
+            "full_LLM_output": attempt.full_LLM_output,
+            "corrections": attempt.LLM_corrections,
+            "LLM_feedback": attempt.LLM_feedback,
+            "is_sympy_error": attempt.is_sympy_error,
+            "feedback": "",
+        })
+    history[-1]["reused_problem_id"] = problem.id
+    return history
+
+
+def reusable_history(query):
+    """History of an already VERIFIED query asking the same thing, unless the cache is bypassed."""
+    if not settings.LLM_CACHE_ENABLED or cache.is_bypassed():
+        return None
+    problem = dedup.find_duplicate(query)
+    if problem is None or not problem.attempts.exists():
+        return None
+    return history_from_problem(problem)
+
+
+def seed_problem(query):
+    """The VERIFIED problem similar enough to seed this query's first proposal, if any."""
+    if settings.QUERY_DEDUP_SEED_THRESHOLD <= 0 or cache.is_bypassed():
+        return None
+    match = dedup.find_similar(query, settings.QUERY_DEDUP_SEED_THRESHOLD)
+    return match[0] if match else None
+
+
+def solve_query(query, on_progress=None):
+    """Runs the multi-agent loop; key selection and retries happen in the pool.
+
+    With SPECULATIVE_CANDIDATES > 1 every proposal is raced between candidates.
+    A query that was already VERIFIED, up to formatting, is answered from the
+    database without any LLM call; a similar one hands its verified solution
+    to the first proposal.
+    """
+    history = reusable_history(query)
+    if history is not None:
+        return history
+    seed = seed_problem(query)
+    reference = dedup.reference_feedback(seed) if seed else ""
+    auditor = build_auditor()
+    if auditor.speculative_candidates > 1:
+        history = auditor.process_speculative(query, get_event_loop(), on_progress=on_progress, reference=reference)
+    else:
+        history = auditor.process_query(query, on_progress=on_progress, reference=reference)
+    if seed:
+        history[0]["seeded_from"] = seed.id
+    return history
+
+
+def stream_solve(query):
+    """Streaming counterpart of solve_query + save_history for the live result page.
+
+    Yields the Auditor's (event, payload) pairs; the final "done" payload also
+    carries the id of the stored EngineeringProblem.
+    """
+    history = reusable_history(query)
+    if history is not None:
+        yield "done", {"history": history, "problem_id": history[-1]["reused_problem_id"]}
+        return
+
+    seed = seed_problem(query)
+    reference = dedup.reference_feedback(seed) if seed else ""
+    for event, payload in build_auditor().iter_query(query, stream=True, reference=reference):
+        if event == "done":
+            if seed:
+                payload["history"][0]["seeded_from"] = seed.id
+            problem = save_history(query, payload["history"])
+            payload = {**payload, "problem_id": problem.id}
+        yield event, payload
+
+
+def _attempt_rows(problem, history):
+    return [
+        VerificationAttempt(
+            problem=problem,
+            sympy_code=attempt.get("code", ""),
+            code_status=attempt.get("symbolic_passed", False),
+            code_error_message=attempt.get("error_msg", ""),
+            LLM_status=attempt.get("semantic_status", False),
+            LLM_affirmation=attempt.get("affirmation", ""),
+            LLM_corrections=attempt.get("corrections", ""),
+            full_LLM_output=attempt.get("full_LLM_output", ""),
+            LLM_feedback=attempt.get("LLM_feedback", ""),
+            is_sympy_error=attempt.get("is_sympy_error", False),
+            propose_ms=attempt.get("propose_ms"),
+            audit_ms=attempt.get("audit_ms"),
+            sympy_ms=attempt.get("sympy_ms"),
+            check_ms=attempt.get("verification_ms"),
+            prompt_tokens=attempt.get("prompt_tokens"),
+            completion_tokens=attempt.get("completion_tokens"),
+            proposer_key=attempt.get("proposer_key", ""),
+            skeptic_key=attempt.get("skeptic_key", ""),
+            recovery=attempt.get("recovery", ""),
+            stop_reason=attempt.get("stop_reason") or "",
+        )
+        for attempt in history
+        # One row per round: speculative candidates that lost the race (cancelled ones
+        # included) stay in the returned history, but are not attempts of the problem
+        if not attempt.get("lost_race")
+    ]
+
+
+def _history_tokens(history):
+    """LLM tokens used over a run's attempts; None when no call reported usage."""
+    known = [
+        (attempt.get("prompt_tokens") or 0) + (attempt.get("completion_tokens") or 0)
+        for attempt in history
+        if attempt.get("prompt_tokens") is not None or attempt.get("completion_tokens") is not None
+    ]
+    return sum(known) if known else None
+
+
+def save_histories(runs):
+    """Stores several finished (query, history) runs in a single transaction.
+
+    Problems and attempts go in with one bulk INSERT each, so a whole batch
+    costs one commit. Returns the EngineeringProblem for every run, in order.
+    """
+    problems = [None] * len(runs)
+    new_problems = []
+    reused = {}
+    for i, (query, history) in enumerate(runs):
+        final_result = history[-1]
+        if final_result.get("reused_problem_id"):
+            # Served from an earlier VERIFIED run; nothing new to store
+            reused[i] = final_result["reused_problem_id"]
+            continue
+        problems[i] = EngineeringProblem(
+            prompt=query,
+            category=final_result.get("category", "General"),
+            final_solution=final_result.get("proposed_solution"),
+            verification_status=final_result.get("final_status"),
+            # Rounds, not entries: speculative candidates share their round's number
+            total_attempts=final_result.get("attempt", len(history)),
+            model_name=final_result.get("model", ""),
+            solve_ms=final_result.get("elapsed_ms"),
+            total_tokens=_history_tokens(history),
+            seeded_from_id=history[0].get("seeded_from"),
+        )
+        new_problems.append((problems[i], history))
+
+    if reused:
+        existing = EngineeringProblem.objects.in_bulk(set(reused.values()))
+        for i, problem_id in reused.items():
+            problems[i] = existing[problem_id]
+
+    if new_problems:
+        created = [problem for problem, _ in new_problems]
+        # Before the write: a structure key may need a SymPy run in the sandbox
+        dedup.assign_keys(created)
+        write_start = time.perf_counter()
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                EngineeringProblem.objects.bulk_create(created)
+            else:
+                # Old SQLite: bulk_create cannot hand back primary keys
+                for problem in created:
+                    problem.save()
+            VerificationAttempt.objects.bulk_create(
+                [row for problem, history in new_problems for row in _attempt_rows(problem, history)],
+                batch_size=500,
+            )
+            record_problems(created)
+            dedup.index_problems(created)
+            search.index_problems([problem.pk for problem in created])
+            # Each problem's share of the write, set in the same transaction
+            db_ms = round((time.perf_counter() - write_start) * 1000 / len(created), 2)
+            EngineeringProblem.objects.filter(pk__in=[problem.pk for problem in created]).update(db_ms=db_ms)
+            for problem in created:
+                problem.db_ms = db_ms
+
+        for problem in created:
+            SOLVES.inc(status=problem.verification_status)
+            if problem.solve_ms is not None:
+                SOLVE_SECONDS.observe(problem.solve_ms / 1000, status=problem.verification_status)
+            if problem.seeded_from_id is not None:
+                SEEDED_SOLVES.inc()
+    if reused:
+        REUSED_SOLVES.inc(len(reused))
+
+    return problems
+
+
+def save_history(query, history):
+    """Stores a finished run as an EngineeringProblem plus one row per attempt."""
+    return save_histories([(query, history)])[0]
@@ -0,0 +1,58 @@
+from django.test import SimpleTestCase
+from solver.auditor_logic.sandbox import execute_sympy_code
+from solver.auditor_logic.verifiers import match_verifier
+
+
+class VerifierTests(SimpleTestCase):
+
+    def verdict(self, query, answer):
+        verification = match_verifier(query, answer)
+        self.assertIsNotNone(verification, query)
+        return execute_sympy_code(verification.script)[0]
+
+    def test_integral_with_bounds_in_words_is_definite(self):
+        query = "Evaluate the integral \\int x^2 dx from x = 0 to x = 2."
+        self.assertTrue(self.verdict(query, "$$\\boxed{\\frac{8}{3}}$$"))
+        self.assertFalse(self.verdict(query, "$$\\boxed{\\frac{x^3}{3} + C}$$"))
+
+    def test_integral_with_unreadable_bounds_is_left_to_the_skeptic(self):
+        self.assertIsNone(match_verifier("Evaluate \\int x^2 dx from the table.", "$$\\boxed{3}$$"))
+
+    def test_series_is_checked_to_the_requested_order(self):
+        query = "Find the Taylor series expansion of e^x cos(x) up to the x^4 term centered at x=0."
+        self.assertTrue(self.verdict(query, "$$1 + x - \\frac{x^3}{3} - \\frac{x^4}{6} + O(x^5)$$"))
+        self.assertFalse(self.verdict(query, "$$1 + x$$"))
+
+    def test_series_without_an_order_is_left_to_the_skeptic(self):
+        self.assertIsNone(match_verifier("Find the Taylor series of e^x.", "$$1 + x$$"))
+
+    def test_derivative_after_a_lead_verb(self):
+        self.assertTrue(self.verdict(
+            "Differentiate x^2 \\sin x with respect to x.", "$$\\boxed{2x\\sin x + x^2\\cos x}$$",
+        ))
+
+    def test_derivative_with_run_together_factors(self):
+        query = "Compute the derivative of g(t) = t^2 e^t."
+        self.assertTrue(self.verdict(query, "$$\\boxed{2te^t + t^2e^t}$$"))
+        self.assertFalse(self.verdict(query, "$$\\boxed{2te^t}$$"))
+
+    def test_ode_with_prose_before_the_equation(self):
+        self.assertTrue(self.verdict("Solve y' = 2y with y(0) = 3.", "$$\\boxed{3e^{2x}}$$"))
+        self.assertTrue(self.verdict("Solve the ODE y'' + y = 0, y(0)=0, y'(0)=1.", "$$\\boxed{\\sin t}$$"))
+        self.assertFalse(self.verdict("Solve the ODE y'' + y = 0, y(0)=0, y'(0)=1.", "$$\\boxed{\\cos t}$$"))
+
+    def test_laplace_transform(self):
+        query = "Find the Laplace transform of f(t) = t e^{-2t}."
+        self.assertTrue(self.verdict(query, "$$\\boxed{\\frac{1}{(s+2)^2}}$$"))
+        self.assertFalse(self.verdict(query, "$$\\boxed{\\frac{1}{s+2}}$$"))
+
+    def test_z_transform(self):
+        query = "Find the Z-transform of x[n] = 0.5^n u[n]."
+        self.assertTrue(self.verdict(query, "$$\\boxed{\\frac{z}{z - 0.5}}$$"))
+        self.assertFalse(self.verdict(query, "$$\\boxed{\\frac{z}{z - 2}}$$"))
+
+    def test_unexpected_symbols_are_an_error_not_a_mismatch(self):
+        verification = match_verifier("Differentiate x^2 with respect to x.", "$$\\boxed{2xk}$$")
+        passed, _, is_error, _ = execute_sympy_code(verification.script)
+        self.assertFalse(passed)
+        self.assertTrue(is_error)
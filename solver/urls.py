@@ -4,5 +4,19 @@ from . import views
 urlpatterns = [
     path('', views.index, name='index'),          # The main page
     path('solve/', views.solve_engineering_view, name='solve'), # The AJAX endpoint for the Auditor
+    path('solve/live/', views.solve_live, name='solve_live'), # Live result page fed by the SSE stream
+    path('solve/stream/', views.solve_stream, name='solve_stream'), # SSE: streamed proposal, audit and verdicts
+    path('solve/jobs/', views.submit_solve_job, name='submit_solve_job'), # Queue a query, returns a job id
+    path('solve/jobs/<int:job_id>/', views.solve_job_status, name='solve_job_status'), # Poll job progress and history
+    path('api/solve/batch/', views.solve_batch_api, name='solve_batch_api'), # Async batch solving (ASGI)
+    path('api/keys/', views.key_pool_status, name='key_pool_status'), # Key pool health (staff only)
+    path('api/cache/', views.response_cache_status, name='response_cache_status'), # Response cache hit/miss counters (staff only)
+    path('api/profiles/', views.profile_list, name='profile_list'), # Captured request profiles (staff only)
+    path('api/profiles/<str:name>/', views.profile_download, name='profile_download'), # Download one (staff only)
+    path('metrics', views.metrics, name='metrics'), # Prometheus exposition (bearer token or staff)
+    path('api/problems/', views.problem_history_api, name='problem_history_api'), # Stored problems and attempts, keyset-paginated
+    path('api/export/', views.export_problems, name='export_problems'), # Stream problems and attempts as CSV/JSONL/Parquet (staff only)
+    path('api/search/', views.search_api, name='search_api'), # Ranked full-text search over solutions and audits
+    path('history/', views.problem_history, name='history'), # Browse stored problems
     path('analytics/', views.analytics_dashboard, name='analytics') # The analytics dashboard
 ]
\ No newline at end of file
@@ -1,12 +1,29 @@
-import os
-from django.shortcuts import render
-from solver.models import EngineeringProblem, VerificationAttempt
-from .auditor_logic.auditor import Auditor
-from .auditor_logic.proposer import Proposer
-from .auditor_logic.skeptic import Skeptic
-from django.views.decorators.csrf import csrf_protect
-from django.db.models import Count, Q, Avg
+import asyncio
 import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from django.utils.dateparse import parse_date
+from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.http import require_GET, require_POST
+from solver.models import SolveJob
+from .analytics import LATENCY_WINDOW, STATUS_FIELDS, category_stats, cost_stats, known_categories, known_models
+from .auditor_logic import cache
+from .history import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, problem_page, problem_payload
+from .auditor_logic.metrics import REGISTRY, Counter, Gauge
+from .jobs import job_payload, submit_job
+from . import export, search
+from .profiling import PROFILE_NAME, list_profiles, profile_dir, profile_request, profile_summary
+from .services import build_auditor, configured_api_keys, get_key_pool, get_response_cache, save_histories, save_history, solve_query, stream_solve
 
 @csrf_protect
 def index(request):
@@ -14,6 +31,7 @@ def index(request):
 
 
 @csrf_protect
+@profile_request
 def solve_engineering_view(request):
     # GET: Just show the home page with the math-field
     if request.method == "GET":
@@ -27,51 +45,18 @@ def solve_engineering_view(request):
         if not query:
             return render(request, "solver/index.html", {"error": "Query cannot be empty"})
 
-        # 1. Initialize Multi-Agent System
-        api_keys = {}
-        for i in range(1, 4):
-            api_keys[f"GROQ_API_KEY{i}"] = os.getenv(f"GROQ_API_KEY{i}")
-        
-        for key, value in api_keys.items():
-            proposer = Proposer(api_key=value)
-            skeptic = Skeptic(api_key=value)
-            auditor = Auditor(proposer, skeptic, max_attempts=2)
-
-            # 2. Run the Logic Loop (Synchronous)
-            try:
-                history = auditor.process_query(query)
-            except Exception as e:
-                if key == "GROQ_API_KEY3":
-                    return render(request, "solver/index.html", {"error": f"Error processing query: {str(e)}"})
-                else:
-                    continue
-            break
+        # 1. Run the Multi-Agent Loop (Synchronous); "no_cache" forces fresh LLM calls
+        try:
+            with cache.bypass() if request.POST.get("no_cache") else nullcontext():
+                history = solve_query(query)
+        except Exception as e:
+            return render(request, "solver/index.html", {"error": f"Error processing query: {str(e)}"})
         final_result = history[-1]
 
-        # 3. Persistent Storage (Keep this for your ENSAM Analytics)
-        problem_record = EngineeringProblem.objects.create(
-            prompt=query,
-            category=final_result.get("category", "General"),
-            final_solution=final_result.get("proposed_solution"),
-            verification_status=final_result.get("final_status"),
-            total_attempts=len(history)
-        )
-        
-        for attempt in history:
-            VerificationAttempt.objects.create(
-                problem=problem_record,
-                sympy_code=attempt.get("code", ""),
-                code_status=attempt.get("symbolic_passed", False),
-                code_error_message=attempt.get("error_msg", ""),
-                LLM_status=attempt.get("semantic_status", False),
-                LLM_affirmation=attempt.get("affirmation", ""),
-                LLM_corrections=attempt.get("corrections", ""),
-                full_LLM_output=attempt.get("full_LLM_output", ""),
-                LLM_feedback=attempt.get("LLM_feedback", ""),
-                is_sympy_error=attempt.get("is_sympy_error", False)
-            )
-
-        # 4. Render the Result Page directly
+        # 2. Persistent Storage (Keep this for your ENSAM Analytics)
+        save_history(query, history)
+
+        # 3. Render the Result Page directly
         # We pass 'history' and 'final' so the template can iterate over them
         return render(request, "solver/result.html", {
             "query": query,
@@ -79,42 +64,268 @@ def solve_engineering_view(request):
             "history": history
         })
 
+# Salt of the stream ids handed out by solve_live and spent by solve_stream
+STREAM_SALT = "solver.solve_stream"
+# Stream ids a session may hold unspent (pages opened but never streamed)
+MAX_PENDING_STREAMS = 20
+
+
+@csrf_protect
+@require_POST
+def solve_live(request):
+    # Live result page: renders immediately and follows /solve/stream/ over SSE.
+    # EventSource can only GET, so the solve is authorized here, under CSRF, and
+    # the page gets a signed one-time stream id carrying the query
+    query = request.POST.get("query")
+    if not query:
+        return render(request, "solver/index.html", {"error": "Query cannot be empty"})
+    nonce = get_random_string(16)
+    pending = request.session.get("solve_streams", [])[-(MAX_PENDING_STREAMS - 1):]
+    request.session["solve_streams"] = pending + [nonce]
+    stream_id = signing.dumps(
+        {"query": query, "no_cache": bool(request.POST.get("no_cache")), "nonce": nonce}, salt=STREAM_SALT
+    )
+    return render(request, "solver/live.html", {"query": query, "stream_id": stream_id})
+
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _solve_events(query, use_cache):
+    # Everything runs inside this generator, so the cache bypass has to as well
+    with nullcontext() if use_cache else cache.bypass():
+        try:
+            for event, payload in stream_solve(query):
+                yield _sse(event, payload)
+        except Exception as e:
+            yield _sse("error", {"error": f"Error processing query: {str(e)}"})
+
+
+async def _iterate_in_thread(iterator):
+    # Under ASGI Django would buffer a sync iterator whole, so drive it from
+    # one dedicated thread (keeping its context and DB connection together)
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream") as executor:
+        try:
+            while True:
+                chunk = await loop.run_in_executor(executor, next, iterator, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            await loop.run_in_executor(executor, connection.close)
+
+
+@require_GET
+def solve_stream(request):
+    # Server-Sent Events: Proposer tokens as they arrive, then the audit,
+    # the SymPy verdict of each attempt and finally the full history.
+    # ?id= is a stream id from solve_live, good once, in the session that got it
+    try:
+        stream = signing.loads(request.GET.get("id", ""), salt=STREAM_SALT, max_age=settings.SOLVE_STREAM_MAX_AGE)
+    except signing.BadSignature:  # SignatureExpired included
+        return JsonResponse({"error": "Invalid or expired stream id"}, status=403)
+    pending = request.session.get("solve_streams", [])
+    if stream["nonce"] not in pending:
+        return JsonResponse({"error": "Stream id already used"}, status=403)
+    pending.remove(stream["nonce"])
+    request.session["solve_streams"] = pending
+
+    events = _solve_events(stream["query"], use_cache=not stream["no_cache"])
+    if isinstance(request, ASGIRequest):
+        events = _iterate_in_thread(events)
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Stop nginx from buffering the stream
+    return response
+
+
+@csrf_protect
+@require_POST
+def submit_solve_job(request):
+    # Submit-and-poll mode: queue the query and return immediately
+    query = request.POST.get("query")
+    if not query:
+        return JsonResponse({"error": "Query cannot be empty"}, status=400)
+
+    job = submit_job(query, use_cache=not request.POST.get("no_cache"))
+    return JsonResponse({
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": reverse("solve_job_status", args=[job.id]),
+    }, status=202)
+
+
+@require_GET
+def solve_job_status(request, job_id):
+    job = get_object_or_404(SolveJob, id=job_id)
+    return JsonResponse(job_payload(job))
+
+
+@require_POST
+async def solve_batch_api(request):
+    # Async batch mode: keeps several problems in flight on the event loop
+    # Body: {"queries": [...], "concurrency": N, "no_cache": false}
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Body must be JSON"}, status=400)
+
+    queries = payload.get("queries")
+    if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q for q in queries):
+        return JsonResponse({"error": "'queries' must be a non-empty list of strings"}, status=400)
+    if len(queries) > settings.SOLVER_BATCH_MAX_QUERIES:
+        return JsonResponse(
+            {"error": f"At most {settings.SOLVER_BATCH_MAX_QUERIES} queries per batch"}, status=400
+        )
+    try:
+        concurrency = int(payload.get("concurrency", settings.SOLVER_BATCH_CONCURRENCY))
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "'concurrency' must be an integer"}, status=400)
+    # Zero would never let a problem start; the setting is also the ceiling
+    concurrency = min(max(concurrency, 1), settings.SOLVER_BATCH_CONCURRENCY)
+
+    try:
+        auditor = build_auditor()
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=503)
+
+    # Tasks copy the current context, so the bypass reaches every problem in the batch
+    with cache.bypass() if payload.get("no_cache") else nullcontext():
+        batch = await auditor.process_many(queries, concurrency=concurrency)
+
+    # The whole batch is stored in one transaction
+    finished = [(query, history) for query, history in zip(queries, batch) if not isinstance(history, Exception)]
+    problems = iter(await sync_to_async(save_histories)(finished))
+
+    results = []
+    for query, history in zip(queries, batch):
+        if isinstance(history, Exception):
+            results.append({"query": query, "error": str(history)})
+            continue
+        results.append({
+            "query": query,
+            "problem_id": next(problems).id,
+            "final_status": history[-1]["final_status"],
+            "history": history,
+        })
+
+    return JsonResponse({"results": results})
+
+
+@staff_member_required
+@require_GET
+def key_pool_status(request):
+    # Per-key budgets and health of the shared Groq key pool (no secrets)
+    return JsonResponse({"keys": get_key_pool().stats()})
+
+
+@staff_member_required
+@require_GET
+def response_cache_status(request):
+    response_cache = get_response_cache()
+    return JsonResponse(response_cache.stats() if response_cache else {"enabled": False})
+
+
+def _scrape_time_metrics():
+    """Key pool and response cache state, read when /metrics is scraped."""
+    in_flight = Gauge("skeptic_key_in_flight", "LLM calls currently running on each API key", ["key"])
+    healthy = Gauge("skeptic_key_healthy", "1 when the key is usable, 0 while cooling down or disabled", ["key"])
+    # No keys configured yet: no pool to report on, but the rest still scrapes
+    for key in get_key_pool().stats() if configured_api_keys() else ():
+        in_flight.set(key["in_flight"], key=key["name"])
+        healthy.set(int(key["healthy"]), key=key["name"])
+    metrics = [in_flight, healthy]
+
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        lookups = Counter("skeptic_cache_lookups_total", "Response cache lookups, by result", ["result"])
+        stats = response_cache.stats()
+        lookups.inc(stats["hits"], result="hit")
+        lookups.inc(stats["misses"], result="miss")
+        entries = Gauge("skeptic_cache_entries", "Completions stored in the response cache")
+        entries.set(stats["entries"])
+        metrics += [lookups, entries]
+    return metrics
+
+
+@require_GET
+def metrics(request):
+    # Prometheus scrapes with "Authorization: Bearer <METRICS_TOKEN>"; staff may look too
+    token = settings.METRICS_TOKEN
+    authorized = bool(token) and request.headers.get("Authorization") == f"Bearer {token}"
+    if not (authorized or request.user.is_staff):
+        return HttpResponse("Forbidden", status=403, content_type="text/plain")
+    return HttpResponse(
+        REGISTRY.render(_scrape_time_metrics()), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@staff_member_required
+@require_GET
+def profile_list(request):
+    # Profiles captured with ?profile=1 / X-Profile: 1, newest first
+    return JsonResponse({"profiles": list_profiles()})
+
+
+@staff_member_required
+@require_GET
+def profile_download(request, name):
+    # The raw pstats dump (open with pstats or snakeviz), or ?format=txt for a summary
+    path = profile_dir() / name
+    if not PROFILE_NAME.match(name) or not path.exists():
+        raise Http404("No such profile")
+    if request.GET.get("format") == "txt":
+        return HttpResponse(profile_summary(path), content_type="text/plain; charset=utf-8")
+    return FileResponse(path.open("rb"), as_attachment=True, filename=name)
+
+
+def _date_param(request, name):
+    # Malformed or impossible dates are treated as "no filter"
+    try:
+        return parse_date(request.GET.get(name, ""))
+    except ValueError:
+        return None
+
+
 def analytics_dashboard(request):
-    # Overall Metrics
-    total_problems = EngineeringProblem.objects.count()
-    overall_verified = EngineeringProblem.objects.filter(verification_status="VERIFIED").count()
-    
-    # Detailed Category Stats
-    categories = list(EngineeringProblem.objects.values_list('category', flat=True).distinct())
+    # Optional filters: ?start=YYYY-MM-DD&end=YYYY-MM-DD&model=<proposer model>
+    start = _date_param(request, "start")
+    end = _date_param(request, "end")
+    model = request.GET.get("model") or None
+
+    # Detailed Category Stats (one grouped query, or the materialized summary)
+    rows = category_stats(start=start, end=end, model=model)
+    total_problems = sum(row["total"] for row in rows)
+    overall_verified = sum(row["verified"] for row in rows)
+
+    categories = [row["category"] for row in rows]
     study_data = []
-    
+
     # Chart Data Lists
     v_data, sym_data, sem_data, fail_data = [], [], [], []
 
-    for cat in categories:
-        qs = EngineeringProblem.objects.filter(category=cat)
-        cat_total = qs.count()
-        
-        # State Counts
-        v = qs.filter(verification_status='VERIFIED').count()
-        sym = qs.filter(verification_status='SYMBOLIC_ONLY_PASS').count()
-        sem = qs.filter(verification_status='SEMANTIC_ONLY_PASS').count()
-        f = qs.filter(verification_status='BOTH_FAILURE').count()
+    for row in rows:
+        cat_total = row["total"]
 
         # Append to Table Data
         study_data.append({
-            'category': cat,
+            'category': row["category"],
             'total': cat_total,
-            'avg_attempts': qs.aggregate(Avg('total_attempts'))['total_attempts__avg'] or 0,
-            'hallucination_rate': (sem / cat_total * 100) if cat_total > 0 else 0
+            'avg_attempts': (row["attempts_sum"] / cat_total) if cat_total > 0 else 0,
+            'hallucination_rate': (row["semantic_only"] / cat_total * 100) if cat_total > 0 else 0
         })
 
         # Append to Chart Data (%)
         if cat_total > 0:
-            v_data.append(round((v / cat_total) * 100, 1))
-            sym_data.append(round((sym / cat_total) * 100, 1))
-            sem_data.append(round((sem / cat_total) * 100, 1))
-            fail_data.append(round((f / cat_total) * 100, 1))
+            v_data.append(round((row["verified"] / cat_total) * 100, 1))
+            sym_data.append(round((row["symbolic_only"] / cat_total) * 100, 1))
+            sem_data.append(round((row["semantic_only"] / cat_total) * 100, 1))
+            fail_data.append(round((row["both_failure"] / cat_total) * 100, 1))
+
+    # Latency and token cost (only problems stored with timings)
+    costs = cost_stats(start=start, end=end, model=model)
 
     return render(request, "solver/analytics.html", {
         "total_problems": total_problems,
@@ -125,4 +336,114 @@ def analytics_dashboard(request):
         "sym_data": json.dumps(sym_data),
         "sem_data": json.dumps(sem_data),
         "fail_data": json.dumps(fail_data),
-    })
\ No newline at end of file
+        "cost_stats": costs,
+        "latency_window": LATENCY_WINDOW,
+        "cost_categories": json.dumps([row["category"] for row in costs]),
+        "p50_data": json.dumps([round(row["p50_ms"] / 1000, 2) for row in costs]),
+        "p95_data": json.dumps([round(row["p95_ms"] / 1000, 2) for row in costs]),
+        "models": known_models(),
+        "filters": {"start": start, "end": end, "model": model},
+    })
+
+
+def _history_filters(request):
+    # ?status=&category=&start=YYYY-MM-DD&end=YYYY-MM-DD&model=; empty values mean "all"
+    return {
+        "status": request.GET.get("status") or None,
+        "category": request.GET.get("category") or None,
+        "start": _date_param(request, "start"),
+        "end": _date_param(request, "end"),
+        "model": request.GET.get("model") or None,
+    }
+
+
+def _page_url(request, cursor):
+    params = request.GET.copy()
+    params["cursor"] = cursor
+    return f"{request.path}?{params.urlencode()}"
+
+
+@require_GET
+def problem_history_api(request):
+    # Keyset pagination: follow "next" (or pass ?cursor=<next_cursor>) until it is null
+    try:
+        limit = min(max(int(request.GET.get("limit", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    try:
+        problems, next_cursor = problem_page(
+            **_history_filters(request), cursor=request.GET.get("cursor"), limit=limit
+        )
+    except ValueError:
+        return JsonResponse({"error": "Invalid cursor"}, status=400)
+
+    return JsonResponse({
+        "results": [problem_payload(problem) for problem in problems],
+        "next_cursor": next_cursor,
+        "next": _page_url(request, next_cursor) if next_cursor else None,
+    })
+
+
+@require_GET
+def search_api(request):
+    # ?q=<words, "phrases", prefix*, OR>&status=&category=&limit=&offset=; two lists, each ranked by BM25
+    if not search.available():
+        return JsonResponse({"error": "Search needs the SQLite FTS5 index"}, status=501)
+    try:
+        limit = min(max(int(request.GET.get("limit", search.DEFAULT_LIMIT)), 1), search.MAX_LIMIT)
+    except ValueError:
+        limit = search.DEFAULT_LIMIT
+    try:
+        offset = max(int(request.GET.get("offset", 0)), 0)
+    except ValueError:
+        offset = 0
+    try:
+        results = search.search(
+            request.GET.get("q", ""),
+            status=request.GET.get("status") or None,
+            category=request.GET.get("category") or None,
+            limit=limit,
+            offset=offset,
+        )
+    except ValueError:
+        return JsonResponse({"error": "Query cannot be empty"}, status=400)
+    return JsonResponse(results)
+
+
+@staff_member_required
+@require_GET
+def export_problems(request):
+    # ?format=csv|jsonl|parquet plus the history filters; streamed, whatever the row count
+    fmt = request.GET.get("format", "csv")
+    if fmt not in export.FORMATS:
+        return JsonResponse({"error": f"Unknown format, use one of: {', '.join(export.FORMATS)}"}, status=400)
+    if fmt not in export.available_formats():
+        return JsonResponse({"error": "Parquet export needs pyarrow"}, status=501)
+
+    content = export.export(fmt, **_history_filters(request))
+    if isinstance(request, ASGIRequest):
+        content = _iterate_in_thread(content)
+    response = StreamingHttpResponse(content, content_type=export.FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="problems.{fmt}"'
+    return response
+
+
+@require_GET
+def problem_history(request):
+    filters = _history_filters(request)
+    try:
+        problems, next_cursor = problem_page(**filters, cursor=request.GET.get("cursor"))
+    except ValueError:
+        raise Http404("Invalid cursor")
+
+    first_page = request.GET.copy()
+    first_page.pop("cursor", None)
+    return render(request, "solver/history.html", {
+        "problems": problems,
+        "filters": filters,
+        "statuses": list(STATUS_FIELDS),
+        "categories": known_categories(),
+        "models": known_models(),
+        "next_url": _page_url(request, next_cursor) if next_cursor else None,
+        "first_url": f"{request.path}?{first_page.urlencode()}" if "cursor" in request.GET else None,
+    })
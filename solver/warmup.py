@@ -0,0 +1,71 @@
+import importlib
+import logging
+import time
+from django.conf import settings
+from . import services
+
+logger = logging.getLogger(__name__)
+
+# Modules the first solve would otherwise import on the request path (SymPy, Groq SDK, httpx)
+AGENT_MODULES = (
+    "solver.auditor_logic.auditor",
+    "solver.auditor_logic.proposer",
+    "solver.auditor_logic.skeptic",
+    "solver.auditor_logic.verifiers",
+)
+
+# One canned problem per common verifier; running their scripts loads the
+# integrate/dsolve/laplace_transform machinery SymPy otherwise imports on first use
+WARMUP_PROBLEMS = (
+    ("Evaluate the indefinite integral: \\int x \\cos(x) dx.", "$$x\\sin(x) + \\cos(x) + C$$"),
+    ("Find the derivative of f(x) = ln(sin(x^2)).", "$$f'(x) = 2x\\cot(x^2)$$"),
+    ("Solve the second-order linear ODE: y'' + 6y' + 9y = 0 with y(0)=2, y'(0)=1.", "$$y(t) = (2 + 7t)e^{-3t}$$"),
+    ("Find the Laplace transform of f(t) = t^2 e^{-3t}.", "$$F(s) = \\frac{2}{(s+3)^3}$$"),
+)
+
+
+def warmup_scripts():
+    from .auditor_logic.verifiers import match_verifier
+
+    return [match_verifier(query, solution).script for query, solution in WARMUP_PROBLEMS]
+
+
+def warm_up():
+    """Loads and exercises what the first solve would otherwise pay for.
+
+    Imports the agents, builds the shared key pool and Groq clients, starts the
+    SymPy sandbox and runs the warm-up scripts in its workers (or in this
+    process when the sandbox is off). Returns {step: milliseconds}.
+    """
+    timings = {}
+
+    def timed(step, fn):
+        start = time.perf_counter()
+        fn()
+        timings[step] = round((time.perf_counter() - start) * 1000, 1)
+
+    def clients():
+        if not services.configured_api_keys():
+            return  # Analytics-only deployments: nothing to pre-build
+        pool, registry = services.get_key_pool(), services.get_client_registry()
+        for key in pool.keys:
+            registry.get(key)
+
+    def sympy():
+        scripts = warmup_scripts()
+        sandbox = services.get_sandbox()
+        if sandbox is not None:
+            # Enough jobs for every worker to pick up several of them
+            sandbox.map(scripts * sandbox.size)
+        else:
+            from .auditor_logic.sandbox import execute_sympy_code
+
+            for script in scripts:
+                execute_sympy_code(script, settings.SYMPY_SIMPLIFY_BUDGET)
+
+    timed("imports", lambda: [importlib.import_module(name) for name in AGENT_MODULES])
+    timed("clients", clients)
+    timed("sandbox", services.get_sandbox)
+    timed("sympy", sympy)
+    logger.info("Solver warm-up done in %.0f ms: %s", sum(timings.values()), timings)
+    return timings
@@ -0,0 +1,80 @@
+import logging
+import threading
+from django.conf import settings
+from django.db import close_old_connections
+from .services import save_histories
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    """Write-behind buffer for batch runs.
+
+    Finished runs are queued with add() and written in one transaction once
+    `flush_every` runs are pending or `flush_interval` seconds have passed,
+    whichever comes first. on_flush, if given, is called after each commit
+    with [(tag, problem), ...], tag being whatever was passed to add(). Use
+    as a context manager (or call close()) so the tail of the batch is
+    written too.
+    """
+
+    def __init__(self, flush_every=None, flush_interval=None, on_flush=None):
+        self.flush_every = flush_every or settings.HISTORY_FLUSH_EVERY
+        self.flush_interval = flush_interval or settings.HISTORY_FLUSH_SECONDS
+        self.on_flush = on_flush
+        self.written = 0
+        self.flushes = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, query, history, tag=None):
+        with self._lock:
+            self._pending.append((query, history, tag))
+            full = len(self._pending) >= self.flush_every
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Writes everything pending now; returns the stored problems."""
+        with self._flush_lock:
+            with self._lock:
+                runs, self._pending = self._pending, []
+            if not runs:
+                return []
+            try:
+                problems = save_histories([(query, history) for query, history, _ in runs])
+            except Exception:
+                # Keep the runs so the next flush (or close) retries them
+                with self._lock:
+                    self._pending[:0] = runs
+                raise
+            self.written += len(runs)
+            self.flushes += 1
+        if self.on_flush:
+            self.on_flush([(tag, problem) for (_, _, tag), problem in zip(runs, problems)])
+        return problems
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Background history flush failed; will retry")
+            finally:
+                # This thread is outside Django's request cycle
+                close_old_connections()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()